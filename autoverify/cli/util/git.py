@@ -247,3 +247,42 @@ def validate_commit_hash(repo_path: Path, commit_hash: str) -> bool:
             return True
         except subprocess.CalledProcessError:
             return False
+
+
+def read_head_commit(repo_path: Path) -> str | None:
+    """Read the commit hash HEAD points to, without calling git.
+
+    Args:
+        repo_path: Path to the git repository
+
+    Returns:
+        The full commit hash, or None if it could not be determined
+    """
+    git_dir = repo_path / ".git"
+
+    try:
+        # Submodules and worktrees have a file pointing to the git dir
+        if git_dir.is_file():
+            git_dir = repo_path / git_dir.read_text().strip().removeprefix("gitdir: ")
+
+        head = (git_dir / "HEAD").read_text().strip()
+
+        if not head.startswith("ref: "):
+            return head
+
+        ref = head.removeprefix("ref: ")
+        ref_file = git_dir / ref
+
+        if ref_file.is_file():
+            return ref_file.read_text().strip()
+
+        packed_refs = git_dir / "packed-refs"
+
+        if packed_refs.is_file():
+            for line in packed_refs.read_text().splitlines():
+                if line.endswith(" " + ref):
+                    return line.split(maxsplit=1)[0]
+    except OSError:
+        return None
+
+    return None
@@ -31,6 +31,21 @@ class AutoVerifyConfig:
     # Runtime preferences
     prefer_gpu: bool = True
     default_timeout: int = 600
+    warm_workers: bool = False
+    warm_worker_max_jobs: int = 100
+    result_cache: bool = False
+    result_cache_path: Path | None = None
+    result_cache_max_size_mb: int = 1024
+    output_tail_kb: int = 256
+    output_log_path: Path | None = None
+    stop_on_verdict: bool = False
+    kill_grace_sec: float = 5.0
+    memory_limit_mb: int | None = None
+    limit_cpu_time: bool = False
+    cgroup_path: Path | None = None
+    scratch_path: Path | None = None
+    keep_workspaces_path: Path | None = None
+    config_store_max_entries: int = 1024
 
     # Logging
     log_level: str = "INFO"
@@ -67,9 +82,19 @@ class AutoVerifyConfig:
                 result[key] = str(value)
             elif value is None:
                 # Handle None values - tomli-w can't serialize None
-                if key == "custom_install_path":
+                if key in (
+                    "custom_install_path",
+                    "result_cache_path",
+                    "output_log_path",
+                    "cgroup_path",
+                    "scratch_path",
+                    "keep_workspaces_path",
+                ):
                     # Skip None paths
                     continue
+                elif key == "memory_limit_mb":
+                    # No limit
+                    continue
                 else:
                     # For other None values, use appropriate defaults
                     if key == "env_strategy":
@@ -233,6 +258,39 @@ env_strategy = "conda"
 prefer_gpu = true
 default_timeout = 600
 
+# Keep a warm worker per verifier that imports the tool once (opt-in)
+warm_workers = false
+warm_worker_max_jobs = 100
+
+# Reuse results of identical verification queries from an on-disk cache
+result_cache = false
+# result_cache_path = "/path/to/shared/cache"
+result_cache_max_size_mb = 1024
+
+# Characters of tool output kept per run, the rest is only in the log files
+output_tail_kb = 256
+# Keep the complete output of every run as compressed log files (optional)
+# output_log_path = "/path/to/logs"
+# Kill tools as soon as they printed their final verdict
+stop_on_verdict = false
+
+# Seconds tools get to exit after SIGTERM, before they are killed with SIGKILL
+kill_grace_sec = 5.0
+# Limit the memory of every run, runs exceeding it result in MEMOUT (optional)
+# memory_limit_mb = 16384
+# Limit the CPU time of every process to (timeout + grace) * allocated cores
+limit_cpu_time = false
+# Writable cgroup v2 directory to create a cgroup per run in, which then
+# enforces the memory limit and the allocated number of cores (optional)
+# cgroup_path = "/sys/fs/cgroup/user.slice/user-1000.slice/user@1000.service/autoverify"
+
+# Directory for the scratch files of runs, defaults to /dev/shm if available
+# scratch_path = "/path/to/scratch"
+# Archive the scratch directory of every run instead of removing it (optional)
+# keep_workspaces_path = "/path/to/workspaces"
+# Number of distinct materialized tool configs kept in the scratch directory
+config_store_max_entries = 1024
+
 # Logging
 log_level = "INFO"
 verbose_installation = false
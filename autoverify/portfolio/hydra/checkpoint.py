@@ -0,0 +1,157 @@
+"""Checkpoints of Hydra runs.
+
+After every iteration, Hydra writes its state to a new directory in the
+checkpoint directory of the run: the portfolio, the cost matrix, the
+resources that are left, the state of `random` and the runhistories of the
+configs of the iteration. The directory is written under a temporary name
+and renamed once it is complete, so a crash never leaves a partial
+checkpoint behind.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ConfigSpace import ConfigurationSpace
+from smac import RunHistory
+
+from autoverify.portfolio.hydra.cost_matrix import CostMatrix
+from autoverify.portfolio.portfolio import Portfolio
+
+_ITER_DIR = re.compile(r"iter_(\d+)")
+
+_PORTFOLIO_FILE = "portfolio.json"
+_COST_MATRIX_FILE = "cost_matrix.npz"
+_STATE_FILE = "state.json"
+
+
+@dataclass
+class HydraCheckpoint:
+    """State of a Hydra run after one of its iterations.
+
+    Attributes:
+        iteration: The iteration that was completed.
+        portfolio: The portfolio after the iteration, with its costs.
+        cost_matrix: The costs of all configs that were evaluated so far.
+        resources: What is left of the resources, see
+            `ResourceTracker.get_state`.
+        stop: If Hydra decided to stop early.
+        random_state: State of `random`, which picks the verifiers if
+            there is no pick budget.
+    """
+
+    iteration: int
+    portfolio: Portfolio
+    cost_matrix: CostMatrix
+    resources: dict[str, Any]
+    stop: bool
+    random_state: tuple[Any, ...]
+
+    def save(self, checkpoint_dir: Path, runhistories: Sequence[RunHistory] = ()) -> Path:
+        """Write the checkpoint to a new directory in `checkpoint_dir`.
+
+        Arguments:
+            checkpoint_dir: Directory with the checkpoints of the run.
+            runhistories: The runhistories of the configs that were tuned
+                in the iteration, written next to the state.
+
+        Returns:
+            Path: The directory of the checkpoint.
+        """
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = checkpoint_dir / f"iter_{self.iteration}"
+        tmp_path = Path(tempfile.mkdtemp(dir=checkpoint_dir, prefix=f".tmp-iter_{self.iteration}-"))
+
+        try:
+            self.portfolio.to_json(tmp_path / _PORTFOLIO_FILE)
+            self.cost_matrix.save(tmp_path / _COST_MATRIX_FILE)
+
+            for i, runhistory in enumerate(runhistories):
+                runhistory.save(tmp_path / f"runhistory_{i}.json")
+
+            state = {
+                "iteration": self.iteration,
+                "portfolio_costs": self.portfolio.get_all_costs(),
+                "resources": self.resources,
+                "stop": self.stop,
+                "random_state": self.random_state,
+            }
+
+            with open(tmp_path / _STATE_FILE, "w") as f:
+                json.dump(state, f, indent=4)
+
+            # Only a checkpoint of an iteration that was run again is replaced
+            if path.exists():
+                shutil.rmtree(path)
+
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        return path
+
+    @classmethod
+    def load(
+        cls,
+        path: Path,
+        config_space_map: Mapping[str, ConfigurationSpace] | None = None,
+    ) -> HydraCheckpoint:
+        """Read a checkpoint that was written by `save`.
+
+        Arguments:
+            path: The directory of the checkpoint.
+            config_space_map: The configuration space of each verifier, by
+                default those of the verifiers of auto-verify.
+        """
+        with open(path / _STATE_FILE) as f:
+            state = json.load(f)
+
+        portfolio = Portfolio.from_json(path / _PORTFOLIO_FILE, config_space_map)
+        portfolio.update_costs(state["portfolio_costs"])
+
+        # JSON turns the tuples of the state into lists
+        version, internal_state, gauss_next = state["random_state"]
+
+        return cls(
+            iteration=state["iteration"],
+            portfolio=portfolio,
+            cost_matrix=CostMatrix.load(path / _COST_MATRIX_FILE, config_space_map),
+            resources=state["resources"],
+            stop=state["stop"],
+            random_state=(version, tuple(internal_state), gauss_next),
+        )
+
+    def restore_random_state(self):
+        """Continue `random` where the run left off."""
+        random.setstate(self.random_state)
+
+
+def latest_checkpoint(checkpoint_dir: Path) -> Path | None:
+    """The checkpoint of the last completed iteration, `None` if there is none."""
+    if not checkpoint_dir.is_dir():
+        return None
+
+    latest: tuple[int, Path] | None = None
+
+    for path in checkpoint_dir.iterdir():
+        match = _ITER_DIR.fullmatch(path.name)
+
+        if match is None or not path.is_dir():
+            continue
+
+        iteration = int(match.group(1))
+
+        if latest is None or iteration > latest[0]:
+            latest = (iteration, path)
+
+    return latest[1] if latest is not None else None
@@ -1,64 +1,155 @@
-"""_summary_."""
-
-from collections.abc import Iterable, MutableMapping
+"""Average cost per instance per configuration, as NumPy arrays.
+
+Configurations and instances are interned, each gets the index of a row or
+column of the arrays. Besides the average cost, the matrix stores how many
+costs were averaged and two censoring masks: costs that are a lower bound
+of the real cost (capped or censored runs) and costs of runs that timed
+out. Cells without costs have a cost of `np.inf`, so the virtual best
+solver (VBS) of any set of configurations is a minimum over rows.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import weakref
+from collections.abc import Hashable, Iterable, Iterator, Mapping, MutableMapping, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TypeVar
 
 import numpy as np
-from ConfigSpace import Configuration
+import numpy.typing as npt
+from ConfigSpace import Configuration, ConfigurationSpace
 from smac import RunHistory
+from smac.runhistory.dataclasses import TrialKey
 from smac.runhistory.enumerations import StatusType
 
-from autoverify.util import add_to_average
+from autoverify.util.verifiers import get_verifier_configspace
+
+# Rows and columns are added in chunks, so growing the arrays is amortized
+_MIN_CAPACITY = 16
+
+_ScalarT = TypeVar("_ScalarT", bound=np.generic)
+
+
+@dataclass
+class _Watermark:
+    """The trials of a runhistory that were added to a matrix.
+
+    Attributes:
+        position: The first `position` trials were all added.
+        consumed: Trials after `position` that were added, e.g. trials
+            that finished before trials that were started earlier.
+    """
+
+    position: int = 0
+    consumed: set[TrialKey] = field(default_factory=set)
 
 
 class InstanceCost(MutableMapping[str, float]):
-    """Mapping from instance to cost."""
+    """Mapping from instance to cost, a row of a `CostMatrix`.
 
-    def __init__(self):
-        """Creates a new.
+    The mapping reads and writes the row of its config in the matrix. A new
+    `InstanceCost` has a matrix of its own. Assigning it to a config of a
+    `CostMatrix` copies its costs into that matrix.
+    """
 
-        empty `InstanceCost`.
-        """
-        self.store: dict[str, float] = {}
-        # Map that stores the amount of values in the average cost
-        # Needed for updating the average
-        self._val_counts: dict[str, int] = {}
+    def __init__(self, matrix: CostMatrix | None = None, key: Hashable | None = None):
+        """Creates a new, empty `InstanceCost`.
 
-    def update_cost(self, key: str, val: float):
+        Arguments:
+            matrix: The matrix of the row, `None` for a new matrix.
+            key: The config of the row in `matrix`.
+        """
+        if matrix is None:
+            matrix = CostMatrix()
+            key = object()
+            matrix._row(key, create=True)
+
+        self._matrix = matrix
+        self._key = key
+
+    @property
+    def _row_index(self) -> int:
+        return self._matrix._row(self._key)
+
+    @property
+    def store(self) -> dict[str, float]:
+        """The costs, as a dict."""
+        return dict(self.items())
+
+    @property
+    def _val_counts(self) -> dict[str, int]:
+        """Number of costs in the average cost of each instance."""
+        counts = self._matrix._counts[self._row_index]
+        return {inst: int(counts[col]) for inst, col in self._matrix._instance_index.items() if counts[col]}
+
+    def update_cost(self, key: str, val: float, *, capped: bool = False, timed_out: bool = False):
         """Update the cost of the key and value.
 
         Arguments:
             key: The instance.
             val: The cost.
+            capped: If the cost is a cap, instead of the real cost.
+            timed_out: If the cost is of a run that timed out.
         """
-        if key not in self.store:
-            self.store[key] = val
-            self._val_counts[key] = 1
-            return
+        row, col = self._row_index, self._matrix._col(key, create=True)
+        self._matrix._add_costs(
+            np.array([row]),
+            np.array([col]),
+            np.array([val], dtype=float),
+            np.array([capped]),
+            np.array([timed_out]),
+        )
+
+    def is_capped(self, key: str) -> bool:
+        """If the cost of the instance is a lower bound of the real cost.
+
+        This is the case if any of its costs was capped by adaptive capping
+        or censored by a multi-fidelity budget, the run was stopped before
+        its real cost was known.
+        """
+        col = self._matrix._instance_index.get(key)
+        return col is not None and bool(self._matrix._capped[self._row_index, col])
 
-        size = self._val_counts[key]
-        average = self.store[key]
-        self.store[key] = add_to_average(average, val, size)
-        self._val_counts[key] += 1
+    def is_timed_out(self, key: str) -> bool:
+        """If any of the costs of the instance is of a run that timed out."""
+        col = self._matrix._instance_index.get(key)
+        return col is not None and bool(self._matrix._timed_out[self._row_index, col])
 
     def __getitem__(self, key) -> float:
         """Get the value at the key."""
-        return self.store[key]
+        col = self._matrix._instance_index.get(key)
+
+        if col is None or not self._matrix._counts[self._row_index, col]:
+            raise KeyError(key)
+
+        return float(self._matrix._costs[self._row_index, col])
 
     def __setitem__(self, key, value):
         """Set the value at the key."""
-        self.store[key] = value
+        row, col = self._row_index, self._matrix._col(key, create=True)
+        self._matrix._costs[row, col] = value
+        self._matrix._counts[row, col] = max(1, self._matrix._counts[row, col])
 
     def __delitem__(self, key):
         """Delete the value at the key."""
-        del self.store[key]
+        col = self._matrix._instance_index.get(key)
+
+        if col is None or not self._matrix._counts[self._row_index, col]:
+            raise KeyError(key)
+
+        self._matrix._clear(self._row_index, col)
 
-    def __iter__(self):
+    def __iter__(self) -> Iterator[str]:
         """Iterate over all costs."""
-        return iter(self.store)
+        counts = self._matrix._counts[self._row_index]
+        return iter([inst for inst, col in self._matrix._instance_index.items() if counts[col]])
 
     def __len__(self):
         """Get the number of instances."""
-        return len(self.store)
+        return int(np.count_nonzero(self._matrix._counts[self._row_index]))
 
     def __repr__(self):
         """Repr."""
@@ -69,41 +160,205 @@ class CostMatrix(MutableMapping[Configuration, InstanceCost]):
     """Cost matrix of average cost per instance per configuration."""
 
     def __init__(self, *, par: int = 10):
-        """Create a new, empty `CostMatrix`."""
-        self.matrix: dict[Configuration, InstanceCost] = {}
+        """Create a new, empty `CostMatrix`.
+
+        Arguments:
+            par: Costs of runs that timed out are multiplied by this.
+        """
         self._par = par
 
+        self._config_index: dict[Hashable, int] = {}
+        self._configs: list[Hashable] = []
+        self._instance_index: dict[str, int] = {}
+        self._instances: list[str] = []
+
+        self._costs: npt.NDArray[np.float64] = np.full((0, 0), np.inf)
+        self._counts: npt.NDArray[np.int64] = np.zeros((0, 0), dtype=np.int64)
+        self._capped: npt.NDArray[np.bool_] = np.zeros((0, 0), dtype=np.bool_)
+        self._timed_out: npt.NDArray[np.bool_] = np.zeros((0, 0), dtype=np.bool_)
+
+        # By `id` of the runhistory, they can not be hashed
+        self._watermarks: dict[int, _Watermark] = {}
+
+    @property
+    def configs(self) -> list[Configuration]:
+        """The configurations, in the order of the rows."""
+        return list(self._configs)  # type: ignore[arg-type]
+
+    @property
+    def instances(self) -> list[str]:
+        """The instances, in the order of the columns."""
+        return list(self._instances)
+
     def update_matrix(self, runhistory: RunHistory):
-        """Update the matrix with a `RunHistory`."""
-        config_instance_costs: dict[Configuration, dict[str, list[float]]] = {}
+        """Update the matrix with a `RunHistory`.
+
+        Only the trials that were not added before are added, so the same
+        runhistory can be passed again as it grows. Trials that are still
+        running are added once they finished. The mean of the new costs of
+        a config on an instance is added to its average as a single cost.
+        Trials with `capped` or `censored` in their additional info (see
+        `get_verifier_tf` and `expand_instance_costs`) mark their instance
+        as capped.
+        """
+        watermark = self._watermark(runhistory)
+        rows, cols, costs, capped, timed_out = [], [], [], [], []
 
-        for trial_key, trial_value in runhistory.items():
+        for trial_key, trial_value in itertools.islice(runhistory.items(), watermark.position, None):
+            if trial_key in watermark.consumed or trial_value.status == StatusType.RUNNING:
+                continue
+
+            watermark.consumed.add(trial_key)
             config = runhistory.get_config(trial_key.config_id)
 
             instance = trial_key.instance
             assert instance is not None
 
-            if config not in config_instance_costs:
-                config_instance_costs[config] = {}
-
             # not dealing with > 1 cost
             assert isinstance(trial_value.cost, float)
 
-            cost = trial_value.cost
-            if trial_value.status == StatusType.TIMEOUT:
-                cost *= self._par
+            timeout = trial_value.status == StatusType.TIMEOUT
+            info = trial_value.additional_info
+
+            rows.append(self._row(config, create=True))
+            cols.append(self._col(instance, create=True))
+            costs.append(trial_value.cost * self._par if timeout else trial_value.cost)
+            capped.append(info.get("capped", False) or info.get("censored", False))
+            timed_out.append(timeout)
+
+        # Move the position past the trials that were all added
+        for trial_key in itertools.islice(runhistory, watermark.position, None):
+            if trial_key not in watermark.consumed:
+                break
+
+            watermark.consumed.remove(trial_key)
+            watermark.position += 1
+
+        if not rows:
+            return
+
+        row_arr, col_arr = np.array(rows), np.array(cols)
+        cost_arr = np.array(costs, dtype=float)
+
+        # The mean per (config, instance) of this runhistory
+        cells, inverse = np.unique(np.stack([row_arr, col_arr]), axis=1, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        sums = np.zeros(cells.shape[1])
+        n = np.zeros(cells.shape[1])
+        cell_capped = np.zeros(cells.shape[1], dtype=bool)
+        cell_timed_out = np.zeros(cells.shape[1], dtype=bool)
+
+        np.add.at(sums, inverse, cost_arr)
+        np.add.at(n, inverse, 1)
+        np.logical_or.at(cell_capped, inverse, np.array(capped, dtype=bool))
+        np.logical_or.at(cell_timed_out, inverse, np.array(timed_out, dtype=bool))
+
+        self._add_costs(cells[0], cells[1], sums / n, cell_capped, cell_timed_out)
+
+    def _watermark(self, runhistory: RunHistory) -> _Watermark:
+        key = id(runhistory)
+        watermark = self._watermarks.get(key)
+
+        if watermark is None:
+            watermark = self._watermarks[key] = _Watermark()
+            weakref.finalize(runhistory, self._watermarks.pop, key, None)
+        elif len(runhistory) < watermark.position:
+            # The runhistory was reset, its trials are new
+            watermark.position = 0
+            watermark.consumed.clear()
 
-            if instance not in config_instance_costs[config]:
-                config_instance_costs[config][instance] = [cost]
-            else:
-                config_instance_costs[config][instance].append(cost)
+        return watermark
+
+    def merge(self, other: CostMatrix):
+        """Add the costs of another matrix, e.g. of another run.
+
+        The averages of the cells in both matrices are weighted by their
+        number of costs. The masks of the cells are combined.
+        """
+        rows = np.array([self._row(config, create=True) for config in other._configs], dtype=np.int64)
+        cols = np.array([self._col(instance, create=True) for instance in other._instances], dtype=np.int64)
+
+        if rows.size == 0 or cols.size == 0:
+            return
+
+        cell = np.ix_(rows, cols)
+        n_other = other._counts[: rows.size, : cols.size]
+        n_self = self._counts[cell]
+        total = n_self + n_other
+        observed = n_other > 0
+
+        with np.errstate(invalid="ignore"):
+            weighted = (
+                np.where(n_self > 0, self._costs[cell] * n_self, 0.0)
+                + np.where(observed, other._costs[: rows.size, : cols.size] * n_other, 0.0)
+            ) / np.maximum(total, 1)
+
+        self._costs[cell] = np.where(observed, weighted, self._costs[cell])
+        self._counts[cell] = total
+        self._capped[cell] |= other._capped[: rows.size, : cols.size]
+        self._timed_out[cell] |= other._timed_out[: rows.size, : cols.size]
+
+    def get_costs(self, configs: Iterable[Configuration], instances: Sequence[str]) -> npt.NDArray[np.float64]:
+        """The costs of the configs (rows) on the instances (columns).
+
+        Instances without a cost have a cost of `np.inf`.
+
+        Raises:
+            RuntimeError: If a config is not in the matrix.
+        """
+        return self._select(self._costs, configs, instances, np.inf)
 
-            if config not in self.matrix:
-                self.matrix[config] = InstanceCost()
+    def get_counts(self, configs: Iterable[Configuration], instances: Sequence[str]) -> npt.NDArray[np.int64]:
+        """Number of costs in the average costs, see `get_costs`."""
+        return self._select(self._counts, configs, instances, 0)
 
-        for config, instance_costs in config_instance_costs.items():
-            for instance, costs in instance_costs.items():
-                self.matrix[config].update_cost(instance, float(np.mean(costs)))
+    def get_capped(self, configs: Iterable[Configuration], instances: Sequence[str]) -> npt.NDArray[np.bool_]:
+        """Mask of the costs that are a lower bound, see `InstanceCost.is_capped`."""
+        return self._select(self._capped, configs, instances, False)
+
+    def get_timed_out(self, configs: Iterable[Configuration], instances: Sequence[str]) -> npt.NDArray[np.bool_]:
+        """Mask of the costs with runs that timed out."""
+        return self._select(self._timed_out, configs, instances, False)
+
+    def subset_costs(
+        self,
+        subsets: Iterable[Iterable[Configuration]],
+        instances: Sequence[str],
+    ) -> npt.NDArray[np.float64]:
+        """The VBS cost of each subset of configs (rows) on the instances.
+
+        Instances that no config of a subset has a cost for have a cost
+        of `np.inf`, as do all instances of an empty subset.
+        """
+        cols = self._cols(instances)
+        subset_costs = [self._vbs(self._rows(subset), cols) for subset in subsets]
+
+        if not subset_costs:
+            return np.full((0, len(instances)), np.inf)
+
+        return np.stack(subset_costs)
+
+    def marginal_contributions(
+        self,
+        portfolio: Iterable[Configuration],
+        candidates: Iterable[Configuration],
+        instances: Sequence[str],
+    ) -> npt.NDArray[np.float64]:
+        """How much adding each candidate lowers the VBS cost of the portfolio.
+
+        The contribution of a candidate is the sum over the instances of how
+        much it improves on the VBS of the portfolio. Instances that the
+        portfolio has no cost for and the candidate has, contribute
+        `np.inf`.
+        """
+        cols = self._cols(instances)
+        base = self._vbs(self._rows(portfolio), cols)
+        candidate_costs = self._take(self._costs, self._rows(candidates), cols, np.inf)
+        # inf - inf is nan, neither the portfolio nor the candidate has a cost
+        with np.errstate(invalid="ignore"):
+            improvement = base - np.minimum(base, candidate_costs)
+
+        return np.asarray(np.nan_to_num(improvement, nan=0.0, posinf=np.inf).sum(axis=1), dtype=np.float64)
 
     def vbs_cost(
         self,
@@ -119,40 +374,232 @@ class CostMatrix(MutableMapping[Configuration, InstanceCost]):
         Returns:
             dict[str, float]: The vbs cost for each instance.
         """
-        vbs_cost: dict[str, float] = {inst: np.inf for inst in instances}
+        vbs_cost = self._vbs(self._rows(configs), self._cols(instances))
+        return {inst: float(cost) for inst, cost in zip(instances, vbs_cost, strict=True)}
 
-        for config in configs:
-            if config not in self.matrix:
-                raise RuntimeError(f"Config {config} not in matrix")
+    def save(self, npz_path: Path):
+        """Write the cost matrix to a `.npz` file.
 
-            for instance, cost in self.matrix[config].items():
-                if instance not in vbs_cost:
-                    continue
-
-                vbs_cost[instance] = min(vbs_cost[instance], cost)
-
-        return vbs_cost
+        Configurations are stored with the name of their configuration
+        space, which is the name of their verifier.
+        """
+        verifiers: list[str] = []
+
+        for config in self.configs:
+            name = config.config_space.name
+            assert name is not None
+            verifiers.append(name)
+
+        n_rows, n_cols = len(self._configs), len(self._instances)
+
+        with open(npz_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                par=np.array(self._par),
+                verifiers=np.array(verifiers, dtype=str),
+                configurations=np.array([json.dumps(dict(config), default=str) for config in self.configs], dtype=str),
+                instances=np.array(self._instances, dtype=str),
+                costs=self._costs[:n_rows, :n_cols],
+                counts=self._counts[:n_rows, :n_cols],
+                capped=self._capped[:n_rows, :n_cols],
+                timed_out=self._timed_out[:n_rows, :n_cols],
+            )
+
+    @classmethod
+    def load(
+        cls,
+        npz_path: Path,
+        config_space_map: Mapping[str, ConfigurationSpace] | None = None,
+    ) -> CostMatrix:
+        """Instantiate a new `CostMatrix` from a `.npz` file, see `save`."""
+        with np.load(npz_path.expanduser().resolve(), allow_pickle=False) as npz:
+            cost_matrix = cls(par=int(npz["par"]))
+
+            for verifier, cfg_json in zip(npz["verifiers"], npz["configurations"], strict=True):
+                if config_space_map is None:
+                    cfg_space = get_verifier_configspace(str(verifier))
+                else:
+                    cfg_space = config_space_map[str(verifier)]
+
+                cost_matrix._row(Configuration(cfg_space, json.loads(str(cfg_json))), create=True)
+
+            for instance in npz["instances"]:
+                cost_matrix._col(str(instance), create=True)
+
+            n_rows, n_cols = npz["costs"].shape
+            cost_matrix._costs[:n_rows, :n_cols] = npz["costs"]
+            cost_matrix._counts[:n_rows, :n_cols] = npz["counts"]
+            cost_matrix._capped[:n_rows, :n_cols] = npz["capped"]
+            cost_matrix._timed_out[:n_rows, :n_cols] = npz["timed_out"]
+
+        return cost_matrix
 
     def __getitem__(self, key) -> InstanceCost:
         """Get the value at the key."""
-        return self.matrix[key]
+        if key not in self._config_index:
+            raise KeyError(key)
 
-    def __setitem__(self, key, value):
+        return InstanceCost(self, key)
+
+    def __setitem__(self, key, value: Mapping[str, float]):
         """Set the value at the key."""
-        self.matrix[key] = value
+        if isinstance(value, InstanceCost):
+            counts = value._val_counts
+            cells = [
+                (inst, cost, counts[inst], value.is_capped(inst), value.is_timed_out(inst))
+                for inst, cost in value.items()
+            ]
+        else:
+            cells = [(inst, cost, 1, False, False) for inst, cost in value.items()]
+
+        row = self._row(key, create=True)
+        self._costs[row] = np.inf
+        self._counts[row] = 0
+        self._capped[row] = False
+        self._timed_out[row] = False
+
+        for instance, cost, count, capped, timed_out in cells:
+            col = self._col(instance, create=True)
+            self._costs[row, col] = cost
+            self._counts[row, col] = count
+            self._capped[row, col] = capped
+            self._timed_out[row, col] = timed_out
 
     def __delitem__(self, key):
         """Delete the value at the key."""
-        del self.matrix[key]
+        row = self._config_index.pop(key)
+        del self._configs[row]
+
+        self._costs = np.delete(self._costs, row, axis=0)
+        self._counts = np.delete(self._counts, row, axis=0)
+        self._capped = np.delete(self._capped, row, axis=0)
+        self._timed_out = np.delete(self._timed_out, row, axis=0)
 
-    def __iter__(self):
+        self._config_index = {config: i for i, config in enumerate(self._configs)}
+
+    def __iter__(self) -> Iterator[Configuration]:
         """Iterate over the cost matrix."""
-        return iter(self.matrix)
+        return iter(self.configs)
 
     def __len__(self):
         """Get the number of elements in the cost matrix."""
-        return len(self.matrix)
+        return len(self._configs)
 
     def __repr__(self):
         """Repr."""
-        return repr(self.matrix)
+        return repr({config: self[config] for config in self._configs})
+
+    def _row(self, config: Hashable, *, create: bool = False) -> int:
+        if config not in self._config_index:
+            if not create:
+                raise KeyError(config)
+
+            self._config_index[config] = len(self._configs)
+            self._configs.append(config)
+            self._grow()
+
+        return self._config_index[config]
+
+    def _col(self, instance: str, *, create: bool = False) -> int:
+        if instance not in self._instance_index:
+            if not create:
+                raise KeyError(instance)
+
+            self._instance_index[instance] = len(self._instances)
+            self._instances.append(instance)
+            self._grow()
+
+        return self._instance_index[instance]
+
+    def _rows(self, configs: Iterable[Configuration]) -> npt.NDArray[np.int64]:
+        rows: list[int] = []
+
+        for config in configs:
+            if config not in self._config_index:
+                raise RuntimeError(f"Config {config} not in matrix")
+
+            rows.append(self._config_index[config])
+
+        return np.array(rows, dtype=np.int64)
+
+    def _cols(self, instances: Sequence[str]) -> npt.NDArray[np.int64]:
+        """Columns of the instances, -1 for instances that are not in the matrix."""
+        return np.array([self._instance_index.get(inst, -1) for inst in instances], dtype=np.int64)
+
+    def _take(
+        self,
+        array: npt.NDArray[_ScalarT],
+        rows: npt.NDArray[np.int64],
+        cols: npt.NDArray[np.int64],
+        fill: float | bool,
+    ) -> npt.NDArray[_ScalarT]:
+        if array.shape[1] == 0:
+            return np.full((rows.size, cols.size), fill, dtype=array.dtype)
+
+        # Fancy indexing copies, so the fill does not change the matrix
+        selected: npt.NDArray[_ScalarT] = array[np.ix_(rows, np.maximum(cols, 0))]
+        selected[:, cols < 0] = fill
+
+        return selected
+
+    def _select(
+        self,
+        array: npt.NDArray[_ScalarT],
+        configs: Iterable[Configuration],
+        instances: Sequence[str],
+        fill: float | bool,
+    ) -> npt.NDArray[_ScalarT]:
+        return self._take(array, self._rows(configs), self._cols(instances), fill)
+
+    def _vbs(self, rows: npt.NDArray[np.int64], cols: npt.NDArray[np.int64]) -> npt.NDArray[np.float64]:
+        if rows.size == 0:
+            return np.full(cols.size, np.inf)
+
+        return np.asarray(self._take(self._costs, rows, cols, np.inf).min(axis=0), dtype=np.float64)
+
+    def _add_costs(
+        self,
+        rows: npt.NDArray[np.int64],
+        cols: npt.NDArray[np.int64],
+        costs: npt.NDArray[np.float64],
+        capped: npt.NDArray[np.bool_],
+        timed_out: npt.NDArray[np.bool_],
+    ):
+        """Add a cost to the average of each cell, cells must be unique."""
+        counts = self._counts[rows, cols]
+        averages = np.where(counts > 0, self._costs[rows, cols], 0.0)
+
+        self._costs[rows, cols] = (averages * counts + costs) / (counts + 1)
+        self._counts[rows, cols] = counts + 1
+        self._capped[rows, cols] |= capped
+        self._timed_out[rows, cols] |= timed_out
+
+    def _clear(self, row: int, col: int):
+        self._costs[row, col] = np.inf
+        self._counts[row, col] = 0
+        self._capped[row, col] = False
+        self._timed_out[row, col] = False
+
+    def _grow(self):
+        """Make room for the interned configs and instances."""
+        n_rows, n_cols = self._costs.shape
+
+        if len(self._configs) <= n_rows and len(self._instances) <= n_cols:
+            return
+
+        new_shape = (
+            n_rows if len(self._configs) <= n_rows else max(_MIN_CAPACITY, 2 * n_rows),
+            n_cols if len(self._instances) <= n_cols else max(_MIN_CAPACITY, 2 * n_cols),
+        )
+
+        self._costs = self._resized(self._costs, new_shape, np.inf)
+        self._counts = self._resized(self._counts, new_shape, 0)
+        self._capped = self._resized(self._capped, new_shape, False)
+        self._timed_out = self._resized(self._timed_out, new_shape, False)
+
+    @staticmethod
+    def _resized(array: npt.NDArray[_ScalarT], shape: tuple[int, int], fill: float | bool) -> npt.NDArray[_ScalarT]:
+        resized = np.full(shape, fill, dtype=array.dtype)
+        resized[: array.shape[0], : array.shape[1]] = array
+
+        return resized
@@ -1,26 +1,39 @@
 """_summary_."""
 
 import logging
+import math
+import queue
 import random
 import sys
+import threading
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 import numpy as np
+import numpy.typing as npt
 from ConfigSpace import Categorical, Configuration, ConfigurationSpace
 from smac import AlgorithmConfigurationFacade as ACFacade
 from smac import RunHistory, Scenario
 
+from autoverify.portfolio.hydra.checkpoint import HydraCheckpoint, latest_checkpoint
 from autoverify.portfolio.hydra.cost_matrix import CostMatrix
 from autoverify.portfolio.portfolio import (
     ConfiguredVerifier,
     Portfolio,
     PortfolioScenario,
 )
-from autoverify.types import TargetFunction
-from autoverify.util.resources import ResourceTracker
-from autoverify.util.target_function import get_verifier_tf
+from autoverify.types import Cost, CostWithInfo, TargetFunction
+from autoverify.util.resources import ResourceTracker, split_node
+from autoverify.util.smac import (
+    can_continue,
+    current_trial_allocation,
+    expand_instance_costs,
+    get_facade,
+    smac_target,
+)
+from autoverify.util.target_function import MultiFidelityTargetFunction, get_multi_fidelity_tf, get_verifier_tf
 from autoverify.util.verification_instance import VerificationInstance
 from autoverify.util.verifiers import verifier_from_name
 from autoverify.util.vnncomp import inst_bench_to_kwargs
@@ -42,6 +55,14 @@ def _mean_unevaluated(costs: dict[str, float]) -> dict[str, float]:
     return new_costs
 
 
+def _mean_unevaluated_rows(costs: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """`_mean_unevaluated` of every row of the costs."""
+    evaluated = np.isfinite(costs)
+    means = np.where(evaluated, costs, 0.0).sum(axis=1) / evaluated.sum(axis=1)
+
+    return np.where(evaluated, costs, means[:, None]).astype(np.float64)
+
+
 def _get_cpu_gpu_alloc(verifier: str, rt: ResourceTracker):
     cpus, gpu = rt.deduct_by_name(verifier, mock=True)
 
@@ -51,6 +72,17 @@ def _get_cpu_gpu_alloc(verifier: str, rt: ResourceTracker):
     return (0, cpus - 1, gpu)
 
 
+def _in_trial_allocation(alloc: tuple[int, int, int]) -> tuple[int, int, int]:
+    """Move an allocation to the cores (and GPU) of the running trial, if any."""
+    trial_alloc = current_trial_allocation()
+
+    if trial_alloc is None:
+        return alloc
+
+    low, high, gpu = trial_alloc
+    return (low, high, gpu if alloc[2] >= 0 else -1)
+
+
 def _remap_rh_keys(key_map: dict[Configuration, Configuration], rh: RunHistory) -> RunHistory:
     new_rh = RunHistory()
 
@@ -110,25 +142,36 @@ def _prep_instance(instance: str, verifier: str, uses_simplified_network: Iterab
 class Hydra:
     """Class to use the `Hydra` algorithm for portfolio construction."""
 
-    def __init__(self, pf_scenario: PortfolioScenario):
+    def __init__(self, pf_scenario: PortfolioScenario, *, resume: bool = False):
         """Initialize a new Hydra instance.
 
+        The state of the run is written to a checkpoint after every
+        iteration, in the `checkpoints` directory of the output dir.
+
         Arguments:
             pf_scenario: A `PortfolioScenario` with parameters for Hydra.
+            resume: Continue the run in the `output_dir` of the scenario,
+                from its last checkpoint. The SMAC runs of the iteration
+                that was interrupted continue with the trials they already
+                ran, if their scenario did not change.
         """
         self._scenario = pf_scenario
         self._cost_matrix = CostMatrix()
         self._stop = False
+        self._resume = resume
+        self._lock = threading.Lock()
+        # Rounds of configurator runs in an iteration, which share its time
+        self._n_rounds = 1
 
         self._ResourceTracker = ResourceTracker(self._scenario)
         self._init_logs()
 
     def _init_logs(self):
         assert self._scenario.output_dir
-        self._scenario.output_dir.mkdir(parents=True)
+        self._scenario.output_dir.mkdir(parents=True, exist_ok=self._resume)
         logs_path = self._scenario.output_dir
         self._log_file = (logs_path / "hydra.log").expanduser().resolve()
-        self._log_file.touch(exist_ok=False)
+        self._log_file.touch(exist_ok=self._resume)
 
         file_handler = logging.FileHandler(str(self._log_file))
         file_handler.setLevel(logging.DEBUG)
@@ -160,8 +203,12 @@ class Hydra:
         """Construct a new portfolio."""
         portfolio = Portfolio()
         self._iter = 0
+        first_iter = 0
+
+        if self._resume:
+            portfolio, first_iter = self._restore()
 
-        for iter_num in range(self._scenario.n_iters):
+        for iter_num in range(first_iter, self._scenario.n_iters):
             self._iter = iter_num
             logger.info(f"Hydra iteration {self._iter}")
 
@@ -169,6 +216,7 @@ class Hydra:
             self._updater(portfolio, new_configs)
 
             self._log_iter(portfolio)
+            self._save_checkpoint(portfolio, [rh for _, rh in new_configs])
 
             if self._scenario.stop_early and self._stop:
                 logging.info(f"Stopping in iteration {self._iter}")
@@ -181,29 +229,115 @@ class Hydra:
         portfolio.reallocate_resources(self._scenario.resource_strategy)
         return portfolio
 
+    @property
+    def _checkpoint_dir(self) -> Path:
+        assert self._scenario.output_dir
+        return self._scenario.output_dir / "checkpoints"
+
+    def _save_checkpoint(self, pf: Portfolio, runhistories: list[RunHistory]):
+        checkpoint = HydraCheckpoint(
+            iteration=self._iter,
+            portfolio=pf,
+            cost_matrix=self._cost_matrix,
+            resources=self._ResourceTracker.get_state(),
+            stop=self._stop,
+            random_state=random.getstate(),
+        )
+        path = checkpoint.save(self._checkpoint_dir, runhistories)
+        logger.info(f"Saved checkpoint of iteration {self._iter} to {path}")
+
+    def _restore(self) -> tuple[Portfolio, int]:
+        """Restore the state of the last checkpoint, if any.
+
+        Returns:
+            tuple[Portfolio, int]: The portfolio and the first iteration
+                that still has to run.
+        """
+        path = latest_checkpoint(self._checkpoint_dir)
+
+        if path is None:
+            logger.info("No checkpoint to resume from, starting from scratch")
+            return Portfolio(), 0
+
+        checkpoint = HydraCheckpoint.load(path)
+        logger.info(f"Resuming after iteration {checkpoint.iteration} from {path}")
+
+        self._cost_matrix = checkpoint.cost_matrix
+        self._ResourceTracker.set_state(checkpoint.resources)
+        self._stop = checkpoint.stop
+        checkpoint.restore_random_state()
+
+        if self._scenario.stop_early and self._stop:
+            return checkpoint.portfolio, self._scenario.n_iters
+
+        return checkpoint.portfolio, checkpoint.iteration + 1
+
+    def _overwrite(self, smac_scenario: Scenario) -> bool:
+        """If a SMAC run starts over, instead of continuing an earlier run."""
+        if self._resume and can_continue(smac_scenario):
+            logger.info(f"Continuing SMAC run {smac_scenario.name}")
+            return False
+
+        return True
+
     def _configurator(self, pf: Portfolio) -> list[tuple[Configuration, RunHistory]]:
         # TODO: Iter > 0
-        new_configs: list[tuple[Configuration, RunHistory]] = []
+        n_runs = self._scenario.configs_per_iter
+
+        if n_runs == 1:
+            self._n_rounds = 1
+            return [self._configurator_run(pf, 0)]
 
-        for i in range(self._scenario.configs_per_iter):
-            logger.info(f"Configurator iteration {i}")
+        # Independent runs at the same time, each on its own slice of the node
+        slices = self._run_slices(n_runs)
+        free_slices: queue.SimpleQueue[list[tuple[int, int, int]]] = queue.SimpleQueue()
 
-            run_name = f"pick_{self._iter}_{i}"
-            logger.info("Picking verifier")
-            verifier = self._pick(run_name, pf)
+        for run_slice in slices:
+            free_slices.put(run_slice)
 
-            logger.info(f"Picked {verifier}")
-            logger.info(f"Tuning {verifier}")
+        # Runs that do not fit the node wait for a slice to be free
+        self._n_rounds = math.ceil(n_runs / len(slices))
 
-            run_name = f"tune_{self._iter}_{i}_{verifier}"
-            tf = self._get_target_func(verifier, pf)
-            config, runhist = self._tune(verifier, run_name, tf)
+        def configurator_run(i: int) -> tuple[Configuration, RunHistory]:
+            run_slice = free_slices.get()
+
+            try:
+                return self._configurator_run(pf, i, run_slice)
+            finally:
+                free_slices.put(run_slice)
+
+        with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+            return list(executor.map(configurator_run, range(n_runs)))
+
+    def _configurator_run(
+        self,
+        pf: Portfolio,
+        i: int,
+        allocations: list[tuple[int, int, int]] | None = None,
+    ) -> tuple[Configuration, RunHistory]:
+        """Pick and tune a verifier, with `i` as the seed of the SMAC runs."""
+        logger.info(f"Configurator iteration {i}")
 
-            new_configs.append((config, runhist))
+        run_name = f"pick_{self._iter}_{i}"
+        logger.info("Picking verifier")
+        verifier = self._pick(run_name, pf, seed=i, allocations=allocations)
 
-        return new_configs
+        logger.info(f"Picked {verifier}")
+        logger.info(f"Tuning {verifier}")
 
-    def _pick(self, run_name: str, pf: Portfolio) -> str:
+        run_name = f"tune_{self._iter}_{i}_{verifier}"
+        tf = self._get_target_func(verifier, pf)
+
+        return self._tune(verifier, run_name, tf, seed=i, allocations=allocations)
+
+    def _pick(
+        self,
+        run_name: str,
+        pf: Portfolio,
+        *,
+        seed: int = 0,
+        allocations: list[tuple[int, int, int]] | None = None,
+    ) -> str:
         if self._scenario.pick_budget == 0:
             logging.info("Pick budget is 0, selecting random verifier.")
             return random.choice(self._scenario.verifiers)
@@ -215,11 +349,12 @@ class Hydra:
             logging.info(f"Only 1 possible verifier left ({verifiers[0]})")
             return verifiers[0]
 
-        def hydra_tf(config: Configuration, instance: str, seed: int) -> float:
+        def hydra_tf(config: Configuration, instance: str, seed: int) -> Cost | CostWithInfo:
             seed += 1  # silence warning
             verifier = verifiers[config["index"]]
             assert isinstance(verifier, str)
 
+            pf_cost = self._get_pf_cost(pf, instance)
             instance = _prep_instance(instance, verifier, self._scenario.uses_simplified_network)
 
             verifier_class = verifier_from_name(verifier)
@@ -228,22 +363,16 @@ class Hydra:
                 self._scenario,
                 VerificationInstance.from_str(instance),
             )
-            alloc = _get_cpu_gpu_alloc(verifier, self._ResourceTracker)
+            alloc = _in_trial_allocation(_get_cpu_gpu_alloc(verifier, self._ResourceTracker))
             verifier_inst = verifier_class(cpu_gpu_allocation=alloc, **init_kwargs)
 
-            verifier_tf = get_verifier_tf(verifier_inst)
+            # Only the time until the cost of the portfolio matters
+            verifier_tf = get_verifier_tf(verifier_inst, cap=lambda _: pf_cost)
 
             assert isinstance(verifier_inst, CompleteVerifier)
-            cost = verifier_tf(verifier_inst.default_config, instance, seed)
-
-            if self._iter == 0:
-                return cost
-            else:
-                pf_cost = pf.get_cost(instance)
+            return verifier_tf(verifier_inst.default_config, instance, seed)
 
-            return float(min(cost, pf_cost))
-
-        walltime_limit = self._scenario.seconds_per_iter * self._scenario.pick_budget / self._scenario.configs_per_iter
+        walltime_limit = self._scenario.seconds_per_iter * self._scenario.pick_budget / self._n_rounds
 
         pick_cfgspace = ConfigurationSpace()
         pick_cfgspace.add_hyperparameter(
@@ -259,11 +388,16 @@ class Hydra:
             walltime_limit=walltime_limit,
             n_trials=sys.maxsize,  # we use walltime_limit
             name=run_name,
+            seed=seed,
             **self._scenario.get_smac_scenario_kwargs(),
         )
 
-        smac = ACFacade(smac_scenario, hydra_tf, overwrite=True)
-        inc = smac.optimize()
+        if allocations is None:
+            allocations = self._trial_allocations(verifiers)
+
+        with smac_target(smac_scenario, hydra_tf, allocations) as target:
+            smac = ACFacade(smac_scenario, target, overwrite=self._overwrite(smac_scenario))
+            inc = smac.optimize()
 
         # Not dealing with > 1 config
         assert isinstance(inc, Configuration)
@@ -274,67 +408,141 @@ class Hydra:
             key_map[cfg] = verifier_from_name(verifiers[i])().default_config
 
         rh = _remap_rh_keys(key_map, smac.runhistory)
-        self._cost_matrix.update_matrix(rh)
+
+        with self._lock:
+            self._cost_matrix.update_matrix(rh)
 
         return str(verifiers[inc["index"]])
 
-    def _tune(self, verifier: str, run_name: str, target_func: TargetFunction) -> tuple[Configuration, RunHistory]:
+    def _tune(
+        self,
+        verifier: str,
+        run_name: str,
+        target_func: TargetFunction,
+        *,
+        seed: int = 0,
+        allocations: list[tuple[int, int, int]] | None = None,
+    ) -> tuple[Configuration, RunHistory]:
         verifier_inst = verifier_from_name(verifier)()
 
         if self._scenario.tune_budget == 0:
             logger.info("Tune budget is 0, returning default configuration.")
             return verifier_inst.default_config, RunHistory()
 
-        walltime_limit = self._scenario.seconds_per_iter * self._scenario.tune_budget / self._scenario.configs_per_iter
+        walltime_limit = self._scenario.seconds_per_iter * self._scenario.tune_budget / self._n_rounds
+
+        multi_fidelity = self._scenario.min_budget is not None
 
         smac_scenario = Scenario(
             verifier_inst.config_space,
             walltime_limit=walltime_limit,
             n_trials=sys.maxsize,  # we use walltime_limit
             name=run_name,
-            **self._scenario.get_smac_scenario_kwargs(),
+            seed=seed,
+            **self._scenario.get_smac_scenario_kwargs(multi_fidelity=multi_fidelity),
         )
 
-        smac = ACFacade(smac_scenario, target_func, overwrite=True)
-        inc = smac.optimize()
+        tf: TargetFunction | MultiFidelityTargetFunction = target_func
+
+        if multi_fidelity:
+            tf = get_multi_fidelity_tf(target_func, self._scenario.get_smac_instances())
+
+        if allocations is None:
+            allocations = self._trial_allocations([verifier])
+
+        with smac_target(smac_scenario, tf, allocations) as target:
+            smac = get_facade(
+                smac_scenario,
+                target,
+                eta=self._scenario.eta,
+                overwrite=self._overwrite(smac_scenario),
+            )
+            inc = smac.optimize()
 
         # Not dealing with > 1 config
         assert isinstance(inc, Configuration)
+
+        if multi_fidelity:
+            return inc, expand_instance_costs(smac.runhistory)
+
         return inc, smac.runhistory
 
+    def _get_pf_cost(self, pf: Portfolio, instance: str) -> float | None:
+        """Cost of the portfolio on the instance, the cap of new configs on it.
+
+        A new config can not improve the portfolio on an instance once it
+        takes longer than the portfolio, so its runs are capped at that cost
+        (adaptive capping). In the first iteration there is no portfolio yet.
+        """
+        if self._iter == 0:
+            return None
+
+        return float(pf.get_cost(instance))
+
+    def _trial_allocations(self, verifiers: list[str]) -> list[tuple[int, int, int]] | None:
+        """Allocations for the parallel trials, big enough for each of the verifiers."""
+        n_workers = self._scenario.n_workers
+
+        if n_workers <= 1:
+            return None
+
+        return self._split_node(verifiers, n_workers)
+
+    def _run_slices(self, n_runs: int) -> list[list[tuple[int, int, int]]]:
+        """Disjoint allocations for configurator runs, `n_workers` trials each.
+
+        The allocations are big enough for every verifier that can still
+        be picked. If not all runs fit the node, there are fewer slices.
+        """
+        n_workers = self._scenario.n_workers
+        allocations = self._split_node(self._ResourceTracker.get_possible(), n_runs * n_workers)
+
+        return [allocations[i : i + n_workers] for i in range(0, len(allocations), n_workers)]
+
+    def _split_node(self, verifiers: list[str], n_jobs: int) -> list[tuple[int, int, int]]:
+        """Allocations for jobs that run at the same time, big enough for each of the verifiers."""
+        allocs = [_get_cpu_gpu_alloc(verifier, self._ResourceTracker) for verifier in verifiers]
+        n_cpu = max(high - low + 1 for low, high, _ in allocs)
+        n_gpu = int(any(gpu >= 0 for _, _, gpu in allocs))
+
+        allocations = split_node((n_cpu, n_gpu), n_jobs)
+
+        if len(allocations) < n_jobs:
+            logger.warning(f"Only {len(allocations)} of the {n_jobs} workers fit on this node")
+
+        return allocations
+
     def _get_target_func(self, verifier: str, pf: Portfolio) -> TargetFunction:
         """If iteration > 0, use the Hydra target function."""
         verifier_class = verifier_from_name(verifier)
         name = str(verifier_class.name)
 
-        def hydra_tf(config: Configuration, instance: str, seed: int) -> float:
+        def hydra_tf(config: Configuration, instance: str, seed: int) -> Cost | CostWithInfo:
             seed += 1  # silence warning
 
+            pf_cost = self._get_pf_cost(pf, instance)
             instance = _prep_instance(instance, verifier, self._scenario.uses_simplified_network)
 
             init_kwargs = _get_init_kwargs(name, self._scenario, VerificationInstance.from_str(instance))
-            alloc = _get_cpu_gpu_alloc(verifier, self._ResourceTracker)
+            alloc = _in_trial_allocation(_get_cpu_gpu_alloc(verifier, self._ResourceTracker))
             verifier_inst = verifier_class(cpu_gpu_allocation=alloc, **init_kwargs)
-            verifier_tf = get_verifier_tf(verifier_inst)
+            verifier_tf = get_verifier_tf(verifier_inst, cap=lambda _: pf_cost)
 
             assert isinstance(verifier_inst, CompleteVerifier)
-            cost = verifier_tf(config, instance, seed)
-
-            if self._iter == 0:
-                return cost
-            else:
-                pf_cost = pf.get_cost(instance)
-
-            return float(min(cost, pf_cost))
+            return verifier_tf(config, instance, seed)
 
         return hydra_tf
 
-    # TODO: Support for adding > 1 config per iter
     def _updater(
         self,
         pf: Portfolio,
         new_configs: list[tuple[Configuration, RunHistory]],
     ):
+        """Add the new configs with the largest marginal contribution to the PF.
+
+        Up to `added_per_iter` configs are added, one at a time, each time
+        the one that lowers the cost of the PF the most.
+        """
         logger.info("Updating portfolio")
 
         # TODO: Use the cost matrix for determining
@@ -342,24 +550,55 @@ class Hydra:
         for _, rh in new_configs:
             self._cost_matrix.update_matrix(rh)
 
-        cfg = new_configs[0][0]
+        candidates: list[Configuration] = []
 
-        # ConfigSpace name is optional, but we require it to
-        # make a distinction between the different verifiers
-        name = cfg.config_space.name
-        assert name is not None
+        for cfg, _ in new_configs:
+            if cfg in pf.configs:
+                logger.info(f"Config {cfg} already in portfolio")
+            elif cfg not in candidates:
+                candidates.append(cfg)
 
-        cv = ConfiguredVerifier(name, cfg, self._ResourceTracker.deduct_by_name(name, mock=True))
-        if cv in pf:
-            logger.info(f"Config {cv} already in portfolio")
+        if not candidates:
             if self._scenario.stop_early:
                 self._stop = True
-                return
+            return
 
-        pf.add(cv)
+        instances = self._scenario.get_smac_instances()
 
-        # Re calculate the cost of the pf
-        vbs_cost = _mean_unevaluated(self._cost_matrix.vbs_cost(pf.configs, self._scenario.get_smac_instances()))
+        for _ in range(self._scenario.added_per_iter):
+            possible = self._ResourceTracker.get_possible()
+            fitting = [cfg for cfg in candidates if cfg.config_space.name in possible]
 
-        pf.update_costs(vbs_cost)
-        self._ResourceTracker.deduct_by_name(name)
+            if not fitting or len(pf) >= self._scenario.length:
+                break
+
+            contributions = self._marginal_contributions(pf, fitting, instances)
+            best = int(np.argmax(contributions))
+            cfg = fitting[best]
+            candidates.remove(cfg)
+
+            # ConfigSpace name is optional, but we require it to
+            # make a distinction between the different verifiers
+            name = cfg.config_space.name
+            assert name is not None
+
+            logger.info(f"Adding {name} config with marginal contribution {contributions[best]:.2f}")
+            pf.add(ConfiguredVerifier(name, cfg, self._ResourceTracker.deduct_by_name(name, mock=True)))
+
+            # Re calculate the cost of the pf
+            vbs_cost = _mean_unevaluated(self._cost_matrix.vbs_cost(pf.configs, instances))
+
+            pf.update_costs(vbs_cost)
+            self._ResourceTracker.deduct_by_name(name)
+
+    def _marginal_contributions(
+        self,
+        pf: Portfolio,
+        configs: list[Configuration],
+        instances: list[str],
+    ) -> npt.NDArray[np.float64]:
+        """How much adding each of the configs would lower the total cost of the PF."""
+        vbs_costs = self._cost_matrix.subset_costs([[*pf.configs, cfg] for cfg in configs], instances)
+        totals = _mean_unevaluated_rows(vbs_costs).sum(axis=1)
+
+        return np.asarray(pf.get_total_cost() - totals, dtype=np.float64)
@@ -46,9 +46,11 @@ class PortfolioScenario:
         instances: The instances on which the PF is constructed.
         length: The max length of the PF.
         seconds_per_iter: Number of seconds for each Hydra iteration.
-        configs_per_iter: Number of configs each iteration.
+        configs_per_iter: Number of configurator runs each iteration. They
+            run at the same time on disjoint cores, each with its own seed.
         alpha: Tune/Pick time split.
-        added_per_iter: Entries added to the PF per iter.
+        added_per_iter: Entries added to the PF per iter, the configs with
+            the largest marginal contribution to the PF.
         stop_early: Stop procedure if some early stop conditions are met.
         resource_strategy: Strat to divide the resources.
         output_dir: Dir where logs are stored.
@@ -56,6 +58,12 @@ class PortfolioScenario:
         benchmark: VNNCOMP benchmark if vnn_compat_mode is `True`.
         verifier_kwargs: Kwargs passed to verifiers.
         uses_simplified_network: If the network uses the dnnv simplified nets.
+        n_workers: Number of SMAC trials that run at the same time while
+            picking and tuning, each on its own cores (and GPU).
+        min_budget: Tune with multi-fidelity, starting with this fraction
+            of the instance timeouts. `None` to tune with full timeouts.
+        eta: Fraction (`1 / eta`) of the configs promoted to the next
+            multi-fidelity stage.
     """
 
     verifiers: Sequence[str]
@@ -75,11 +83,23 @@ class PortfolioScenario:
     benchmark: str | None = None
     verifier_kwargs: dict[str, dict[str, Any]] | None = None
     uses_simplified_network: Iterable[str] | None = None
+    n_workers: int = 1
+    min_budget: float | None = None
+    eta: int = 3
 
     def __post_init__(self):
         """Validate the PF scenario."""
-        if self.added_per_iter > 1 or self.configs_per_iter > 1:
-            raise ValueError("Adding more than 1 config per iter not supported yet.")
+        if self.configs_per_iter < 1:
+            raise ValueError(f"configs_per_iter should be >= 1, got {self.configs_per_iter}")
+
+        if not 1 <= self.added_per_iter <= self.configs_per_iter:
+            raise ValueError("Entries added per iter should be in [1, configs_per_iter]")
+
+        if self.n_workers < 1:
+            raise ValueError(f"n_workers should be >= 1, got {self.n_workers}")
+
+        if self.min_budget is not None and not 0 < self.min_budget <= 1:
+            raise ValueError(f"min_budget should be in (0.0, 1.0], got {self.min_budget}")
 
         if not 0 <= self.alpha <= 1:
             raise ValueError(f"Alpha should be in [0.0, 1.0], got {self.alpha}")
@@ -127,15 +147,26 @@ class PortfolioScenario:
         else:
             raise NotImplementedError(f"ResourceStrategy {self.resource_strategy} is not implemented yet.")
 
-    def get_smac_scenario_kwargs(self) -> dict[str, Any]:
+    def get_smac_scenario_kwargs(self, *, multi_fidelity: bool = False) -> dict[str, Any]:
         """Return the SMAC scenario kwargs as a dict.
 
+        Arguments:
+            multi_fidelity: Budgets from `min_budget` to the full timeout
+                instead of instances, see `get_multi_fidelity_tf`.
+
         Returns:
             dict[str, Any]: The SMAC scenario as a dict.
         """
         assert self.output_dir is not None  # This is set in `__post_init__`
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        if multi_fidelity:
+            return {
+                "min_budget": self.min_budget,
+                "max_budget": 1.0,
+                "output_directory": self.output_dir,
+            }
+
         return {
             "instances": verification_instances_to_smac_instances(self.instances),
             "instance_features": index_features(self.instances),
@@ -1,10 +1,12 @@
 """Class to run parallel portfolio."""
 
+import asyncio
 import concurrent.futures
 import logging
 import signal
 import sys
-from collections.abc import Iterable
+import time
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
 from concurrent.futures import Future
 from pathlib import Path
 from typing import Any
@@ -15,16 +17,21 @@ from result import Err, Ok
 from autoverify.portfolio.portfolio import ConfiguredVerifier, Portfolio
 from autoverify.util import set_iter_except
 from autoverify.util.instances import (
+    ResultKey,
     VerificationDataResult,
     csv_append_verification_result,
     init_verification_result_csv,
+    resume_verification_result_csv,
+    verification_result_key,
 )
 from autoverify.util.proc import cpu_count, nvidia_gpu_count
-from autoverify.util.resources import to_allocation
+from autoverify.util.resources import NodePacker, to_allocation
+from autoverify.util.results_store import ResultsStore
 from autoverify.util.verification_instance import VerificationInstance
 from autoverify.util.verifiers import verifier_from_name
-from autoverify.util.vnncomp import inst_bench_to_verifier
-from autoverify.verifier.verification_result import CompleteVerificationResult
+from autoverify.util.vnncomp import inst_bench_to_kwargs, inst_bench_to_verifier
+from autoverify.verifier.verification_result import CompleteVerificationResult, VerificationResultString
+from autoverify.verifier.verification_run import VerificationRun
 from autoverify.verifier.verifier import CompleteVerifier
 
 logger = logging.getLogger(__name__)
@@ -42,9 +49,12 @@ def _get_verifier(
     verifier_kwargs: dict[str, dict[str, Any]] | None = None,
     cv_alloc: dict[ConfiguredVerifier, tuple[int, int, int]] | None = None,
 ) -> CompleteVerifier:
+    alloc: tuple[int, int, int] | None
+
     if vnncompat:
         assert benchmark and cv.resources
-        return inst_bench_to_verifier(benchmark, instance, cv.verifier, to_allocation(cv.resources))
+        alloc = cv_alloc[cv] if cv_alloc else to_allocation(cv.resources)
+        return inst_bench_to_verifier(benchmark, instance, cv.verifier, alloc)
     else:
         alloc = cv_alloc[cv] if cv_alloc else to_allocation(cv.resources) if cv.resources else None
 
@@ -61,7 +71,11 @@ def _get_verifier(
 
 
 class PortfolioRunner:
-    """Class to run a portfolio in parallel."""
+    """Class to run a portfolio in parallel.
+
+    Attributes:
+        instances_per_hour: Throughput of the last `verify_instances` call.
+    """
 
     def __init__(
         self,
@@ -70,6 +84,7 @@ class PortfolioRunner:
         *,
         n_cpu: int | None = None,
         n_gpu: int | None = None,
+        copies: int | None = 1,
     ):
         """Initialize a new portfolio runner.
 
@@ -78,11 +93,18 @@ class PortfolioRunner:
             vbs_mode: If the PF will be run in VBS mode.
             n_cpu: Override number of CPUs
             n_gpu: Override number of GPUs.
+            copies: Number of copies of the portfolio that verify instances
+                concurrently, each on CPUs and GPUs of its own. `None` runs
+                as many copies as fit on the node.
         """
         self._portfolio = portfolio
         self._vbs_mode = vbs_mode
         self._n_cpu = n_cpu
         self._n_gpu = n_gpu
+        self._copies = copies
+        self._verifiers: dict[ConfiguredVerifier, CompleteVerifier] = {}
+        self._verifier_pool: dict[tuple[Any, ...], CompleteVerifier] = {}
+        self.instances_per_hour: float | None = None
 
         if not self._vbs_mode:
             self._init_resources()
@@ -101,50 +123,88 @@ class PortfolioRunner:
         signal.signal(signal.SIGTERM, _wrap_cleanup)
 
     def _init_resources(self):
-        self._allocation: dict[ConfiguredVerifier, tuple[int, int, int]] = {}
         cpu_left = self._n_cpu or cpu_count()
         gpu_left = self._n_gpu or nvidia_gpu_count()
+        copies = self._copies
 
-        for cv in self._portfolio:
-            if cv.resources is None:
-                raise ValueError(f"No resources for{cv.verifier} :: {cv.configuration} found.")
-
-            # CPU (taskset) and GPU (CUDA_VISIBLE_DEVICES) index start at 0
-            n_cpu, n_gpu = cv.resources[0], cv.resources[1]
-
-            if n_gpu > gpu_left:
-                raise RuntimeError("No more GPUs left")
-            if n_cpu > cpu_left:
-                raise RuntimeError("No more CPUs left")
-            if n_cpu <= 0:
-                raise RuntimeError("CPUs should be > 0")
-
-            # Currently only support 1 GPU per verifier
-            if n_gpu > 0:
-                curr_gpu = gpu_left - 1
-                gpu_left -= 1
-            else:
-                curr_gpu = -1
+        if copies is None:
+            copies = self._copies_that_fit(cpu_left, gpu_left)
+
+        # Every copy gets a disjoint slice, carved from the top of the node
+        self._allocations: list[dict[ConfiguredVerifier, tuple[int, int, int]]] = []
+
+        for _ in range(copies):
+            allocation: dict[ConfiguredVerifier, tuple[int, int, int]] = {}
+
+            for cv in self._portfolio:
+                if cv.resources is None:
+                    raise ValueError(f"No resources for{cv.verifier} :: {cv.configuration} found.")
+
+                # CPU (taskset) and GPU (CUDA_VISIBLE_DEVICES) index start at 0
+                n_cpu, n_gpu = cv.resources[0], cv.resources[1]
+
+                if n_gpu > gpu_left:
+                    raise RuntimeError("No more GPUs left")
+                if n_cpu > cpu_left:
+                    raise RuntimeError("No more CPUs left")
+                if n_cpu <= 0:
+                    raise RuntimeError("CPUs should be > 0")
 
-            cpu_high = cpu_left
-            cpu_low = cpu_left - n_cpu
-            cpu_left = cpu_low
+                # Currently only support 1 GPU per verifier
+                if n_gpu > 0:
+                    curr_gpu = gpu_left - 1
+                    gpu_left -= 1
+                else:
+                    curr_gpu = -1
 
-            self._allocation[cv] = (cpu_low, cpu_high - 1, curr_gpu)
+                cpu_high = cpu_left
+                cpu_low = cpu_left - n_cpu
+                cpu_left = cpu_low
+
+                allocation[cv] = (cpu_low, cpu_high - 1, curr_gpu)
+
+            self._allocations.append(allocation)
+
+        self._allocation = self._allocations[0]
+
+    def _copies_that_fit(self, n_cpu: int, n_gpu: int) -> int:
+        """Number of disjoint copies of the portfolio that fit the resources."""
+        cpus_needed = sum(cv.resources[0] for cv in self._portfolio if cv.resources)
+        gpus_needed = sum(1 for cv in self._portfolio if cv.resources and cv.resources[1] > 0)
+
+        if cpus_needed <= 0:
+            raise RuntimeError("CPUs should be > 0")
+
+        fit = n_cpu // cpus_needed
+
+        if gpus_needed > 0:
+            fit = min(fit, n_gpu // gpus_needed)
+
+        # Let the allocation report which resource is missing
+        return int(max(fit, 1))
 
     def evaluate_vbs(
         self,
         instances: list[VerificationInstance],
         *,
         out_csv: Path | None = None,
+        results_store: ResultsStore | None = None,
         vnncompat: bool = False,
         benchmark: str | None = None,
     ) -> _VbsResult:
         """Evaluate the PF in vbs mode.
 
+        Every member of the portfolio is run on every instance. These runs
+        are packed onto the node by the CPUs and GPUs their member needs, and
+        as many of them run at the same time as fit. The runs with the
+        longest timeouts are started first, so no long run is left to hold
+        up the end of the evaluation. Results are written to `out_csv` as
+        soon as a run finishes.
+
         Arguments:
             instances: Instances to evaluate.
             out_csv: File where the results are written to.
+            results_store: Store the results are written to.
             vnncompat: Use some compat kwargs.
             benchmark: Only if vnncompat, benchmark name.
         """
@@ -155,29 +215,78 @@ class PortfolioRunner:
         elif not vnncompat and benchmark is not None:
             raise ValueError("Only use benchmark if vnncompat=True")
 
+        packer = NodePacker(self._n_cpu or cpu_count(), self._n_gpu or nvidia_gpu_count())
+        pending: list[tuple[ConfiguredVerifier, VerificationInstance]] = []
+
         for cv in self._portfolio:
-            assert cv.resources is not None
+            if cv.resources is None:
+                raise ValueError(f"No resources for {cv.verifier} :: {cv.configuration} found.")
+            if not packer.fits_node(cv.resources):
+                raise RuntimeError(f"{cv.verifier} needs more CPUs or GPUs than the node has")
+
+            pending.extend((cv, instance) for instance in instances)
+
+        # Longest expected jobs first, the largest ones among equally long jobs
+        pending.sort(key=lambda job: (job[1].timeout, job[0].resources), reverse=True)
+        futures: dict[
+            Future[CompleteVerificationResult],
+            tuple[ConfiguredVerifier, VerificationInstance, tuple[int, int, int]],
+        ] = {}
+
+        def _start_fitting(executor: concurrent.futures.Executor):
+            nonlocal pending
+            still_pending: list[tuple[ConfiguredVerifier, VerificationInstance]] = []
+
+            # Smaller jobs further down the list fill the gaps of larger ones
+            for cv, instance in pending:
+                assert cv.resources is not None
+                alloc = packer.take(cv.resources)
+
+                if alloc is None:
+                    still_pending.append((cv, instance))
+                    continue
 
-            for instance in instances:
-                verifier = _get_verifier(instance, cv, vnncompat, benchmark)
+                verifier = self._reuse_verifier(instance, cv, vnncompat, benchmark, cv_alloc={cv: alloc})
                 logger.info(f"{cv.verifier} on {str(instance)}")
-                result = verifier.verify_instance(instance)
-                self._add_result(cv, instance, result, results)
-
-                if out_csv:
-                    self._csv_log_result(
-                        out_csv,
-                        result,
-                        instance,
-                        cv.verifier,
-                        cv.configuration,
-                    )
+                run = verifier.start_instance(instance)
+                futures[executor.submit(run.wait)] = cv, instance, alloc
+
+            pending = still_pending
+
+        # Every job takes at least one core
+        with concurrent.futures.ThreadPoolExecutor(max_workers=packer.n_cpu) as executor:
+            _start_fitting(executor)
+
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    cv, instance, alloc = futures.pop(future)
+                    packer.release(alloc)
+                    result = future.result()
+                    self._add_result(cv, instance, result, results)
+
+                    if out_csv or results_store is not None:
+                        self._log_result(
+                            out_csv,
+                            results_store,
+                            result,
+                            instance,
+                            cv.verifier,
+                            cv.configuration,
+                        )
+
+                _start_fitting(executor)
+
+        if results_store is not None:
+            results_store.flush()
 
         return self._vbs_from_cost_dict(results)
 
     @staticmethod
-    def _csv_log_result(
-        out_csv: Path,
+    def _log_result(
+        out_csv: Path | None,
+        results_store: ResultsStore | None,
         result: CompleteVerificationResult,
         instance: VerificationInstance,
         verifier: str,
@@ -199,11 +308,16 @@ class PortfolioRunner:
             "success": success,
         }
 
-        if not out_csv.exists():
-            init_verification_result_csv(out_csv)
-
         vdr = VerificationDataResult.from_verification_result(res_d, inst_d)
-        csv_append_verification_result(vdr, out_csv)
+
+        if results_store is not None:
+            results_store.append(vdr)
+
+        if out_csv is not None:
+            if not out_csv.exists():
+                init_verification_result_csv(out_csv)
+
+            csv_append_verification_result(vdr, out_csv)
 
     @staticmethod
     def _vbs_from_cost_dict(cost_dict: _CostDict) -> _VbsResult:
@@ -254,7 +368,7 @@ class PortfolioRunner:
         verifiers: dict[ConfiguredVerifier, CompleteVerifier] = {}
 
         for cv in self._portfolio:
-            v = _get_verifier(
+            verifiers[cv] = self._reuse_verifier(
                 instance,
                 cv,
                 vnncompat,
@@ -262,30 +376,130 @@ class PortfolioRunner:
                 verifier_kwargs,
                 self._allocation,
             )
-            assert isinstance(v, CompleteVerifier)
-            verifiers[cv] = v
 
         return verifiers
 
+    def _reuse_verifier(
+        self,
+        instance: VerificationInstance,
+        cv: ConfiguredVerifier,
+        vnncompat: bool,
+        benchmark: str | None,
+        verifier_kwargs: dict[str, dict[str, Any]] | None = None,
+        cv_alloc: dict[ConfiguredVerifier, tuple[int, int, int]] | None = None,
+    ) -> CompleteVerifier:
+        """Get the verifier of a configured verifier for an instance.
+
+        Verifiers can run any number of verifications at the same time, so a
+        single verifier is made for all instances it is initialized the same
+        way for. Only in vnncompat mode do the init kwargs depend on the
+        instance. The verifiers are kept until the end of the run.
+        """
+        if vnncompat:
+            assert benchmark
+            kwargs = inst_bench_to_kwargs(benchmark, cv.verifier, instance)
+        else:
+            kwargs = (verifier_kwargs or {}).get(cv.verifier, {})
+
+        alloc = cv_alloc[cv] if cv_alloc else None
+        key = (cv, alloc, repr(sorted(kwargs.items())))
+
+        if key not in self._verifier_pool:
+            self._verifier_pool[key] = _get_verifier(
+                instance,
+                cv,
+                vnncompat,
+                benchmark,
+                verifier_kwargs,
+                cv_alloc,
+            )
+
+        return self._verifier_pool[key]
+
     def verify_instances(
         self,
         instances: Iterable[VerificationInstance],
         *,
         out_csv: Path | None = None,
+        results_store: ResultsStore | None = None,
         vnncompat: bool = False,
         benchmark: str | None = None,
         verifier_kwargs: dict[str, dict[str, Any]] | None = None,
         uses_simplified_network: Iterable[str] | None = None,
+        resume: bool = False,
+        on_result: Callable[[VerificationInstance, VerificationDataResult], None] | None = None,
     ) -> dict[VerificationInstance, VerificationDataResult]:
         """Run the PF in parallel.
 
+        Instances are pipelined: every member of the portfolio works through
+        the instances in order on its own cores. As soon as a member's run
+        exited, the member starts on its next instance that was not solved
+        yet, without waiting for the other members. When a member solves an
+        instance, the runs of the other members on it are cancelled. The
+        throughput is logged and stored in `instances_per_hour`.
+
+        With multiple copies of the portfolio, every member has a pinned
+        slice of the node in every copy. Each slice takes the next instance
+        of its member as soon as it is free, so every member verifies as many
+        instances concurrently as there are copies.
+
         Arguments:
             instances: Instances to evaluate.
             out_csv: File where the results are written to.
+            results_store: Store the results are written to.
             vnncompat: Use some compat kwargs.
             benchmark: Only if vnncompat, benchmark name.
             verifier_kwargs: Kwargs passed to verifiers.
             uses_simplified_network: Have some verifiers use simplified nets.
+            resume: Continue a run that wrote to `out_csv` or
+                `results_store` before. Members are only run on instances
+                they have no result for there, and not at all on instances
+                that were solved.
+                Those instances are not part of the returned results.
+            on_result: Called with each instance and its result as soon as
+                the instance is decided, see `iter_verify_instances`.
+        """
+        results: dict[VerificationInstance, VerificationDataResult] = {}
+
+        for instance, result in self.iter_verify_instances(
+            instances,
+            out_csv=out_csv,
+            results_store=results_store,
+            vnncompat=vnncompat,
+            benchmark=benchmark,
+            verifier_kwargs=verifier_kwargs,
+            uses_simplified_network=uses_simplified_network,
+            resume=resume,
+        ):
+            results[instance] = result
+
+            if on_result is not None:
+                on_result(instance, result)
+
+        return results
+
+    def iter_verify_instances(
+        self,
+        instances: Iterable[VerificationInstance],
+        *,
+        out_csv: Path | None = None,
+        results_store: ResultsStore | None = None,
+        vnncompat: bool = False,
+        benchmark: str | None = None,
+        verifier_kwargs: dict[str, dict[str, Any]] | None = None,
+        uses_simplified_network: Iterable[str] | None = None,
+        resume: bool = False,
+    ) -> Iterator[tuple[VerificationInstance, VerificationDataResult]]:
+        """Run the PF in parallel, yielding every result as soon as it is known.
+
+        Same as `verify_instances`, but instead of returning all results at
+        the end, every instance is yielded as soon as it is decided: once a
+        member solved it, or once every member finished on it without
+        solving it. Instances are yielded in the order they were decided.
+        Closing the iterator early cancels all running verifications.
+
+        Yields:
+            The instance and the result of the portfolio on it.
         """
         if self._vbs_mode:
             raise RuntimeError("Function not compatible with vbs_mode")
@@ -293,50 +507,319 @@ class PortfolioRunner:
         if out_csv:
             out_csv = out_csv.expanduser().resolve()
 
+        instances = list(instances)
         results: dict[VerificationInstance, VerificationDataResult] = {}
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            for instance in instances:
-                logger.info(f"Running portfolio on {str(instance)}")
+        # Every member works through the instances in order, on its own cores
+        next_index = {cv: 0 for cv in self._portfolio}
+        unfinished, solved = self._unfinished_members(
+            instances,
+            out_csv if resume else None,
+            results_store if resume else None,
+        )
+        runs: list[dict[ConfiguredVerifier, VerificationRun[CompleteVerificationResult]]] = [{} for _ in instances]
+        started: set[int] = set()
+        futures: dict[Future[CompleteVerificationResult], tuple[ConfiguredVerifier, int, int]] = {}
+        n_done = 0
+        start_t = time.monotonic()
+
+        def _start_next(executor: concurrent.futures.Executor, cv: ConfiguredVerifier, copy: int):
+            while next_index[cv] < len(instances):
+                index = next_index[cv]
+                next_index[cv] += 1
+
+                # Skip instances another member already solved, or this
+                # member already did in a previous run
+                if index in solved or cv not in unfinished[index]:
+                    unfinished[index].discard(cv)
+                    continue
+
+                instance = instances[index]
 
-                futures: dict[Future[CompleteVerificationResult], ConfiguredVerifier] = {}
-                self._verifiers = self._get_verifiers(
+                if uses_simplified_network and cv.verifier in uses_simplified_network:
+                    target_instance = instance.as_simplified_network()
+                else:
+                    target_instance = instance
+
+                verifier = self._reuse_verifier(
                     instance,
+                    cv,
                     vnncompat,
                     benchmark,
                     verifier_kwargs,
+                    self._allocations[copy],
                 )
-                is_solved = False
 
-                for cv in self._portfolio:
-                    if uses_simplified_network and cv.verifier in uses_simplified_network:
-                        target_instance = instance.as_simplified_network()
-                    else:
-                        target_instance = instance
+                if index not in started:
+                    started.add(index)
+                    logger.info(f"Running portfolio on {str(instance)}")
 
-                    future = executor.submit(self._verifiers[cv].verify_instance, target_instance)
-                    futures[future] = cv
+                runs[index][cv] = verifier.start_instance(target_instance)
+                futures[executor.submit(runs[index][cv].wait)] = cv, copy, index
+                return
 
-                for future in concurrent.futures.as_completed(futures):
-                    fut_cv = futures[future]
-                    result = future.result()
+        n_slices = len(self._portfolio) * len(self._allocations)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=n_slices) as executor:
+            try:
+                for copy in range(len(self._allocations)):
+                    for cv in self._portfolio:
+                        _start_next(executor, cv, copy)
+
+                while futures:
+                    done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                    decided: list[int] = []
+
+                    for future in done:
+                        fut_cv, copy, index = futures.pop(future)
+                        instance = instances[index]
+                        result = future.result()
+
+                        if index not in solved:
+                            if self._process_result(result, results, fut_cv, instance):
+                                solved.add(index)
+                                decided.append(index)
+                                self._cancel_running(fut_cv, runs[index])
+
+                            if out_csv or results_store is not None:
+                                self._log_result(
+                                    out_csv,
+                                    results_store,
+                                    result,
+                                    instance,
+                                    fut_cv.verifier,
+                                    fut_cv.configuration,
+                                )
+
+                        unfinished[index].discard(fut_cv)
+                        del runs[index][fut_cv]
+
+                        # Every member gave up on the instance
+                        if not unfinished[index] and index not in solved:
+                            decided.append(index)
+
+                        # The cores of this member are free again
+                        _start_next(executor, fut_cv, copy)
+
+                    # Yield only once the free cores are busy again
+                    for index in decided:
+                        n_done += 1
+                        yield instances[index], results[instances[index]]
+            finally:
+                # The iterator was closed early, or a run failed
+                for instance_runs in runs:
+                    for run in instance_runs.values():
+                        run.cancel()
 
-                    if not is_solved:
-                        got_solved = self._process_result(result, results, fut_cv, instance, self._verifiers)
+                # The verifiers of a vnncompat run depend on the instances
+                self._verifier_pool.clear()
 
-                        if got_solved and not is_solved:
-                            is_solved = True
+                if results_store is not None:
+                    results_store.flush()
 
-                        if out_csv:
-                            self._csv_log_result(
+        elapsed = time.monotonic() - start_t
+        self.instances_per_hour = n_done / elapsed * 3600 if elapsed > 0 else 0.0
+        logger.info(f"Verified {n_done} instances in {elapsed:.1f} sec ({self.instances_per_hour:.1f} instances/hour)")
+
+    async def averify_instances(
+        self,
+        instances: Iterable[VerificationInstance],
+        *,
+        out_csv: Path | None = None,
+        results_store: ResultsStore | None = None,
+        vnncompat: bool = False,
+        benchmark: str | None = None,
+        verifier_kwargs: dict[str, dict[str, Any]] | None = None,
+        uses_simplified_network: Iterable[str] | None = None,
+        resume: bool = False,
+        on_result: Callable[[VerificationInstance, VerificationDataResult], None] | None = None,
+    ) -> dict[VerificationInstance, VerificationDataResult]:
+        """Run the PF in parallel, asynchronously.
+
+        Same as `verify_instances`, but all verifiers are run as asyncio
+        subprocesses on the running event loop instead of in threads. When an
+        instance is solved, the tasks of the other verifiers are cancelled,
+        which kills their processes.
+
+        Arguments:
+            instances: Instances to evaluate.
+            out_csv: File where the results are written to.
+            results_store: Store the results are written to.
+            vnncompat: Use some compat kwargs.
+            benchmark: Only if vnncompat, benchmark name.
+            verifier_kwargs: Kwargs passed to verifiers.
+            uses_simplified_network: Have some verifiers use simplified nets.
+            resume: Continue a run that wrote to `out_csv` or
+                `results_store` before. Members are only run on instances
+                they have no result for there, and not at all on instances
+                that were solved.
+                Those instances are not part of the returned results.
+            on_result: Called with each instance and its result as soon as
+                the instance is decided.
+        """
+        results: dict[VerificationInstance, VerificationDataResult] = {}
+
+        async for instance, result in self.aiter_verify_instances(
+            instances,
+            out_csv=out_csv,
+            results_store=results_store,
+            vnncompat=vnncompat,
+            benchmark=benchmark,
+            verifier_kwargs=verifier_kwargs,
+            uses_simplified_network=uses_simplified_network,
+            resume=resume,
+        ):
+            results[instance] = result
+
+            if on_result is not None:
+                on_result(instance, result)
+
+        return results
+
+    async def aiter_verify_instances(
+        self,
+        instances: Iterable[VerificationInstance],
+        *,
+        out_csv: Path | None = None,
+        results_store: ResultsStore | None = None,
+        vnncompat: bool = False,
+        benchmark: str | None = None,
+        verifier_kwargs: dict[str, dict[str, Any]] | None = None,
+        uses_simplified_network: Iterable[str] | None = None,
+        resume: bool = False,
+    ) -> AsyncIterator[tuple[VerificationInstance, VerificationDataResult]]:
+        """Run the PF asynchronously, yielding every result as soon as it is known.
+
+        Same as `averify_instances`, but every instance is yielded as soon as
+        it is decided, see `iter_verify_instances`.
+
+        Yields:
+            The instance and the result of the portfolio on it.
+        """
+        if self._vbs_mode:
+            raise RuntimeError("Function not compatible with vbs_mode")
+
+        if out_csv:
+            out_csv = out_csv.expanduser().resolve()
+
+        instances = list(instances)
+        results: dict[VerificationInstance, VerificationDataResult] = {}
+        unfinished, _ = self._unfinished_members(
+            instances,
+            out_csv if resume else None,
+            results_store if resume else None,
+        )
+
+        for instance, members in zip(instances, unfinished, strict=True):
+            if not members:
+                continue
+
+            logger.info(f"Running portfolio on {str(instance)}")
+
+            tasks: dict[asyncio.Task[CompleteVerificationResult], ConfiguredVerifier] = {}
+            self._verifiers = self._get_verifiers(
+                instance,
+                vnncompat,
+                benchmark,
+                verifier_kwargs,
+            )
+
+            for cv in members:
+                if uses_simplified_network and cv.verifier in uses_simplified_network:
+                    target_instance = instance.as_simplified_network()
+                else:
+                    target_instance = instance
+
+                task = asyncio.create_task(self._verifiers[cv].averify_instance(target_instance))
+                tasks[task] = cv
+
+            try:
+                pending = set(tasks)
+
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                    for task in done:
+                        result = task.result()
+                        got_solved = self._process_result(result, results, tasks[task], instance)
+
+                        if out_csv or results_store is not None:
+                            self._log_result(
                                 out_csv,
+                                results_store,
                                 result,
                                 instance,
-                                fut_cv.verifier,
-                                fut_cv.configuration,
+                                tasks[task].verifier,
+                                tasks[task].configuration,
                             )
 
-        return results
+                        if got_solved:
+                            pending = set()
+                            break
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            yield instance, results[instance]
+
+        self._verifier_pool.clear()
+
+        if results_store is not None:
+            results_store.flush()
+
+    def _unfinished_members(
+        self,
+        instances: list[VerificationInstance],
+        resume_csv: Path | None,
+        resume_store: ResultsStore | None = None,
+    ) -> tuple[list[set[ConfiguredVerifier]], set[int]]:
+        """The members that still have to run on each instance.
+
+        Without results to resume from, that is every member on every
+        instance. Otherwise members that have a result for an instance in the
+        csv or the store are done with it, and no member runs on an instance
+        that was solved.
+
+        Returns:
+            The unfinished members of every instance, and the indices of the
+            instances that were solved already.
+        """
+        if resume_csv is None and resume_store is None:
+            return [set(self._portfolio.get_set()) for _ in instances], set()
+
+        done: dict[ResultKey, VerificationResultString] = {}
+
+        if resume_csv is not None:
+            done.update((result.key, result.result) for result in resume_verification_result_csv(resume_csv))
+        if resume_store is not None:
+            done.update(resume_store.verdicts())
+        unfinished: list[set[ConfiguredVerifier]] = []
+        solved: set[int] = set()
+
+        for index, instance in enumerate(instances):
+            members: set[ConfiguredVerifier] = set()
+
+            for cv in self._portfolio:
+                key = verification_result_key(
+                    instance.network,
+                    instance.property,
+                    instance.timeout,
+                    cv.verifier,
+                    cv.configuration,
+                )
+
+                if key not in done:
+                    members.add(cv)
+                elif done[key] in ("SAT", "UNSAT"):
+                    solved.add(index)
+
+            unfinished.append(set() if index in solved else members)
+
+        logger.info(f"Resuming, {len(solved)} instances were solved already")
+
+        return unfinished, solved
 
     def _process_result(
         self,
@@ -344,7 +827,6 @@ class PortfolioRunner:
         results: dict[VerificationInstance, VerificationDataResult],
         cv: ConfiguredVerifier,
         instance: VerificationInstance,
-        verifiers: dict[ConfiguredVerifier, CompleteVerifier],
     ) -> bool:
         instance_data: dict[str, Any] = {
             "network": instance.network,
@@ -359,8 +841,9 @@ class PortfolioRunner:
 
             if r.result == "TIMEOUT":
                 log_string = f"{cv.verifier} timed out"
+            elif r.result == "MEMOUT":
+                log_string = f"{cv.verifier} ran out of memory"
             else:
-                self._cancel_running(cv, verifiers)
                 log_string = f"Verified by {cv.verifier} in {r.took:.2f} sec, result = {r.result}"
 
             instance_data["success"] = "OK"
@@ -384,18 +867,20 @@ class PortfolioRunner:
     def _cancel_running(
         self,
         first_cv: ConfiguredVerifier,
-        verifiers: dict[ConfiguredVerifier, CompleteVerifier],
+        runs: dict[ConfiguredVerifier, VerificationRun[CompleteVerificationResult]],
     ):
         others = set_iter_except(self._portfolio.get_set(), first_cv)
         for other_cv in others:
-            verifiers[other_cv].set_timeout_event()
+            # Members that did not start on the instance yet will skip it
+            if other_cv in runs:
+                runs[other_cv].cancel()
 
     def _cleanup(self):
         """Kill all running verifiers processes."""
-        if not self._verifiers:
+        if not self._verifier_pool:
             sys.exit(0)
 
-        for verifier_inst in self._verifiers.values():
+        for verifier_inst in self._verifier_pool.values():
             try:
                 verifier_inst.set_timeout_event()
             finally:
@@ -4,17 +4,93 @@ import logging
 import sys
 from pathlib import Path
 
-from ConfigSpace import Configuration
-from smac import AlgorithmConfigurationFacade, Scenario
-
-from autoverify.util.smac import index_features, runhistory_to_csv
-from autoverify.util.target_function import get_verifier_tf, get_vnn_verifier_tf
-from autoverify.util.verifiers import verifier_from_name
+from ConfigSpace import Configuration, ConfigurationSpace
+from smac import Scenario
+
+from autoverify.types import TargetFunction
+from autoverify.util.proc import cpu_count
+from autoverify.util.resources import split_node
+from autoverify.util.smac import get_facade, index_features, runhistory_to_csv, smac_target
+from autoverify.util.target_function import (
+    MultiFidelityTargetFunction,
+    get_multi_fidelity_tf,
+    get_verifier_tf,
+    get_vnn_verifier_tf,
+)
+from autoverify.util.verifiers import uses_gpu, verifier_from_name
 from autoverify.verifier.verifier import Verifier
 
 logger = logging.getLogger(__name__)
 
 
+def _trial_allocations(
+    verifier: str,
+    n_workers: int,
+    trial_resources: tuple[int, int] | None,
+) -> list[tuple[int, int, int]] | None:
+    """Disjoint allocations for the trials that run at the same time.
+
+    By default, the cores are split evenly over the workers and every trial
+    of a verifier that uses the GPU gets a GPU of its own.
+    """
+    if n_workers <= 1:
+        return None
+
+    if trial_resources is None:
+        trial_resources = (max(1, cpu_count() // n_workers), 1 if uses_gpu(verifier) else 0)
+    elif trial_resources[1] <= 0 and uses_gpu(verifier):
+        logger.warning(f"Trials of {verifier} get no GPU of their own, they all run on the default GPU")
+
+    allocations = split_node(trial_resources, n_workers)
+
+    if len(allocations) < n_workers:
+        logger.warning(f"Only {len(allocations)} of the {n_workers} workers fit on this node")
+
+    return allocations
+
+
+def _get_scenario(
+    config_space: ConfigurationSpace,
+    instances: list[str],
+    walltime_limit: int,
+    output_dir: Path,
+    run_name: str | None,
+    min_budget: float | None,
+) -> Scenario:
+    """The tuning scenario, with budgets instead of instances for multi-fidelity."""
+    if min_budget is not None:
+        return Scenario(
+            config_space,
+            name=run_name,
+            min_budget=min_budget,
+            max_budget=1.0,
+            walltime_limit=walltime_limit,
+            output_directory=output_dir,
+            n_trials=sys.maxsize,
+        )
+
+    return Scenario(
+        config_space,
+        name=run_name,
+        instances=instances,
+        instance_features=index_features(instances),
+        walltime_limit=walltime_limit,
+        output_directory=output_dir,
+        n_trials=sys.maxsize,
+    )
+
+
+def _get_target_function(
+    target_function: TargetFunction,
+    instances: list[str],
+    min_budget: float | None,
+) -> TargetFunction | MultiFidelityTargetFunction:
+    if min_budget is None:
+        return target_function
+
+    return get_multi_fidelity_tf(target_function, instances)
+
+
 def vnn_smac_tune_verifier(
     verifier: str,
     instances: list[str],
@@ -25,8 +101,39 @@ def vnn_smac_tune_verifier(
     output_dir: Path | None = Path("tune_verifier_vnn/"),
     config_out: Path | None = Path("incumbent.txt"),
     rh_csv_path: Path | None = Path("runhistory.csv"),
+    n_workers: int = 1,
+    trial_resources: tuple[int, int] | None = None,
+    min_budget: float | None = None,
+    eta: int = 3,
 ) -> Configuration:
-    """_summary_."""
+    """Tune a verifier on instances of a VNNCOMP benchmark with SMAC.
+
+    Args:
+        verifier: Name of the verifier.
+        instances: The SMAC instances to tune on.
+        benchmark: Name of the benchmark, for the benchmark specific
+            arguments of the verifier.
+        walltime_limit: Seconds the tuning may take.
+        run_name: Name of the SMAC run.
+        output_dir: Directory of the SMAC output.
+        config_out: File the incumbent configuration is written to.
+        rh_csv_path: File the runhistory is written to.
+        n_workers: Number of trials that run at the same time, each on
+            its own cores (and GPU).
+        trial_resources: The (n_cpu, n_gpu) of every trial when
+            `n_workers > 1`, by default the cores are split evenly over the
+            workers and every trial gets a GPU if the verifier uses one.
+            Fewer workers run if there are fewer GPUs than workers.
+        min_budget: Tune with multi-fidelity (Hyperband): configs are first
+            run on all instances with this fraction of their timeouts, and
+            only the best are run with longer timeouts, up to the full
+            timeout. `None` to run every trial with the full timeout.
+        eta: Only the best `1 / eta` of the configs of a multi-fidelity
+            stage are promoted to the next stage.
+
+    Returns:
+        Configuration: The incumbent configuration.
+    """
     if output_dir is None:
         output_dir = Path("tune_verifier/")
 
@@ -37,19 +144,9 @@ def vnn_smac_tune_verifier(
     cfg_space = verifier_inst.config_space
     name = verifier_inst.name
 
-    scenario = Scenario(
-        cfg_space,
-        name=run_name,
-        instances=instances,
-        instance_features=index_features(instances),
-        walltime_limit=walltime_limit,
-        output_directory=output_dir,
-        n_trials=sys.maxsize,
-    )
-
-    target_function = get_vnn_verifier_tf(verifier, benchmark)
-
-    smac = AlgorithmConfigurationFacade(scenario, target_function, overwrite=True)
+    scenario = _get_scenario(cfg_space, instances, walltime_limit, output_dir, run_name, min_budget)
+    target_function = _get_target_function(get_vnn_verifier_tf(verifier, benchmark), instances, min_budget)
+    allocations = _trial_allocations(name, n_workers, trial_resources)
 
     logger.info(
         f"Tuning {name} with walltime_limit={str(walltime_limit)} "
@@ -57,7 +154,9 @@ def vnn_smac_tune_verifier(
         f"out_dir={output_dir.name} and cfg_out={config_out.name}"
     )
 
-    inc = smac.optimize()
+    with smac_target(scenario, target_function, allocations) as target:
+        smac = get_facade(scenario, target, eta=eta)
+        inc = smac.optimize()
 
     # Not dealing with > 1 config
     if isinstance(inc, list):
@@ -86,27 +185,46 @@ def smac_tune_verifier(
     config_out: Path | None = Path("incumbent.txt"),
     run_name: str | None = None,
     rh_csv_path: Path | None = None,
+    n_workers: int = 1,
+    trial_resources: tuple[int, int] | None = None,
+    min_budget: float | None = None,
+    eta: int = 3,
 ) -> Configuration:
-    """_summary_."""
+    """Tune a verifier with SMAC.
+
+    Args:
+        verifier: The verifier to tune.
+        instances: The SMAC instances to tune on.
+        walltime_limit: Seconds the tuning may take.
+        output_dir: Directory of the SMAC output.
+        config_out: File the incumbent configuration is written to.
+        run_name: Name of the SMAC run.
+        rh_csv_path: File the runhistory is written to.
+        n_workers: Number of trials that run at the same time, each on
+            its own cores (and GPU).
+        trial_resources: The (n_cpu, n_gpu) of every trial when
+            `n_workers > 1`, by default the cores are split evenly over the
+            workers and every trial gets a GPU if the verifier uses one.
+            Fewer workers run if there are fewer GPUs than workers.
+        min_budget: Tune with multi-fidelity (Hyperband): configs are first
+            run on all instances with this fraction of their timeouts, and
+            only the best are run with longer timeouts, up to the full
+            timeout. `None` to run every trial with the full timeout.
+        eta: Only the best `1 / eta` of the configs of a multi-fidelity
+            stage are promoted to the next stage.
+
+    Returns:
+        Configuration: The incumbent configuration.
+    """
     if output_dir is None:
         output_dir = Path("tune_verifier/")
 
     if config_out is None:
         config_out = Path("incumbent.txt")
 
-    scenario = Scenario(
-        verifier.config_space,
-        name=run_name,
-        instances=instances,
-        instance_features=index_features(instances),
-        walltime_limit=walltime_limit,
-        output_directory=output_dir,
-        n_trials=sys.maxsize,
-    )
-
-    target_function = get_verifier_tf(verifier)
-
-    smac = AlgorithmConfigurationFacade(scenario, target_function, overwrite=True)
+    scenario = _get_scenario(verifier.config_space, instances, walltime_limit, output_dir, run_name, min_budget)
+    target_function = _get_target_function(get_verifier_tf(verifier), instances, min_budget)
+    allocations = _trial_allocations(verifier.name, n_workers, trial_resources)
 
     logger.info(
         f"Tuning {verifier.name} with walltime_limit={str(walltime_limit)} "
@@ -114,7 +232,9 @@ def smac_tune_verifier(
         f"out_dir={output_dir.name} and cfg_out={config_out.name}"
     )
 
-    inc = smac.optimize()
+    with smac_target(scenario, target_function, allocations) as target:
+        smac = get_facade(scenario, target, eta=eta)
+        inc = smac.optimize()
 
     # Not dealing with > 1 config
     if isinstance(inc, list):
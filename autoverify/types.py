@@ -2,6 +2,7 @@
 
 # from dataclasses import dataclass, field
 from collections.abc import Callable
+from typing import Any
 
 from ConfigSpace import Configuration
 
@@ -10,7 +11,10 @@ Instance = str
 Cost = float
 Seed = int
 
-TargetFunction = Callable[[Configuration, Instance, Seed], Cost]
+# A cost and the additional info SMAC stores with the trial
+CostWithInfo = tuple[Cost, dict[str, Any]]
+
+TargetFunction = Callable[[Configuration, Instance, Seed], Cost | CostWithInfo]
 
 CostDict = dict[Instance, dict[Configuration, list[Cost]]]
 
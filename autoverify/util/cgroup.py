@@ -0,0 +1,137 @@
+"""Per-run resource limits with cgroup v2."""
+
+import logging
+import os
+import signal
+import tempfile
+import time
+from contextlib import suppress
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Period of the CPU bandwidth limit, in microseconds
+_CPU_PERIOD_US = 100_000
+
+
+class RunCgroup:
+    """A cgroup of a single run, limiting the memory and CPUs of its tool.
+
+    Every process the tool starts stays in the cgroup, so the limits hold for
+    the whole process tree, and killing the cgroup kills all of it, even
+    processes that started a session of their own. The cgroups are created
+    below a cgroup v2 directory that is writable for the user (e.g. one that
+    was delegated by systemd), with the `memory` and `cpu` controllers
+    enabled in its `cgroup.subtree_control`.
+
+    Attributes:
+        path: Directory of the cgroup.
+    """
+
+    def __init__(self, path: Path):
+        """Use an existing cgroup, see `RunCgroup.create` to make one."""
+        self.path = path
+
+    @classmethod
+    def create(
+        cls,
+        parent: Path,
+        *,
+        memory_limit_mb: int | None = None,
+        cpus: int | None = None,
+    ) -> "RunCgroup":
+        """Create a new cgroup below `parent`.
+
+        Args:
+            parent: The cgroup v2 directory to create the cgroup in.
+            memory_limit_mb: Memory the tool may use (without swap), once
+                it uses more it is killed by the kernel.
+            cpus: Number of CPUs worth of time the tool may use.
+
+        Raises:
+            RuntimeError: If the cgroup could not be created or configured.
+        """
+        try:
+            path = Path(tempfile.mkdtemp(dir=parent, prefix="autoverify-"))
+        except OSError as err:
+            raise RuntimeError(f"Could not create a cgroup in {parent}: {err}") from err
+
+        cgroup = cls(path)
+
+        try:
+            if memory_limit_mb is not None:
+                cgroup._write("memory.max", str(memory_limit_mb * 1024 * 1024))
+
+                # Not every kernel accounts swap, without it there is no swap
+                with suppress(FileNotFoundError):
+                    cgroup._write("memory.swap.max", "0")
+
+            if cpus:
+                cgroup._write("cpu.max", f"{cpus * _CPU_PERIOD_US} {_CPU_PERIOD_US}")
+        except OSError as err:
+            cgroup.remove()
+            raise RuntimeError(f"Could not set the limits of cgroup {path}: {err}") from err
+
+        return cgroup
+
+    def join(self):
+        """Move the calling process into the cgroup."""
+        self._write("cgroup.procs", str(os.getpid()))
+
+    def oom_killed(self) -> bool:
+        """If the kernel killed a process of the cgroup for exceeding its memory."""
+        try:
+            events = (self.path / "memory.events").read_text()
+        except OSError:
+            return False
+
+        for line in events.splitlines():
+            key, _, value = line.partition(" ")
+
+            if key == "oom_kill":
+                return int(value) > 0
+
+        return False
+
+    def peak_memory(self) -> int | None:
+        """Highest memory usage of the cgroup in bytes, if the kernel reports it."""
+        try:
+            return int((self.path / "memory.peak").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def kill(self):
+        """Send SIGKILL to every process in the cgroup."""
+        try:
+            self._write("cgroup.kill", "1")
+            return
+        except OSError:
+            pass
+
+        # Kernels before 5.14 have no cgroup.kill
+        with suppress(OSError):
+            for pid in (self.path / "cgroup.procs").read_text().split():
+                with suppress(ProcessLookupError, PermissionError):
+                    os.kill(int(pid), signal.SIGKILL)
+
+    def remove(self, *, timeout: float = 5.0):
+        """Kill what is left in the cgroup and remove it."""
+        deadline = time.monotonic() + timeout
+
+        while True:
+            try:
+                self.path.rmdir()
+                return
+            except FileNotFoundError:
+                return
+            except OSError as err:
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Could not remove cgroup {self.path}: {err}")
+                    return
+
+            self.kill()
+            time.sleep(0.05)
+
+    def _write(self, name: str, value: str):
+        with open(self.path / name, "w") as f:
+            f.write(value)
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import builtins
 import csv
-from collections.abc import Callable, Iterable, Sequence
+import math
+import os
+import tempfile
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Literal, overload
+from typing import Any, Literal, TypedDict, overload
 
 import pandas as pd
 
@@ -14,9 +18,30 @@ from autoverify.util.dataclass import get_dataclass_field_names
 from autoverify.util.verification_instance import VerificationInstance
 from autoverify.verifier.verification_result import (
     CompleteVerificationData,
+    ResourceUsage,
     VerificationResultString,
 )
 
+# Fields of `VerificationDataResult` taken from the `ResourceUsage` of a run
+USAGE_FIELDS = ("cpu_user", "cpu_sys", "peak_rss_mb", "wall", "teardown")
+
+# (network, property, timeout, verifier, config) of a result, as written to csv
+ResultKey = tuple[str, str, str, str, str]
+
+# The output of a run can be much longer than the default field size limit of
+# `csv` (128 KiB), the largest limit every platform accepts is used instead
+_CSV_FIELD_SIZE_LIMIT = 2**31 - 1
+
+
+class UsageFields(TypedDict, total=False):
+    """The `VerificationDataResult` fields taken from a `ResourceUsage`."""
+
+    cpu_user: float | None
+    cpu_sys: float | None
+    peak_rss_mb: float | None
+    wall: float | None
+    teardown: float | None
+
 
 @dataclass
 class VerificationDataResult:
@@ -33,12 +58,24 @@ class VerificationDataResult:
     counter_example: str | tuple[str, str] | None
     stderr: str | None
     stdout: str | None
+    cpu_user: float | None = None
+    cpu_sys: float | None = None
+    peak_rss_mb: float | None = None
+    wall: float | None = None
+    teardown: float | None = None
 
     def __post_init__(self):
         """_summary_."""
         if self.config == "None":
             self.config = "default"
 
+        # Empty cells (e.g. no usage was recorded) are read back as NaN
+        for field in USAGE_FIELDS:
+            value = getattr(self, field)
+
+            if isinstance(value, float) and math.isnan(value):
+                setattr(self, field, None)
+
     def as_csv_row(self) -> list[str]:
         """Convert data to a csv row writeable."""
         if isinstance(self.counter_example, tuple):
@@ -56,8 +93,38 @@ class VerificationDataResult:
             self.counter_example or "",
             self.stderr or "",
             self.stdout or "",
+            *("" if getattr(self, field) is None else str(getattr(self, field)) for field in USAGE_FIELDS),
         ]
 
+    @classmethod
+    def from_csv_row(cls, row: Sequence[str]) -> VerificationDataResult:
+        """Create from a row written by `as_csv_row`."""
+        network, property, timeout, verifier, config, success, result, took, *optional = row
+        counter_example, stderr, stdout = (value or None for value in optional[:3])
+        usage_values = (float(value) if value else None for value in optional[3:])
+        usage = dict(zip(USAGE_FIELDS, usage_values, strict=True))
+
+        return cls(
+            network,
+            property,
+            None if timeout == "None" else int(timeout),
+            verifier,
+            config,
+            success,  # type: ignore
+            result,  # type: ignore
+            float(took),
+            counter_example,
+            stderr,
+            stdout,
+            **usage,
+        )
+
+    # The `property` field shadows the builtin in the class body
+    @builtins.property
+    def key(self) -> ResultKey:
+        """The instance, verifier and config the result is of."""
+        return verification_result_key(self.network, self.property, self.timeout, self.verifier, self.config)
+
     @classmethod
     def from_verification_result(
         cls,
@@ -78,9 +145,38 @@ class VerificationDataResult:
             verif_res.counter_example,
             verif_res.err,
             verif_res.stdout,
+            **usage_fields(verif_res.usage),
         )
 
 
+def usage_fields(usage: ResourceUsage | None) -> UsageFields:
+    """The `VerificationDataResult` fields of a `ResourceUsage`."""
+    if usage is None:
+        return {}
+
+    return UsageFields(
+        cpu_user=usage.cpu_user,
+        cpu_sys=usage.cpu_sys,
+        peak_rss_mb=usage.peak_rss_mb,
+        wall=usage.wall,
+        teardown=usage.teardown,
+    )
+
+
+def verification_result_key(network: Any, property: Any, timeout: Any, verifier: str, config: Any) -> ResultKey:
+    """The key of a result, the way its row in a results csv identifies it."""
+    config = str(config)
+    return str(network), str(property), str(timeout), verifier, "default" if config == "None" else config
+
+
+def verification_result_csv_reader(lines: Iterable[str]) -> Iterator[list[str]]:
+    """A `csv.reader` for results csvs, which accepts fields of any size."""
+    if csv.field_size_limit() < _CSV_FIELD_SIZE_LIMIT:
+        csv.field_size_limit(_CSV_FIELD_SIZE_LIMIT)
+
+    return csv.reader(lines)
+
+
 def init_verification_result_csv(csv_path: Path):
     """_summary_."""
     with open(str(csv_path.expanduser()), "w") as csv_file:
@@ -95,6 +191,101 @@ def csv_append_verification_result(verification_result: VerificationDataResult,
         writer.writerow(verification_result.as_csv_row())
 
 
+def resume_verification_result_csv(csv_path: Path) -> list[VerificationDataResult]:
+    """Prepare a results csv for appending the results of a resumed run.
+
+    The csv is created if it does not exist yet. A run that was killed while
+    writing a row leaves a torn last row behind, which is cut off so that the
+    next row starts on a line of its own. Columns are read by name, so a csv
+    written by an older version (e.g. without the usage columns) can be
+    resumed too; it is rewritten with the current columns, so the rows that
+    are appended have the same columns as the ones before them.
+
+    Returns:
+        The results that are already in the csv.
+
+    Raises:
+        ValueError: If the csv has other columns, or a malformed row that is
+            not the last one.
+    """
+    csv_path = csv_path.expanduser()
+
+    if not csv_path.exists() or csv_path.stat().st_size == 0:
+        init_verification_result_csv(csv_path)
+        return []
+
+    fields = get_dataclass_field_names(VerificationDataResult)
+    # Every version wrote the fields that come before the usage fields
+    required_fields = set(fields) - set(USAGE_FIELDS)
+    header: list[str] | None = None
+    rows: list[list[str]] = []
+    size = csv_path.stat().st_size
+    offset = 0
+    last_line = ""
+    # Offset just after the last complete row
+    end = 0
+
+    with open(csv_path, newline="") as csv_file:
+
+        def _lines() -> Iterator[str]:
+            nonlocal offset, last_line
+
+            for line in csv_file:
+                offset += len(line.encode())
+                last_line = line
+                yield line
+
+        for row in verification_result_csv_reader(_lines()):
+            # Fields can contain newlines, a row is only complete once it ends
+            if not last_line.endswith("\n"):
+                break
+
+            if header is None:
+                if not required_fields <= set(row) <= set(fields):
+                    raise ValueError(f"{csv_path} does not have the columns of a verification results csv")
+
+                header = row
+            elif row:
+                if len(row) != len(header):
+                    break
+
+                values = dict(zip(header, row, strict=True))
+                rows.append([values.get(field, "") for field in fields])
+
+            end = offset
+
+    if header is None:
+        init_verification_result_csv(csv_path)
+        return []
+
+    if end < size and offset < size:
+        raise ValueError(f"{csv_path} has a malformed row at byte {end}")
+
+    if header != fields:
+        _rewrite_verification_result_csv(csv_path, fields, rows)
+    elif end < size:
+        with open(csv_path, "r+b") as raw_file:
+            raw_file.truncate(end)
+
+    return [VerificationDataResult.from_csv_row(row) for row in rows]
+
+
+def _rewrite_verification_result_csv(csv_path: Path, header: list[str], rows: list[list[str]]):
+    """Atomically replace the contents of a results csv."""
+    fd, tmp_name = tempfile.mkstemp(dir=csv_path.parent, prefix=".tmp", suffix=".csv")
+
+    try:
+        with os.fdopen(fd, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+        os.replace(tmp_name, csv_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
 def read_verification_result_from_csv(
     csv_path: Path,
 ) -> list[VerificationDataResult]:
@@ -102,8 +293,8 @@ def read_verification_result_from_csv(
     results_df = pd.read_csv(csv_path)
     verification_results: list[VerificationDataResult] = []
 
-    for _, row in results_df.iterrows():
-        row = row.to_list()
+    # Much faster than iterrows, which builds a Series per row
+    for row in results_df.itertuples(index=False, name=None):
         verification_results.append(VerificationDataResult(*row))
 
     return verification_results
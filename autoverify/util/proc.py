@@ -2,8 +2,14 @@
 
 import os
 import shlex
+import signal
 import subprocess
+import time
 from collections.abc import Collection
+from contextlib import suppress
+from pathlib import Path
+
+_PROC = Path("/proc")
 
 
 # Credits: @jfs
@@ -36,6 +42,167 @@ def pkill_match(pattern: str):  # pragma: no cover
         raise Exception(result.stderr)
 
 
+def _read_stat(pid: int) -> list[str] | None:
+    """Fields of `/proc/<pid>/stat` after the command name, starting at state."""
+    try:
+        stat = (_PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+
+    # The command name is in parentheses and may contain spaces itself
+    return stat[stat.rindex(")") + 2 :].split()
+
+
+def process_tree(pid: int) -> set[int]:
+    """Find the processes started by a session leader.
+
+    These are the process itself, all of its descendants and all processes
+    in its session. Descendants whose parent already exited are still in the
+    session, unless they started a session of their own.
+
+    Args:
+        pid: Pid of a process that was started with `start_new_session`.
+
+    Returns:
+        set[int]: Pids of the processes, only ones that exist.
+    """
+    stats: dict[int, tuple[int, int]] = {}
+
+    for entry in os.scandir(_PROC):
+        if entry.name.isdigit() and (fields := _read_stat(int(entry.name))) is not None:
+            stats[int(entry.name)] = int(fields[1]), int(fields[3])
+
+    tree = {p for p, (_, session) in stats.items() if session == pid or p == pid}
+    children: dict[int, list[int]] = {}
+
+    for p, (ppid, _) in stats.items():
+        children.setdefault(ppid, []).append(p)
+
+    todo = list(tree)
+
+    while todo:
+        for child in children.get(todo.pop(), []):
+            if child not in tree:
+                tree.add(child)
+                todo.append(child)
+
+    return tree
+
+
+def kill_process_tree(pid: int, sig: int = signal.SIGTERM):
+    """Send a signal to the processes started by a session leader.
+
+    Only the processes of `process_tree` are signalled, so other runs of the
+    same tool on this host are not affected. Without `/proc`, the process
+    group of `pid` is signalled instead.
+
+    Args:
+        pid: Pid of a process that was started with `start_new_session`.
+        sig: The signal to send.
+    """
+    if not _PROC.is_dir():
+        with suppress(ProcessLookupError, PermissionError):
+            os.killpg(pid, sig)
+
+        return
+
+    for p in process_tree(pid):
+        if p == os.getpid():
+            continue
+
+        with suppress(ProcessLookupError, PermissionError):
+            os.kill(p, sig)
+
+
+def process_tree_alive(pid: int) -> bool:
+    """If any process of `process_tree` is still running (zombies are not).
+
+    Without `/proc` this can not be known and `False` is returned.
+    """
+    if not _PROC.is_dir():
+        return False
+
+    return any(
+        p != os.getpid() and (fields := _read_stat(p)) is not None and fields[0] != "Z" for p in process_tree(pid)
+    )
+
+
+def terminate_process_tree(pid: int, grace: float, *, poll_interval: float = 0.05) -> bool:
+    """Send SIGTERM to a process tree, and SIGKILL to what is left after `grace`.
+
+    Args:
+        pid: Pid of a process that was started with `start_new_session`.
+        grace: Seconds the processes get to exit after SIGTERM.
+        poll_interval: Seconds between checks if the processes exited.
+
+    Returns:
+        bool: If SIGKILL had to be sent.
+    """
+    kill_process_tree(pid, signal.SIGTERM)
+    deadline = time.monotonic() + grace
+
+    while process_tree_alive(pid):
+        if time.monotonic() >= deadline:
+            kill_process_tree(pid, signal.SIGKILL)
+            return True
+
+        time.sleep(poll_interval)
+
+    return False
+
+
+class ProcessTreeSampler:
+    """Samples the CPU time and memory of a process tree from `/proc`.
+
+    CPU times are the latest sample of every process that was seen, memory is
+    the highest total resident set size of the tree over all samples. Both
+    miss what happened between the last sample and the exit of a process.
+
+    Attributes:
+        cpu_user: Seconds of user mode CPU time.
+        cpu_sys: Seconds of kernel mode CPU time.
+        peak_rss: Highest total resident set size, in bytes.
+    """
+
+    def __init__(self, pid: int):
+        """New instance.
+
+        Args:
+            pid: Pid of a process that was started with `start_new_session`.
+        """
+        self.pid = pid
+        self.peak_rss = 0
+        self._cpu: dict[int, tuple[float, float]] = {}
+
+    @property
+    def cpu_user(self) -> float:
+        """Seconds of user mode CPU time."""
+        return sum(user for user, _ in self._cpu.values())
+
+    @property
+    def cpu_sys(self) -> float:
+        """Seconds of kernel mode CPU time."""
+        return sum(sys for _, sys in self._cpu.values())
+
+    def sample(self):
+        """Take a sample of all processes in the tree."""
+        if not _PROC.is_dir():
+            return
+
+        ticks = os.sysconf("SC_CLK_TCK")
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        rss = 0
+
+        for pid in process_tree(self.pid):
+            if (fields := _read_stat(pid)) is None or fields[0] == "Z":
+                continue
+
+            self._cpu[pid] = int(fields[11]) / ticks, int(fields[12]) / ticks
+            rss += int(fields[21]) * page_size
+
+        self.peak_rss = max(self.peak_rss, rss)
+
+
 def cpu_count() -> int:  # pragma: no cover
     """Return the number of available CPUs."""
     return len(os.sched_getaffinity(0))
@@ -0,0 +1,378 @@
+"""Resolved verifier environments.
+
+Running a verifier used to mean building a bash script that sources conda,
+activates the verifier's env and then calls `python`. Locating conda (`conda
+info`) and libraries (`find` over the whole env) was repeated for every single
+verification. A `ResolvedEnv` does all of this once per installed verifier:
+it knows the interpreter of the env, the environment variables activation
+changes and the directories of libraries that were looked up. It is persisted
+next to the installation and refreshed when the env changes on disk.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import shlex
+import subprocess
+import tempfile
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal
+
+from autoverify.cli.install import TOOL_DIR_NAME, VERIFIER_DIR
+from autoverify.cli.install.venv_installers.venv_install import (
+    VENV_DIR_NAME,
+    VENV_VERIFIER_DIR,
+)
+from autoverify.config import get_config
+from autoverify.util.conda import (
+    get_conda_path,
+    get_conda_source_cmd,
+    get_verifier_conda_env_name,
+)
+
+logger = logging.getLogger(__name__)
+
+EnvKind = Literal["conda", "venv"]
+
+RESOLVED_ENV_FILE = "resolved_env.json"
+_FORMAT_VERSION = 1
+
+# Variables the probing shell sets itself, these are not part of activation
+_SHELL_VARS = frozenset({"_", "PWD", "OLDPWD", "SHLVL", "PS1"})
+
+_PROBE_SCRIPT = "import json, os, sys; print(json.dumps({'python': sys.executable, 'environ': dict(os.environ)}))"
+
+
+@dataclass
+class EnvDelta:
+    """The changes activating an environment makes to `os.environ`.
+
+    Variables ending in `PATH` are treated as lists: activation prepends
+    entries to them and may drop entries (e.g. those of the base env).
+
+    Attributes:
+        set: Variables that are set to a fixed value.
+        unset: Variables that are removed.
+        prepend: Entries prepended to a path list variable.
+        drop: Entries removed from a path list variable.
+    """
+
+    set: dict[str, str] = field(default_factory=dict)
+    unset: list[str] = field(default_factory=list)
+    prepend: dict[str, list[str]] = field(default_factory=dict)
+    drop: dict[str, list[str]] = field(default_factory=dict)
+
+    @classmethod
+    def between(cls, before: Mapping[str, str], after: Mapping[str, str]) -> "EnvDelta":
+        """Compute the delta that turns `before` into `after`."""
+        delta = cls()
+
+        for key, value in after.items():
+            if key in _SHELL_VARS or before.get(key) == value:
+                continue
+
+            if key.endswith("PATH"):
+                old = _split_path_list(before.get(key, ""))
+                new = _split_path_list(value)
+                delta.prepend[key] = [e for e in new if e not in old]
+                delta.drop[key] = [e for e in old if e not in new]
+            else:
+                delta.set[key] = value
+
+        delta.unset = [key for key in before if key not in after and key not in _SHELL_VARS]
+        return delta
+
+    def apply(self, base: Mapping[str, str]) -> dict[str, str]:
+        """Return a copy of `base` with the delta applied."""
+        env = dict(base)
+
+        for key in self.unset:
+            env.pop(key, None)
+
+        env.update(self.set)
+
+        for key in self.prepend.keys() | self.drop.keys():
+            prepend = self.prepend.get(key, [])
+            drop = set(self.drop.get(key, [])) | set(prepend)
+            entries = prepend + [e for e in _split_path_list(env.get(key, "")) if e not in drop]
+
+            if entries:
+                env[key] = os.pathsep.join(entries)
+            else:
+                env.pop(key, None)
+
+        return env
+
+
+def _split_path_list(value: str) -> list[str]:
+    return [e for e in value.split(os.pathsep) if e]
+
+
+@dataclass
+class ResolvedEnv:
+    """Everything needed to launch a verifier without a shell.
+
+    Attributes:
+        verifier: Name of the verifier.
+        kind: If the verifier was installed in a conda env or a venv.
+        prefix: Root directory of the environment.
+        tool_path: Directory of the verifier's source.
+        python: The Python interpreter of the environment.
+        delta: Changes activating the environment makes to `os.environ`.
+        libs: Directories of libraries that were looked up, by name.
+        stamp: Modification time of the environment when it was resolved.
+    """
+
+    verifier: str
+    kind: EnvKind
+    prefix: Path
+    tool_path: Path
+    python: Path
+    delta: EnvDelta = field(default_factory=EnvDelta)
+    libs: dict[str, str] = field(default_factory=dict)
+    stamp: float = 0.0
+
+    def activate(self, base: Mapping[str, str]) -> dict[str, str]:
+        """Return the environment variables of `base` after activation."""
+        return self.delta.apply(base)
+
+    def find_lib(self, name: str) -> Path:
+        """Return the directory of a library (glob) inside the environment.
+
+        The env is only searched the first time a library is looked up, after
+        that the result is read from the persisted environment.
+        """
+        if name not in self.libs:
+            for root, _, files in os.walk(self.prefix):
+                if fnmatch.filter(files, name):
+                    self.libs[name] = root
+                    break
+            else:
+                raise ValueError(f"Lib {name} could not be found in env {self.prefix}.")
+
+            _save_resolved_env(self)
+
+        return Path(self.libs[name])
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize to a JSON compatible dict."""
+        return {
+            "version": _FORMAT_VERSION,
+            "verifier": self.verifier,
+            "kind": self.kind,
+            "prefix": str(self.prefix),
+            "tool_path": str(self.tool_path),
+            "python": str(self.python),
+            "delta": {
+                "set": self.delta.set,
+                "unset": self.delta.unset,
+                "prepend": self.delta.prepend,
+                "drop": self.delta.drop,
+            },
+            "libs": self.libs,
+            "stamp": self.stamp,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ResolvedEnv":
+        """Deserialize from a dict made by `to_dict`."""
+        if data.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported resolved env version {data.get('version')}")
+
+        return cls(
+            verifier=data["verifier"],
+            kind=data["kind"],
+            prefix=Path(data["prefix"]),
+            tool_path=Path(data["tool_path"]),
+            python=Path(data["python"]),
+            delta=EnvDelta(**data["delta"]),
+            libs=dict(data["libs"]),
+            stamp=float(data["stamp"]),
+        )
+
+
+_cache: dict[str, ResolvedEnv] = {}
+_cache_lock = threading.Lock()
+
+
+def find_verifier_install(verifier: str) -> tuple[EnvKind, Path]:
+    """Find the directory a verifier is installed in.
+
+    Both conda and venv installations are considered, the `env_strategy` of
+    the auto-verify config decides which is preferred if both exist.
+
+    Returns:
+        tuple[EnvKind, Path]: The kind of env and the installation directory.
+    """
+    candidates: list[tuple[EnvKind, Path]] = [
+        ("conda", VERIFIER_DIR / verifier),
+        ("venv", VENV_VERIFIER_DIR / verifier),
+    ]
+
+    if get_config().env_strategy == "venv":
+        candidates.reverse()
+
+    for kind, install_dir in candidates:
+        if (install_dir / TOOL_DIR_NAME).exists():
+            return kind, install_dir
+
+    raise FileNotFoundError(f"Could not find installation for tool {verifier}")
+
+
+def resolve_verifier_env(verifier: str, *, refresh: bool = False) -> ResolvedEnv:
+    """Get the resolved environment of an installed verifier.
+
+    Resolved environments are cached in memory and persisted as JSON in the
+    installation directory. They are resolved again if the environment was
+    modified after resolving it, or if `refresh` is set.
+
+    Args:
+        verifier: Name of the verifier.
+        refresh: Ignore cached results and resolve again.
+
+    Returns:
+        ResolvedEnv: The resolved environment.
+    """
+    kind, install_dir = find_verifier_install(verifier)
+
+    with _cache_lock:
+        resolved = None if refresh else _cache.get(verifier)
+
+        if resolved is None and not refresh:
+            resolved = _load_resolved_env(install_dir / RESOLVED_ENV_FILE)
+
+        if resolved is not None and not _is_fresh(resolved, kind, install_dir):
+            resolved = None
+
+        if resolved is None:
+            logger.debug(f"Resolving {kind} environment of {verifier}")
+            resolved = _resolve(verifier, kind, install_dir)
+            _save_resolved_env(resolved)
+
+        _cache[verifier] = resolved
+
+    return resolved
+
+
+def env_stamp(prefix: Path) -> float:
+    """Latest modification time of the parts of an env that change on install."""
+    paths = [prefix, prefix / "bin", prefix / "conda-meta", *prefix.glob("lib/python*/site-packages")]
+    return max((p.stat().st_mtime for p in paths if p.exists()), default=0.0)
+
+
+def _is_fresh(resolved: ResolvedEnv, kind: EnvKind, install_dir: Path) -> bool:
+    return (
+        resolved.kind == kind
+        and resolved.tool_path == install_dir / TOOL_DIR_NAME
+        and resolved.python.exists()
+        and resolved.stamp == env_stamp(resolved.prefix)
+    )
+
+
+def _resolve(verifier: str, kind: EnvKind, install_dir: Path) -> ResolvedEnv:
+    if kind == "venv":
+        return _resolve_venv(verifier, install_dir)
+
+    return _resolve_conda(verifier, install_dir)
+
+
+def _resolve_venv(verifier: str, install_dir: Path) -> ResolvedEnv:
+    prefix = install_dir / VENV_DIR_NAME
+
+    if not prefix.exists():
+        raise FileNotFoundError(f"Could not find venv of {verifier} at {prefix}")
+
+    # This is all `bin/activate` does
+    delta = EnvDelta(
+        set={"VIRTUAL_ENV": str(prefix)},
+        unset=["PYTHONHOME"],
+        prepend={"PATH": [str(prefix / "bin")]},
+    )
+
+    return ResolvedEnv(
+        verifier=verifier,
+        kind="venv",
+        prefix=prefix,
+        tool_path=install_dir / TOOL_DIR_NAME,
+        python=prefix / "bin" / "python",
+        delta=delta,
+        stamp=env_stamp(prefix),
+    )
+
+
+def _conda_base() -> Path:
+    """Locate the conda installation, only calling `conda info` as fallback."""
+    if conda_exe := os.environ.get("CONDA_EXE"):
+        return Path(conda_exe).parent.parent
+
+    if conda_prefix := os.environ.get("CONDA_PREFIX"):
+        prefix = Path(conda_prefix)
+        return prefix.parent.parent if prefix.parent.name == "envs" else prefix
+
+    return get_conda_path()
+
+
+def _resolve_conda(verifier: str, install_dir: Path) -> ResolvedEnv:
+    """Activate the env in a shell once and record what activation changed."""
+    env_name = get_verifier_conda_env_name(verifier)
+    source_cmd = " ".join(get_conda_source_cmd(_conda_base()))
+    script = f"{source_cmd}\nconda activate {env_name}\nexec python -c {shlex.quote(_PROBE_SCRIPT)}"
+
+    before = dict(os.environ)
+    result = subprocess.run(
+        ["bash", "-c", script],
+        env=before,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Activation scripts may print things, the probe output is the last line
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    after: dict[str, str] = probe["environ"]
+    prefix = Path(after["CONDA_PREFIX"])
+
+    return ResolvedEnv(
+        verifier=verifier,
+        kind="conda",
+        prefix=prefix,
+        tool_path=install_dir / TOOL_DIR_NAME,
+        python=Path(probe["python"]),
+        delta=EnvDelta.between(before, after),
+        stamp=env_stamp(prefix),
+    )
+
+
+def _resolved_env_file(resolved: ResolvedEnv) -> Path:
+    return resolved.tool_path.parent / RESOLVED_ENV_FILE
+
+
+def _load_resolved_env(file: Path) -> ResolvedEnv | None:
+    try:
+        with open(file) as f:
+            return ResolvedEnv.from_dict(json.load(f))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as err:
+        logger.warning(f"Ignoring unreadable resolved env {file}: {err}")
+        return None
+
+
+def _save_resolved_env(resolved: ResolvedEnv):
+    """Atomically write the resolved env next to the installation."""
+    file = _resolved_env_file(resolved)
+
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=file.parent, prefix=".resolved_env", suffix=".json")
+
+        with os.fdopen(fd, "w") as f:
+            json.dump(resolved.to_dict(), f, indent=2)
+
+        os.replace(tmp_name, file)
+    except OSError as err:
+        # Not being able to persist only costs time on the next run
+        logger.warning(f"Could not save resolved env to {file}: {err}")
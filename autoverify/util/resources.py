@@ -1,9 +1,14 @@
 """_summary_."""
 
-from autoverify.portfolio.portfolio import PortfolioScenario
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
 from autoverify.util.proc import cpu_count, nvidia_gpu_count
 from autoverify.util.resource_strategy import ResourceStrategy
 
+if TYPE_CHECKING:
+    from autoverify.portfolio.portfolio import PortfolioScenario
+
 
 def to_allocation(resources: tuple[int, int]) -> tuple[int, int, int]:
     """Go from (n_cpu, n_gpu) to a real allocation."""
@@ -16,7 +21,7 @@ class ResourceTracker:
 
     def __init__(
         self,
-        pf_scen: PortfolioScenario,
+        pf_scen: "PortfolioScenario",
         *,
         strategy: ResourceStrategy | str = ResourceStrategy.Auto,
         cpu_gpu_count: tuple[int, int] | None = None,
@@ -53,6 +58,19 @@ class ResourceTracker:
     def resources(self):
         return self._resources
 
+    def get_state(self) -> dict[str, Any]:
+        """What is left of the resources, to restore it with `set_state`."""
+        return {
+            "resources": list(self._resources),
+            "cpus_remainder": self._cpus_remainder,
+        }
+
+    def set_state(self, state: Mapping[str, Any]):
+        """Restore what was left of the resources, see `get_state`."""
+        n_cpu, n_gpu = state["resources"]
+        self._resources = (n_cpu, n_gpu)
+        self._cpus_remainder = state["cpus_remainder"]
+
     def get_possible(self) -> list[str]:
         """Get the verifiers that still fit in the PF."""
         possible: list[str] = []
@@ -114,3 +132,105 @@ class ResourceTracker:
             possible.append(v[0])
 
         return possible
+
+
+class NodePacker:
+    """Packs jobs with CPU/GPU needs onto the cores and GPUs of a node.
+
+    Every job gets a contiguous range of free cores (taskset) and, if it
+    needs one, a free GPU (CUDA_VISIBLE_DEVICES). Resources are handed out
+    first fit from the top of the node and are free again once released.
+    """
+
+    def __init__(self, n_cpu: int, n_gpu: int):
+        """New instance.
+
+        Arguments:
+            n_cpu: Number of cores of the node.
+            n_gpu: Number of GPUs of the node.
+        """
+        self.n_cpu = n_cpu
+        self.n_gpu = n_gpu
+        self._free_cpus = [True] * n_cpu
+        self._free_gpus = [True] * n_gpu
+
+    def fits_node(self, resources: tuple[int, int]) -> bool:
+        """If a job with these (n_cpu, n_gpu) needs fits the empty node."""
+        n_cpu, n_gpu = resources
+        return 0 < n_cpu <= self.n_cpu and (n_gpu <= 0 or self.n_gpu > 0)
+
+    def take(self, resources: tuple[int, int]) -> tuple[int, int, int] | None:
+        """Reserve resources for a job with these (n_cpu, n_gpu) needs.
+
+        Currently only 1 GPU per job is supported, any GPU need above 0
+        reserves a single GPU.
+
+        Returns:
+            The allocation (first core, last core, GPU or -1), or `None` if
+            the job does not fit the free resources right now.
+        """
+        n_cpu, n_gpu = resources
+        gpu = -1
+
+        if n_gpu > 0:
+            gpu = next((i for i in reversed(range(self.n_gpu)) if self._free_gpus[i]), -1)
+
+            if gpu < 0:
+                return None
+
+        run = 0
+
+        for high in reversed(range(self.n_cpu)):
+            run = run + 1 if self._free_cpus[high] else 0
+
+            if run == n_cpu:
+                low = high
+                high = low + n_cpu - 1
+                self._set(low, high, gpu, False)
+                return (low, high, gpu)
+
+        return None
+
+    def release(self, allocation: tuple[int, int, int]):
+        """Free the resources of a job that finished."""
+        self._set(*allocation, True)
+
+    def _set(self, low: int, high: int, gpu: int, free: bool):
+        for cpu in range(low, high + 1):
+            self._free_cpus[cpu] = free
+
+        if gpu >= 0:
+            self._free_gpus[gpu] = free
+
+
+def split_node(
+    resources: tuple[int, int],
+    n_jobs: int,
+    *,
+    cpu_gpu_count: tuple[int, int] | None = None,
+) -> list[tuple[int, int, int]]:
+    """Disjoint allocations for jobs that run at the same time.
+
+    Arguments:
+        resources: The (n_cpu, n_gpu) needs of every job.
+        n_jobs: Number of allocations wanted.
+        cpu_gpu_count: Override the number of CPU/GPUs of the node.
+
+    Returns:
+        Up to `n_jobs` allocations, fewer if the rest does not fit the node.
+
+    Raises:
+        ValueError: If not a single job fits the node.
+    """
+    n_cpu, n_gpu = cpu_gpu_count or (cpu_count(), nvidia_gpu_count())
+    packer = NodePacker(n_cpu, n_gpu)
+
+    if not packer.fits_node(resources):
+        raise ValueError(f"A job needing {resources} (CPUs, GPUs) does not fit a node with {(n_cpu, n_gpu)}")
+
+    allocations: list[tuple[int, int, int]] = []
+
+    while len(allocations) < n_jobs and (allocation := packer.take(resources)) is not None:
+        allocations.append(allocation)
+
+    return allocations
@@ -0,0 +1,369 @@
+"""Columnar store of verification results.
+
+Appending every result to a csv reopens the file for every row and puts the
+complete output of the tool in it, so large result histories become slow to
+write and to read back. A `ResultsStore` keeps the results in a SQLite
+database in WAL mode instead:
+
+* Results are written in batches, in a single transaction each.
+* The output, errors and counter examples of runs are stored in compressed
+  side files, named after the hash of their contents. Rows only reference
+  them by that ID.
+* Networks, properties, verifiers and configs are interned, rows only store
+  the ID of each string.
+* Any number of processes can append to the same store at the same time.
+
+The results are loaded as a `pandas.DataFrame` with a single query. The csv
+format stays available as an export, see `ResultsStore.export_csv`.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import suppress
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from autoverify.util.dataclass import get_dataclass_field_names
+from autoverify.util.instances import (
+    USAGE_FIELDS,
+    ResultKey,
+    VerificationDataResult,
+    init_verification_result_csv,
+    verification_result_csv_reader,
+    verification_result_key,
+)
+from autoverify.verifier.verification_result import VerificationResultString
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_FLUSH_INTERVAL_SEC = 10.0
+
+# Seconds a writer waits for another process to finish its transaction
+_BUSY_TIMEOUT_SEC = 60.0
+
+# Fields that are interned, and those that are stored in side files
+_INTERNED = ("network", "property", "verifier", "config")
+_OUTPUTS = ("counter_example", "stderr", "stdout")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS strings (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    network INTEGER NOT NULL REFERENCES strings(id),
+    property INTEGER NOT NULL REFERENCES strings(id),
+    timeout INTEGER,
+    verifier INTEGER NOT NULL REFERENCES strings(id),
+    config INTEGER NOT NULL REFERENCES strings(id),
+    success TEXT NOT NULL,
+    result TEXT NOT NULL,
+    took REAL NOT NULL,
+    counter_example_id TEXT,
+    stderr_id TEXT,
+    stdout_id TEXT,
+    {", ".join(f"{field} REAL" for field in USAGE_FIELDS)}
+);
+"""
+
+_COLUMNS = (
+    "network",
+    "property",
+    "timeout",
+    "verifier",
+    "config",
+    "success",
+    "result",
+    "took",
+    *(f"{field}_id" for field in _OUTPUTS),
+    *USAGE_FIELDS,
+)
+
+_INSERT = f"INSERT INTO results ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+_SELECT = f"""
+SELECT
+    results.id AS id,
+    {", ".join(f"{field}.value AS {field}" for field in _INTERNED)},
+    timeout, success, result, took,
+    {", ".join(f"{field}_id" for field in _OUTPUTS)},
+    {", ".join(USAGE_FIELDS)}
+FROM results
+{" ".join(f"JOIN strings AS {field} ON {field}.id = results.{field}" for field in _INTERNED)}
+ORDER BY results.id
+"""
+
+_SELECT_VERDICTS = f"""
+SELECT network.value, property.value, timeout, verifier.value, config.value, result
+FROM results
+{" ".join(f"JOIN strings AS {field} ON {field}.id = results.{field}" for field in _INTERNED)}
+"""
+
+
+class ResultsStore:
+    """Results of verification runs, in a SQLite database.
+
+    Appended results are buffered, and written once `batch_size` results
+    are buffered or the oldest buffered result is `flush_interval` seconds
+    old. Use the store as a context manager, or call `close`, to write the
+    last batch.
+
+    Attributes:
+        path: The database file.
+        output_dir: Directory of the side files with the tool output.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SEC,
+    ):
+        """Open the store, creating it if it does not exist yet.
+
+        Args:
+            path: The database file.
+            batch_size: Number of results that are written at once.
+            flush_interval: Seconds a result is buffered at most, checked
+                whenever a result is appended.
+        """
+        self.path = path.expanduser()
+        self.output_dir = self.path.with_name(self.path.name + ".outputs")
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._pending: list[VerificationDataResult] = []
+        self._pending_t = 0.0
+        self._string_ids: dict[str, int] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=_BUSY_TIMEOUT_SEC, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> ResultsStore:
+        """Use the store, it is closed on exit."""
+        return self
+
+    def __exit__(self, *_: Any):
+        """Write the last batch and close the store."""
+        self.close()
+
+    def append(self, result: VerificationDataResult):
+        """Add a result, it is written with the next batch."""
+        with self._lock:
+            if not self._pending:
+                self._pending_t = time.monotonic()
+
+            self._pending.append(result)
+            full = len(self._pending) >= self._batch_size
+            stale = time.monotonic() - self._pending_t >= self._flush_interval
+
+        if full or stale:
+            self.flush()
+
+    def extend(self, results: Iterable[VerificationDataResult]):
+        """Add several results, see `append`."""
+        for result in results:
+            self.append(result)
+
+    def flush(self):
+        """Write the buffered results, in a single transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+            if not pending:
+                return
+
+            try:
+                # Outputs are written first, so no row references a missing file
+                outputs = [[self._put_output(getattr(result, field)) for field in _OUTPUTS] for result in pending]
+
+                with self._conn:
+                    # Take the write lock right away, waiting for other processes
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    rows = [self._row(result, ids) for result, ids in zip(pending, outputs, strict=True)]
+                    self._conn.executemany(_INSERT, rows)
+            except BaseException:
+                # Strings interned in the rolled back transaction are gone
+                self._string_ids.clear()
+                self._pending = pending + self._pending
+                raise
+
+    def close(self):
+        """Write the buffered results and close the database."""
+        self.flush()
+        self._conn.close()
+
+    def __len__(self) -> int:
+        """Number of results that were appended."""
+        self.flush()
+        return int(self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0])
+
+    def load(self, *, with_output: bool = False) -> pd.DataFrame:
+        """All the results that were appended, as a DataFrame.
+
+        The columns are the fields of `VerificationDataResult`, the interned
+        ones as categoricals. Instead of the output, counter example and
+        errors, the IDs of their side files are loaded (`stdout_id` etc.),
+        see `read_output`.
+
+        Args:
+            with_output: Also read the side files, into the columns
+                `counter_example`, `stderr` and `stdout`. This reads a file
+                per output, so it is a lot slower.
+        """
+        self.flush()
+        df = pd.read_sql_query(_SELECT, self._conn, index_col="id")
+
+        for field in _INTERNED:
+            df[field] = df[field].astype("category")
+
+        if with_output:
+            for field in _OUTPUTS:
+                df[field] = df[f"{field}_id"].map(self.read_output, na_action="ignore")
+
+        return df
+
+    def verdicts(self) -> dict[ResultKey, VerificationResultString]:
+        """The result string of every (network, property, timeout, verifier, config)."""
+        self.flush()
+        verdicts: dict[ResultKey, VerificationResultString] = {}
+
+        for *key, result in self._conn.execute(_SELECT_VERDICTS):
+            verdicts[verification_result_key(*key)] = result
+
+        return verdicts
+
+    def iter_results(self) -> Iterator[VerificationDataResult]:
+        """The results that were appended, with their output."""
+        self.flush()
+        cursor = self._conn.execute(_SELECT)
+        names = [column[0] for column in cursor.description]
+
+        for row in cursor:
+            values = dict(zip(names, row, strict=True))
+            del values["id"]
+
+            for field in _OUTPUTS:
+                values[field] = self.read_output(values.pop(f"{field}_id"))
+
+            yield VerificationDataResult(**values)
+
+    def read_output(self, output_id: str | None) -> str | None:
+        """Read the side file with the given ID."""
+        if output_id is None:
+            return None
+
+        with gzip.open(self._output_path(output_id), "rt") as f:
+            return f.read()
+
+    def export_csv(self, csv_path: Path):
+        """Write all results to a csv, with their output."""
+        init_verification_result_csv(csv_path)
+
+        with open(str(csv_path.expanduser()), "a") as csv_file:
+            writer = csv.writer(csv_file)
+
+            for result in self.iter_results():
+                writer.writerow(result.as_csv_row())
+
+    def export_parquet(self, parquet_path: Path, *, with_output: bool = False):
+        """Write all results to a parquet file, requires `pyarrow`.
+
+        Args:
+            parquet_path: The file to write to.
+            with_output: Include the output, see `load`.
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as err:
+            raise ImportError("Exporting to parquet requires pyarrow. Install with: pip install pyarrow") from err
+
+        self.load(with_output=with_output).to_parquet(parquet_path)
+
+    def import_csv(self, csv_path: Path):
+        """Append the results of a results csv, e.g. to migrate it.
+
+        Rows that are incomplete, such as a torn last row, are skipped.
+        """
+        n_fields = len(get_dataclass_field_names(VerificationDataResult))
+
+        with open(str(csv_path.expanduser()), newline="") as csv_file:
+            reader = verification_result_csv_reader(csv_file)
+            next(reader, None)
+
+            self.extend(VerificationDataResult.from_csv_row(row) for row in reader if len(row) == n_fields)
+
+        self.flush()
+
+    def _row(self, result: VerificationDataResult, output_ids: list[str | None]) -> tuple[Any, ...]:
+        return (
+            self._intern(str(result.network)),
+            self._intern(str(result.property)),
+            None if result.timeout is None else int(result.timeout),
+            self._intern(result.verifier),
+            self._intern(str(result.config)),
+            result.success,
+            result.result,
+            float(result.took),
+            *output_ids,
+            *(getattr(result, field) for field in USAGE_FIELDS),
+        )
+
+    def _intern(self, value: str) -> int:
+        """ID of a string, must be called in a transaction."""
+        if value not in self._string_ids:
+            self._conn.execute("INSERT OR IGNORE INTO strings (value) VALUES (?)", (value,))
+            (self._string_ids[value],) = self._conn.execute(
+                "SELECT id FROM strings WHERE value = ?",
+                (value,),
+            ).fetchone()
+
+        return self._string_ids[value]
+
+    def _put_output(self, output: str | tuple[str, str] | None) -> str | None:
+        if not output:
+            return None
+
+        if isinstance(output, tuple):
+            output = "\n".join(output)
+
+        output_id = hashlib.sha256(output.encode()).hexdigest()
+        path = self._output_path(output_id)
+
+        if path.exists():
+            return output_id
+
+        # Other processes may write the same output at the same time
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp", suffix=".gz")
+
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt") as f:
+                f.write(output)
+
+            os.replace(tmp_name, path)
+        finally:
+            with suppress(FileNotFoundError):
+                os.unlink(tmp_name)
+
+        return output_id
+
+    def _output_path(self, output_id: str) -> Path:
+        # Spread the files over subdirectories, a directory per file is slow
+        return self.output_dir / output_id[:2] / f"{output_id}.gz"
@@ -3,17 +3,27 @@
 import copy
 import csv
 import json
-from collections.abc import Sequence
+import time
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import asdict
 from pathlib import Path
 from typing import Any
 
-from smac import RunHistory, Scenario
+from ConfigSpace import Configuration
+from smac import AlgorithmConfigurationFacade, MultiFidelityFacade, RunHistory, Scenario
+from smac.facade.abstract_facade import AbstractFacade
+from smac.runhistory import StatusType, TrialInfo
 from smac.runhistory.dataclasses import TrialKey, TrialValue
+from smac.runner.abstract_runner import AbstractRunner
 
 from autoverify.util.dataclass import get_dataclass_field_names
 from autoverify.util.verification_instance import VerificationInstance
 
+_trial_allocation: ContextVar[tuple[int, int, int] | None] = ContextVar("trial_allocation", default=None)
+
 
 def get_smac_run_data(run_folder: Path) -> dict[str, Any]:
     """Get some data about from the SMAC logs."""
@@ -93,3 +103,263 @@ def runhistory_to_csv(rh: RunHistory, csv_path: Path):
             row_dict = asdict(trial_info)
             row_dict.update(asdict(trial_value))
             writer.writerow(row_dict)
+
+
+def current_trial_allocation() -> tuple[int, int, int] | None:
+    """The allocation of the trial that is running, see `PinnedParallelRunner`.
+
+    Target functions use this to run their verifier on the cores and GPU of
+    the trial, it is `None` outside of a `PinnedParallelRunner`.
+    """
+    return _trial_allocation.get()
+
+
+class PinnedParallelRunner(AbstractRunner):
+    """Runs SMAC trials at the same time, each on its own cores and GPU.
+
+    Every allocation runs one trial at a time, so as many trials run at the
+    same time as there are allocations. SMAC asks for the next trial while
+    the others are running and waits for a free allocation before it is
+    submitted. Use `split_node` to get disjoint allocations.
+
+    While a trial runs, `current_trial_allocation` returns its allocation.
+    Target functions must pass it on to their verifier, otherwise the trials
+    all run on the same cores.
+    """
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        target_function: Callable[..., Any],
+        allocations: Sequence[tuple[int, int, int]],
+    ):
+        """New instance, pass it to a facade instead of the target function.
+
+        Arguments:
+            scenario: The scenario of the facade.
+            target_function: Called with the config and the `seed`,
+                `instance` and `budget` keyword arguments SMAC uses, returns
+                the cost of the trial and optionally its additional info.
+            allocations: The (first core, last core, GPU or -1) of every
+                trial that runs at the same time.
+        """
+        required_arguments = ["seed"]
+
+        if scenario.instances is not None:
+            required_arguments.append("instance")
+
+        if scenario.min_budget is not None:
+            required_arguments.append("budget")
+
+        super().__init__(scenario, required_arguments=required_arguments)
+        self._target_function = target_function
+        self._allocations = list(allocations)
+        self._free = list(reversed(self._allocations))
+        self._pending: dict[Future[tuple[TrialInfo, TrialValue]], tuple[int, int, int]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=len(self._allocations))
+
+    @property
+    def meta(self) -> dict[str, Any]:
+        """Returns the meta-data of the created object."""
+        return {**super().meta, "allocations": self._allocations}
+
+    def submit_trial(self, trial_info: TrialInfo):
+        """Run the trial on a free allocation, waiting for one if needed."""
+        self._collect()
+
+        while not self._free:
+            self.wait()
+            self._collect()
+
+        allocation = self._free.pop()
+        future = self._executor.submit(self._run_trial, trial_info, allocation)
+        self._pending[future] = allocation
+
+    def run(
+        self,
+        config: Configuration,
+        instance: str | None = None,
+        budget: float | None = None,
+        seed: int | None = None,
+    ) -> tuple[StatusType, float, float, dict[str, Any]]:
+        """Call the target function, `run_wrapper` handles its exceptions."""
+        kwargs: dict[str, Any] = {"seed": seed, "instance": instance, "budget": budget}
+        kwargs = {key: kwargs[key] for key in self._required_arguments}
+
+        start = time.time()
+        rval = self._target_function(config, **kwargs)
+        cost, additional_info = rval if isinstance(rval, tuple) else (rval, {})
+
+        return StatusType.SUCCESS, float(cost), time.time() - start, additional_info
+
+    def iter_results(self) -> Iterator[tuple[TrialInfo, TrialValue]]:
+        """The trials that finished since the last call."""
+        self._collect()
+
+        while self._results_queue:
+            yield self._results_queue.pop(0)
+
+    def wait(self):
+        """Wait until a running trial finished."""
+        if self._pending:
+            wait(self._pending, return_when=FIRST_COMPLETED)
+
+    def is_running(self) -> bool:
+        """If any trial is still running."""
+        return len(self._pending) > 0
+
+    def count_available_workers(self) -> int:
+        """Number of allocations without a running trial."""
+        return len(self._free) + sum(future.done() for future in self._pending)
+
+    def close(self):
+        """Wait for the running trials and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    def _run_trial(self, trial_info: TrialInfo, allocation: tuple[int, int, int]) -> tuple[TrialInfo, TrialValue]:
+        token = _trial_allocation.set(allocation)
+
+        try:
+            return self.run_wrapper(trial_info)
+        finally:
+            _trial_allocation.reset(token)
+
+    def _collect(self):
+        for future in [future for future in self._pending if future.done()]:
+            self._free.append(self._pending.pop(future))
+            self._results_queue.append(future.result())
+
+
+@contextmanager
+def smac_target(
+    scenario: Scenario,
+    target_function: Callable[..., Any],
+    allocations: Sequence[tuple[int, int, int]] | None = None,
+) -> Iterator[Callable[..., Any] | PinnedParallelRunner]:
+    """What to pass to a facade as its target function.
+
+    The runner is closed when the context exits, so optimize the facade
+    within the context.
+
+    Arguments:
+        scenario: The scenario of the facade.
+        target_function: The target function of the trials.
+        allocations: The allocations of the trials, see
+            `PinnedParallelRunner`. With fewer than 2, the trials run one
+            after the other, like SMAC does by default. With exactly 1,
+            they run in its allocation (see `current_trial_allocation`).
+    """
+    if not allocations:
+        yield target_function
+        return
+
+    if len(allocations) == 1:
+        token = _trial_allocation.set(allocations[0])
+
+        try:
+            yield target_function
+        finally:
+            _trial_allocation.reset(token)
+
+        return
+
+    runner = PinnedParallelRunner(scenario, target_function, allocations)
+
+    try:
+        yield runner
+    finally:
+        runner.close()
+
+
+def get_facade(
+    scenario: Scenario,
+    target: Callable[..., Any] | AbstractRunner,
+    *,
+    eta: int = 3,
+    overwrite: bool = True,
+) -> AbstractFacade:
+    """The facade to tune with, multi-fidelity if the scenario has budgets.
+
+    Arguments:
+        scenario: The scenario, with instances or with a `min_budget` and
+            `max_budget`.
+        target: The target function, see `smac_target`.
+        eta: Only the best `1 / eta` of the configs of a stage of
+            successive halving are run with the budget of the next stage.
+        overwrite: Start over if the output directory has an earlier run
+            of the scenario. Only pass `False` if `can_continue` is `True`.
+    """
+    if scenario.min_budget is None:
+        return AlgorithmConfigurationFacade(scenario, target, overwrite=overwrite)
+
+    # Configs are compared on the highest budget they were both run with
+    intensifier = MultiFidelityFacade.get_intensifier(scenario, eta=eta, incumbent_selection="highest_observed_budget")
+    return MultiFidelityFacade(scenario, target, intensifier=intensifier, overwrite=overwrite)
+
+
+def can_continue(scenario: Scenario) -> bool:
+    """If the output directory has an earlier run of the same scenario.
+
+    Facades created with `overwrite=False` continue such a run, with the
+    trials and the walltime it already used, and return its incumbent right
+    away if it had finished. If the earlier run has a different scenario,
+    SMAC would ask on stdin what to do, so only continue if this is `True`.
+    The meta data of the scenario is only set by the facade, so it is not
+    compared.
+    """
+    if not (scenario.output_directory / "scenario.json").is_file():
+        return False
+
+    try:
+        old_scenario = Scenario.load(scenario.output_directory)
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+    old = Scenario.make_serializable(old_scenario)
+    new = Scenario.make_serializable(scenario)
+    old.pop("_meta", None)
+    new.pop("_meta", None)
+
+    return old == new
+
+
+def expand_instance_costs(runhistory: RunHistory) -> RunHistory:
+    """A trial per instance, from the trials of a multi-fidelity target function.
+
+    See `get_multi_fidelity_tf`. Only the trials of a config with its
+    highest budget are used, lower budgets only add censored costs. The
+    instances that were censored get `{"censored": True}` as their
+    additional info. Trials without instance costs (e.g. crashes) are
+    left out.
+    """
+    highest_budget: dict[int, float] = {}
+
+    for trial_key, trial_value in runhistory.items():
+        if "instance_costs" in trial_value.additional_info:
+            budget = trial_key.budget or 0.0
+            highest_budget[trial_key.config_id] = max(highest_budget.get(trial_key.config_id, budget), budget)
+
+    expanded = RunHistory()
+
+    for trial_key, trial_value in runhistory.items():
+        info = trial_value.additional_info
+
+        if "instance_costs" not in info or (trial_key.budget or 0.0) != highest_budget[trial_key.config_id]:
+            continue
+
+        config = runhistory.get_config(trial_key.config_id)
+
+        for instance, cost in info["instance_costs"].items():
+            expanded.add(
+                config,
+                cost,
+                status=trial_value.status,
+                instance=instance,
+                seed=trial_key.seed,
+                budget=trial_key.budget,
+                starttime=trial_value.starttime,
+                endtime=trial_value.endtime,
+                additional_info={"censored": instance in info["censored"]},
+            )
+
+    return expanded
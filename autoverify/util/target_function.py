@@ -1,10 +1,15 @@
 """_summary_."""
 
+import math
+from collections.abc import Callable, Sequence
+from contextvars import ContextVar
 from pathlib import Path
 
+import numpy as np
 from ConfigSpace import Configuration
 
-from autoverify.types import Cost, Instance, Seed, TargetFunction
+from autoverify.types import Cost, CostWithInfo, Instance, Seed, TargetFunction
+from autoverify.util.smac import current_trial_allocation
 from autoverify.util.verification_instance import VerificationInstance
 from autoverify.util.vnncomp import inst_bench_to_verifier
 from autoverify.verifier.verification_result import CompleteVerificationResult
@@ -14,11 +19,22 @@ from autoverify.verifier.verifier import CompleteVerifier, Verifier
 # If an instance times out, its cost becomes cost * PAR
 _DEFAULT_PAR = 10
 
+# Cap of the cost of an instance, `None` if it is not capped
+CapFunction = Callable[[Instance], float | None]
+
+MultiFidelityTargetFunction = Callable[[Configuration, Seed, float], CostWithInfo]
+
+# Fraction of the instance timeouts of the running multi-fidelity trial
+_trial_budget: ContextVar[float | None] = ContextVar("trial_budget", default=None)
+
 
 def _run_verification_instance(
     verifier: CompleteVerifier,
     config: Configuration | Path | None,
     instance: Instance | VerificationInstance,
+    *,
+    cap: float | None = None,
+    budget: float | None = None,
 ) -> CompleteVerificationResult:
     """Run an instance and report the result and time taken.
 
@@ -26,6 +42,10 @@ def _run_verification_instance(
         verifier: CompleteVerifier to run.
         config: Config to use during verification.
         instance: Instance to run.
+        cap: Cost above which the exact cost does not matter. The run is
+            stopped once its time reaches the cap, if that is before the
+            timeout of the instance.
+        budget: Fraction of the timeout of the instance the run gets.
 
     Returns:
         CompleteVerificationResult: Outcome of the verification.
@@ -36,17 +56,29 @@ def _run_verification_instance(
     # FIXME: What if there are commas in the net or prop name?
     # This problem occurs in multiple parts where we work with SMAC instances
     network, property, timeout = instance.split(",")
+    run_timeout = int(timeout)
+
+    if cap is not None:
+        run_timeout = min(run_timeout, max(1, math.ceil(cap)))
+
+    if budget is not None:
+        run_timeout = min(run_timeout, _budget_timeout(int(timeout), budget))
 
     result = verifier.verify_property(
         Path(network),
         Path(property),
         config=config,
-        timeout=int(timeout),
+        timeout=run_timeout,
     )
 
     return result
 
 
+def _budget_timeout(timeout: int, budget: float) -> int:
+    """Timeout of a run that gets `budget` times the timeout of its instance."""
+    return max(1, math.ceil(budget * timeout))
+
+
 def _process_target_function_result(
     result: CompleteVerificationResult,
     timeout_penalty: int,
@@ -64,36 +96,110 @@ def _process_target_function_result(
     # sets the cost to infinite if an exception is raised in the target_function
     verification_result = result.unwrap_or_raise(Exception)
 
-    if verification_result.result == "TIMEOUT":
+    if verification_result.result in ("TIMEOUT", "MEMOUT"):
         verification_result.took *= timeout_penalty
 
     return float(verification_result.took)
 
 
+def _apply_cap(cost: Cost, cap: float | None) -> CostWithInfo:
+    """Cap the cost, noting in the additional info if it was capped.
+
+    A capped cost is a lower bound of the real cost, which is at least the
+    cap.
+    """
+    if cap is not None and cost >= cap:
+        return float(cap), {"capped": True}
+
+    return cost, {"capped": False}
+
+
+def _instance_cost(
+    verifier: CompleteVerifier,
+    config: Configuration,
+    instance: Instance,
+    *,
+    cap: CapFunction | None,
+    timeout_penalty: int,
+) -> Cost | CostWithInfo:
+    """Cost of a target function run, with the cap and budget applied.
+
+    Within a multi-fidelity trial (see `get_multi_fidelity_tf`), runs that
+    time out before the timeout of the instance have a censored cost, which
+    is noted in the additional info. Such a run did not time out on the
+    instance, so its cost is the time it took, without the PAR penalty.
+    """
+    budget = _trial_budget.get()
+    instance_cap = cap(instance) if cap is not None else None
+
+    result = _run_verification_instance(verifier, config, instance, cap=instance_cap, budget=budget)
+    timeout = int(instance.split(",")[-1])
+    censored = (
+        budget is not None
+        and _budget_timeout(timeout, budget) < timeout
+        and result.is_ok()
+        and result.unwrap().result == "TIMEOUT"
+    )
+    cost = _process_target_function_result(result, 1 if censored else timeout_penalty)
+
+    if cap is None and budget is None:
+        return cost
+
+    cost, info = _apply_cap(cost, instance_cap)
+
+    if budget is not None:
+        info["censored"] = censored
+
+    return cost, info
+
+
 def get_vnn_verifier_tf(
     verifier: str,
     benchmark: str,
     *,
     timeout_penalty: int = _DEFAULT_PAR,
+    cap: CapFunction | None = None,
 ) -> TargetFunction:
-    """Get a tf for a vnncomp benchmark from a name."""
+    """Get a tf for a vnncomp benchmark from a name.
 
-    def target_function(config: Configuration, instance: Instance, seed: Seed) -> Cost:
+    See `get_verifier_tf` for the `cap` argument.
+    """
+
+    def target_function(config: Configuration, instance: Instance, seed: Seed) -> Cost | CostWithInfo:
         """_summary_."""
         seed += 1  # silence warning, cant rename the param to _ or smac errors
 
-        verifier_inst = inst_bench_to_verifier(benchmark, VerificationInstance.from_str(instance), verifier)
+        verifier_inst = inst_bench_to_verifier(
+            benchmark,
+            VerificationInstance.from_str(instance),
+            verifier,
+            current_trial_allocation(),
+        )
 
-        result = _run_verification_instance(verifier_inst, config, instance)
-        return _process_target_function_result(result, timeout_penalty)
+        return _instance_cost(verifier_inst, config, instance, cap=cap, timeout_penalty=timeout_penalty)
 
     return target_function
 
 
-def get_verifier_tf(verifier: Verifier, *, timeout_penalty: int = _DEFAULT_PAR) -> TargetFunction:
-    """Get a target function to use in SMAC for a verifier."""
+def get_verifier_tf(
+    verifier: Verifier,
+    *,
+    timeout_penalty: int = _DEFAULT_PAR,
+    cap: CapFunction | None = None,
+) -> TargetFunction:
+    """Get a target function to use in SMAC for a verifier.
+
+    Args:
+        verifier: The verifier to run.
+        timeout_penalty: PAR score.
+        cap: Gives the cap of the cost of an instance (adaptive capping).
+            Costs above the cap are reported as the cap, and the run is
+            stopped once it reaches the cap. With a cap, the target function
+            returns the cost and `{"capped": bool}`, which SMAC stores as
+            the additional info of the trial.
+    """
 
-    def target_function(config: Configuration, instance: Instance, seed: Seed) -> Cost:
+    def target_function(config: Configuration, instance: Instance, seed: Seed) -> Cost | CostWithInfo:
         """_summary_."""
         seed += 1  # silence warning, cant rename the param to _ or smac errors
 
@@ -101,7 +207,50 @@ def get_verifier_tf(verifier: Verifier, *, timeout_penalty: int = _DEFAULT_PAR)
         # So why arent we saying verifier: CompleteVerifier
         assert isinstance(verifier, CompleteVerifier)
 
-        result = _run_verification_instance(verifier, config, instance)
-        return _process_target_function_result(result, timeout_penalty)
+        # Trials that run in parallel each get their own cores
+        allocation = current_trial_allocation()
+        trial_verifier = verifier if allocation is None else verifier.with_allocation(allocation)
+        assert isinstance(trial_verifier, CompleteVerifier)
+
+        return _instance_cost(trial_verifier, config, instance, cap=cap, timeout_penalty=timeout_penalty)
 
     return target_function
+
+
+def get_multi_fidelity_tf(
+    target_function: TargetFunction,
+    instances: Sequence[Instance],
+) -> MultiFidelityTargetFunction:
+    """Get a multi-fidelity target function, the budget is a fraction of the timeouts.
+
+    The returned target function runs a config on all the instances, with
+    the target function of a single instance (e.g. from `get_verifier_tf`),
+    but stops every run after `budget` times the timeout of its instance.
+    Use it with the `MultiFidelityFacade` and budgets in (0, 1].
+
+    The cost of a trial is the mean cost over the instances. The cost of
+    every instance is stored in the additional info (`instance_costs`),
+    together with the instances that timed out early and thus only have a
+    lower bound of their cost (`censored`). See `expand_instance_costs`.
+    """
+
+    def target_function_mf(config: Configuration, seed: Seed, budget: float) -> CostWithInfo:
+        instance_costs: dict[str, float] = {}
+        censored: list[str] = []
+        token = _trial_budget.set(budget)
+
+        try:
+            for instance in instances:
+                rval = target_function(config, instance, seed)
+                cost, info = rval if isinstance(rval, tuple) else (rval, {})
+                instance_costs[instance] = float(cost)
+
+                if info.get("censored") or info.get("capped"):
+                    censored.append(instance)
+        finally:
+            _trial_budget.reset(token)
+
+        mean_cost = float(np.mean(list(instance_costs.values())))
+        return mean_cost, {"instance_costs": instance_costs, "censored": censored}
+
+    return target_function_mf
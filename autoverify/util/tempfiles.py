@@ -1,15 +1,39 @@
-"""YAML file utils."""
+"""Temporary files of verification runs.
+
+Files a run needs (configs, result files, instance CSVs) are created in the
+scratch workspace of the run, which is removed as soon as the result of the
+run was parsed. Configs written from a dict are stored once per content, in
+a store that evicts the least recently used configs. Both live on tmpfs
+(`/dev/shm`) when it is available.
+
+Files that are created outside of a run are removed at interpreter exit.
+"""
 
 import atexit
+import hashlib
 import json
+import logging
+import os
+import shutil
 import tempfile
-from contextlib import contextmanager
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
 from pathlib import Path
 from typing import IO, Any
 
 import yaml
 
+from autoverify.config import get_config
+
+logger = logging.getLogger(__name__)
+
+_SHM = Path("/dev/shm")
+DEFAULT_CONFIG_STORE_MAX_ENTRIES = 1024
+
 _tempfiles_to_clean: list[str] = []
+_current_workspace: ContextVar["RunWorkspace | None"] = ContextVar("current_workspace", default=None)
 
 
 def _reg_for_clean(f: str | Path):
@@ -24,49 +48,193 @@ def _cleanup_tempfiles():  # pragma: no cover
             p.unlink()
 
 
+def scratch_root() -> Path:
+    """Directory the workspaces and the config store are created in.
+
+    This is the `scratch_path` of the auto-verify config if set, otherwise
+    `/dev/shm` if it is writable and the system temp directory if not.
+    """
+    base = get_config().scratch_path
+
+    if base is None:
+        base = _SHM if _SHM.is_dir() and os.access(_SHM, os.W_OK) else Path(tempfile.gettempdir())
+
+    return base / f"autoverify-{os.getuid()}"
+
+
+class RunWorkspace:
+    """Scratch directory of a single run.
+
+    While the workspace is active (see `activate`), `tmp_file` and friends
+    create their files in it instead of the system temp directory.
+
+    Attributes:
+        path: The directory of the workspace.
+    """
+
+    def __init__(self, path: Path):
+        """Use an existing directory, see `RunWorkspace.create` to make one."""
+        self.path = path
+
+    @classmethod
+    def create(cls, name: str) -> "RunWorkspace":
+        """Create a new, empty workspace for a run of the named verifier."""
+        runs_dir = scratch_root() / "runs"
+        runs_dir.mkdir(parents=True, exist_ok=True)
+
+        return cls(Path(tempfile.mkdtemp(dir=runs_dir, prefix=f"{name}-")))
+
+    @contextmanager
+    def activate(self) -> Iterator["RunWorkspace"]:
+        """Create temporary files in this workspace, in the current context."""
+        token = _current_workspace.set(self)
+
+        try:
+            yield self
+        finally:
+            _current_workspace.reset(token)
+
+    def close(self):
+        """Remove the workspace, or archive it if `keep_workspaces_path` is set."""
+        archive_dir = get_config().keep_workspaces_path
+
+        if archive_dir is not None:
+            try:
+                archive_dir.mkdir(parents=True, exist_ok=True)
+                shutil.move(self.path, archive_dir / self.path.name)
+                return
+            except OSError as err:
+                logger.warning(f"Could not archive workspace {self.path}: {err}")
+
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def current_workspace() -> RunWorkspace | None:
+    """The workspace temporary files are currently created in, if any."""
+    return _current_workspace.get()
+
+
 @contextmanager
-def tmp_file(extension: str) -> IO[str]:
+def tmp_file(extension: str) -> Iterator[IO[str]]:
     """Return a new tempfile with the given extension."""
-    f = tempfile.NamedTemporaryFile("w", suffix=extension, delete=False)  # noqa: SIM115
-    _reg_for_clean(f.name)
+    workspace = current_workspace()
+
+    if workspace is not None:
+        f = tempfile.NamedTemporaryFile("w", suffix=extension, dir=workspace.path, delete=False)  # noqa: SIM115
+    else:
+        f = tempfile.NamedTemporaryFile("w", suffix=extension, delete=False)  # noqa: SIM115
+        _reg_for_clean(f.name)
+
     try:
         yield f
     finally:
         f.close()
 
 
-# TODO: Just make a function that returns a tempfile with extension as param
 @contextmanager
-def tmp_json_file() -> IO[str]:
-    """Returns a new temporary named empty yaml file."""
-    f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)  # noqa: SIM115
-    _reg_for_clean(f.name)
-    try:
+def tmp_json_file() -> Iterator[IO[str]]:
+    """Returns a new temporary named empty json file."""
+    with tmp_file(".json") as f:
         yield f
-    finally:
-        f.close()
 
 
 def tmp_json_file_from_dict(a_dict: dict[Any, Any]) -> str:
-    """Returns a new temporary named json file with the dict written to it."""
-    with tmp_json_file() as tmp_json:
-        json.dump(a_dict, tmp_json)
-        return tmp_json.name
+    """Returns a named json file with the dict written to it.
+
+    The file is shared by all identical dicts, see `ConfigStore`.
+    """
+    return str(get_config_store().put(json.dumps(a_dict), ".json"))
 
 
 @contextmanager
-def tmp_yaml_file() -> IO[str]:
+def tmp_yaml_file() -> Iterator[IO[str]]:
     """Returns a new temporary named empty yaml file."""
-    f = tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False)  # noqa: SIM115
-    _reg_for_clean(f.name)
-    try:
+    with tmp_file(".yaml") as f:
         yield f
-    finally:
-        f.close()
 
 
 def tmp_yaml_file_from_dict(a_dict: dict[Any, Any]) -> str:
-    """Returns a new temporary named yaml file with the dict written to it."""
-    with tmp_yaml_file() as tmp_yaml:
-        yaml.dump(a_dict, tmp_yaml)
-        return tmp_yaml.name
+    """Returns a named yaml file with the dict written to it.
+
+    The file is shared by all identical dicts, see `ConfigStore`.
+    """
+    return str(get_config_store().put(yaml.dump(a_dict), ".yaml"))
+
+
+class ConfigStore:
+    """Materialized config files, stored once per content.
+
+    Tuning runs the same configurations on many instances and the same
+    instances with many configurations, so identical config files are
+    written over and over. The store names files after the hash of their
+    contents and only writes a file if it is not stored yet. Once there are
+    more than `max_entries` files, the least recently used ones are removed.
+    """
+
+    def __init__(self, directory: Path, *, max_entries: int = DEFAULT_CONFIG_STORE_MAX_ENTRIES):
+        """New instance.
+
+        Args:
+            directory: Directory the config files are stored in.
+            max_entries: Number of files that are kept.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def put(self, content: str, suffix: str) -> Path:
+        """Return the path of a file with the content, writing it if needed."""
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        path = self.directory / f"{digest}{suffix}"
+
+        try:
+            # Reading marks the entry as recently used
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=".tmp", suffix=suffix)
+
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+
+        os.replace(tmp_name, path)
+        self._evict()
+
+        return path
+
+    def _evict(self):
+        entries: list[tuple[float, Path]] = []
+
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".tmp"):
+                continue
+
+            with suppress(FileNotFoundError):
+                entries.append((entry.stat().st_mtime, Path(entry.path)))
+
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort()
+
+        for _, path in entries[: len(entries) - self.max_entries]:
+            with suppress(FileNotFoundError):
+                path.unlink()
+
+
+_config_store: ConfigStore | None = None
+_config_store_lock = threading.Lock()
+
+
+def get_config_store() -> ConfigStore:
+    """The config store in the scratch root, as configured in the auto-verify config."""
+    global _config_store
+    directory = scratch_root() / "configs"
+
+    with _config_store_lock:
+        if _config_store is None or _config_store.directory != directory:
+            _config_store = ConfigStore(directory, max_entries=get_config().config_store_max_entries)
+
+        return _config_store
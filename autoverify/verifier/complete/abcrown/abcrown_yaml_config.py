@@ -7,7 +7,7 @@ import yaml
 from ConfigSpace import Configuration
 
 from autoverify.util.dict import nested_set
-from autoverify.util.tempfiles import tmp_yaml_file, tmp_yaml_file_from_dict
+from autoverify.util.tempfiles import tmp_yaml_file_from_dict
 
 
 class AbcrownYamlConfig:
@@ -43,9 +43,7 @@ class AbcrownYamlConfig:
             for k, v in yaml_override.items():
                 nested_set(abcrown_dict, k.split("__"), v)
 
-        with tmp_yaml_file() as new_yaml_file:
-            yaml.dump(abcrown_dict, new_yaml_file)
-            return cls(new_yaml_file)
+        return cls(tmp_yaml_file_from_dict(abcrown_dict))
 
     @classmethod
     def from_config(
@@ -1,6 +1,7 @@
 """Ab-crown verifier."""
 
-from collections.abc import Iterable
+import csv
+import re
 from contextlib import AbstractContextManager
 from pathlib import Path
 from typing import Any
@@ -9,25 +10,28 @@ from ConfigSpace import Configuration, ConfigurationSpace
 
 from autoverify import DEFAULT_VERIFICATION_TIMEOUT_SEC
 from autoverify.util import find_substring
-from autoverify.util.conda import get_conda_path, get_conda_source_cmd
-from autoverify.util.env import cwd, pkill_matches
 from autoverify.util.tempfiles import tmp_file
+from autoverify.util.verification_instance import VerificationInstance
 from autoverify.verifier.complete.abcrown.abcrown_yaml_config import (
     AbcrownYamlConfig,
 )
 from autoverify.verifier.complete.abcrown.configspace import AbCrownConfigspace
 from autoverify.verifier.verification_result import (
-    CompleteVerificationResult,
+    CompleteVerificationData,
     VerificationResultString,
 )
 from autoverify.verifier.verifier import CompleteVerifier
 
+# Printed by abcrown before it verifies row `idx` of an instance CSV
+_INSTANCE_BANNER = re.compile(r"%+ idx: (\d+), vnnlib ID: \d+ %+")
+
 
 class AbCrown(CompleteVerifier):
     """AB-Crown."""
 
     name: str = "abcrown"
     config_space: ConfigurationSpace = AbCrownConfigspace
+    _warm_preload = ("torch", "abcrown")
 
     def __init__(
         self,
@@ -42,12 +46,20 @@ class AbCrown(CompleteVerifier):
         super().__init__(batch_size, cpu_gpu_allocation)
         self._yaml_override = yaml_override
 
+    def get_init_attributes(self) -> dict[str, Any]:
+        return {**super().get_init_attributes(), "yaml_override": self._yaml_override}
+
     @property
-    def contexts(self) -> list[AbstractContextManager[None]]:
-        return [
-            cwd(self.tool_path / "complete_verifier"),
-            pkill_matches(["python abcrown.py"]),
-        ]
+    def working_dir(self) -> Path:
+        return self.tool_path / "complete_verifier"
+
+    @property
+    def contexts(self) -> list[AbstractContextManager[None]] | None:
+        return None
+
+    def _detect_verdict(self, line: str) -> VerificationResultString | None:
+        # A counter example may still be written after "Result: sat"
+        return "UNSAT" if find_substring("Result: unsat", line) else None
 
     def _parse_result(
         self,
@@ -55,8 +67,12 @@ class AbCrown(CompleteVerifier):
         result_file: Path | None,
     ) -> tuple[VerificationResultString, str | None]:
         if find_substring("Result: sat", output):
-            with open(str(result_file)) as f:
-                counter_example = f.read()
+            counter_example = None
+
+            # In batch mode there is no result file per instance
+            if result_file is not None:
+                with open(str(result_file)) as f:
+                    counter_example = f.read()
 
             return "SAT", counter_example
         elif find_substring("Result: unsat", output):
@@ -73,42 +89,80 @@ class AbCrown(CompleteVerifier):
         *,
         config: Path,
         timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
-    ) -> tuple[str, Path | None]:
+    ) -> tuple[list[str], Path | None]:
         with tmp_file(".txt") as tmp:
             result_file = Path(tmp.name)
-        source_cmd = get_conda_source_cmd(get_conda_path())
 
-        run_cmd = f"""
-        {" ".join(source_cmd)}
-        conda activate {self.conda_env_name}
-        python abcrown.py --config {str(config)} \
-        --results_file {str(result_file)} \
-        --timeout {str(timeout)}
-        """
+        run_args = [
+            "abcrown.py",
+            "--config",
+            str(config),
+            "--results_file",
+            str(result_file),
+            "--timeout",
+            str(timeout),
+        ]
 
-        return run_cmd, result_file
+        return run_args, result_file
 
-    def _verify_batch(
+    def _verify_network_batch(
         self,
-        instances: Iterable[Any],
+        network: Path,
+        instances: list[VerificationInstance],
         *,
-        config: Configuration | Path | None,
-    ) -> list[CompleteVerificationResult]:
-        raise NotImplementedError("Batch verification not supported yet")
+        config: Configuration | Path,
+    ) -> list[CompleteVerificationData | None]:
+        # abcrown verifies all rows of an instance CSV in a single process
+        with tmp_file(".csv") as instances_csv:
+            writer = csv.writer(instances_csv)
+
+            for instance in instances:
+                writer.writerow([str(instance.network), str(instance.property), instance.timeout])
+
+        tool_config = self._init_config(
+            network,
+            instances[0].property,
+            config,
+            csv_name=Path(instances_csv.name),
+        )
+
+        with tmp_file(".txt") as tmp:
+            result_file = Path(tmp.name)
+
+        run_args = [
+            "abcrown.py",
+            "--config",
+            str(tool_config),
+            "--results_file",
+            str(result_file),
+        ]
+
+        outcomes = self._run_batch(run_args, instances, banner=_INSTANCE_BANNER)
+
+        # The results file of a batch has no counter example per instance,
+        # so SAT instances are verified again on their own to get one
+        return [None if outcome is not None and outcome.result == "SAT" else outcome for outcome in outcomes]
 
     def _init_config(
         self,
         network: Path,
         property: Path,
         config: Configuration | Path,
+        *,
+        csv_name: Path | None = None,
     ) -> Path:
+        yaml_override = dict(self._yaml_override or {})
+
+        if csv_name is not None:
+            yaml_override["general__csv_name"] = str(csv_name)
+
         if isinstance(config, Configuration):
             yaml_config = AbcrownYamlConfig.from_config(
                 config,
                 network,
                 property,
                 batch_size=self._batch_size,
-                yaml_override=self._yaml_override,
+                yaml_override=yaml_override,
             )
         else:
             yaml_config = AbcrownYamlConfig.from_yaml(
@@ -116,7 +170,7 @@ class AbCrown(CompleteVerifier):
                 network,
                 property,
                 batch_size=self._batch_size,
-                yaml_override=self._yaml_override,
+                yaml_override=yaml_override,
             )
 
         return Path(yaml_config.get_yaml_file_path())
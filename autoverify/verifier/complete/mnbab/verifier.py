@@ -1,17 +1,14 @@
 """MNBaB verifier."""
 
-from collections.abc import Iterable
+import os
 from contextlib import AbstractContextManager
 from pathlib import Path
-from typing import Any
 
 from ConfigSpace import Configuration, ConfigurationSpace
 
 from autoverify import DEFAULT_VERIFICATION_TIMEOUT_SEC
-from autoverify.util.conda import get_conda_path, get_conda_source_cmd
-from autoverify.util.env import cwd, environment
 from autoverify.verifier.complete.mnbab.mnbab_json import MnbabJsonConfig
-from autoverify.verifier.verification_result import CompleteVerificationResult, VerificationResultString
+from autoverify.verifier.verification_result import VerificationResultString
 from autoverify.verifier.verifier import CompleteVerifier
 
 from .configspace import MnBabConfigspace
@@ -22,6 +19,7 @@ class MnBab(CompleteVerifier):
 
     name: str = "mnbab"
     config_space: ConfigurationSpace = MnBabConfigspace
+    _warm_preload = ("torch",)
 
     def __init__(self, batch_size: int = 512, cpu_gpu_allocation: tuple[int, int, int] | None = None):
         """Initialize MnBab verifier.
@@ -33,13 +31,15 @@ class MnBab(CompleteVerifier):
         super().__init__(batch_size=batch_size, cpu_gpu_allocation=cpu_gpu_allocation)
 
     @property
-    def contexts(self) -> list[AbstractContextManager[None]]:
-        env_lib_path = get_conda_path() / "envs" / self.conda_env_name / "lib"
+    def contexts(self) -> list[AbstractContextManager[None]] | None:
+        return None
 
-        return [
-            cwd(self.tool_path),
-            environment(LD_LIBRARY_PATH=str(env_lib_path)),
-        ]
+    @property
+    def launch_env(self) -> dict[str, str]:
+        return {
+            "LD_LIBRARY_PATH": str(self.conda_lib_path),
+            "PYTHONPATH": os.pathsep.join(filter(None, [os.getenv("PYTHONPATH"), str(self.tool_path)])),
+        }
 
     def _parse_result(
         self,
@@ -83,27 +83,27 @@ class MnBab(CompleteVerifier):
         *,
         config: Path,
         timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
-    ) -> tuple[str, Path | None]:
+    ) -> tuple[list[str], Path | None]:
         from autoverify.util.tempfiles import tmp_file
 
         with tmp_file(".txt") as tmp:
             result_file = Path(tmp.name)
 
-        source_cmd = get_conda_source_cmd(get_conda_path())
-
-        run_cmd = f"""
-        {" ".join(source_cmd)}
-        conda activate {self.conda_env_name}
-        export PYTHONPATH=$PYTHONPATH:$PWD
-        python src/utilities/prepare_instance.py \\
-        -b mnbabtest \\
-        -n {str(network)} \\
-        -s {str(property)} \\
-        -r {str(result_file)} \\
-        -t {timeout}
-        """
+        run_args = [
+            "src/utilities/prepare_instance.py",
+            "-b",
+            "mnbabtest",
+            "-n",
+            str(network),
+            "-s",
+            str(property),
+            "-r",
+            str(result_file),
+            "-t",
+            str(timeout),
+        ]
 
-        return run_cmd, result_file
+        return run_args, result_file
 
     def _init_config(
         self,
@@ -122,27 +122,6 @@ class MnBab(CompleteVerifier):
 
         return Path(json_config.get_json_file_path())
 
-    def _verify_batch(
-        self,
-        instances: Iterable[Any],
-        *,
-        config: Configuration | Path | None,
-    ) -> list[CompleteVerificationResult]:
-        """Verify a batch of instances.
-
-        Args:
-            instances: Iterable of verification instances
-            config: Configuration to use for verification
-
-        Returns:
-            List of verification results
-        """
-        results = []
-        for instance in instances:
-            result = self.verify_instance(instance, config=config)
-            results.append(result)
-        return results
-
     @staticmethod
     def is_same_config(config1: Configuration | str, config2: Configuration | str) -> bool:
         """Check if two configurations are the same.
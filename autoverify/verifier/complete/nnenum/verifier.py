@@ -1,7 +1,5 @@
 """Nnenum verifier."""
 
-import shlex
-from collections.abc import Iterable
 from contextlib import AbstractContextManager
 from multiprocessing import cpu_count
 from pathlib import Path
@@ -10,11 +8,8 @@ from typing import Any
 from ConfigSpace import Configuration, ConfigurationSpace
 
 from autoverify import DEFAULT_VERIFICATION_TIMEOUT_SEC
-from autoverify.util.conda import get_conda_path, get_conda_source_cmd
-from autoverify.util.env import cwd, environment, pkill_matches
 from autoverify.util.tempfiles import tmp_file
 from autoverify.verifier.verification_result import (
-    CompleteVerificationResult,
     VerificationResultString,
 )
 from autoverify.verifier.verifier import CompleteVerifier
@@ -27,6 +22,7 @@ class Nnenum(CompleteVerifier):
 
     name: str = "nnenum"
     config_space: ConfigurationSpace = NnenumConfigspace
+    _warm_preload = ("numpy", "nnenum")
 
     # HACK: Should not need to instantiate a whole new instance just to
     # change `_use_auto_settings`.
@@ -43,13 +39,20 @@ class Nnenum(CompleteVerifier):
         super().__init__(batch_size, cpu_gpu_allocation)
         self._use_auto_settings = use_auto_settings
 
+    def get_init_attributes(self) -> dict[str, Any]:
+        return {**super().get_init_attributes(), "use_auto_settings": self._use_auto_settings}
+
     @property
-    def contexts(self) -> list[AbstractContextManager[None]]:
-        return [
-            cwd(self.tool_path / "src"),
-            environment(OPENBLAS_NUM_THREADS="1", OMP_NUM_THREADS="1"),
-            pkill_matches(["python -m nnenum.nnenum"]),
-        ]
+    def working_dir(self) -> Path:
+        return self.tool_path / "src"
+
+    @property
+    def contexts(self) -> list[AbstractContextManager[None]] | None:
+        return None
+
+    @property
+    def launch_env(self) -> dict[str, str]:
+        return {"OPENBLAS_NUM_THREADS": "1", "OMP_NUM_THREADS": "1"}
 
     def _parse_result(self, _: str, result_file: Path | None) -> tuple[VerificationResultString, str | None]:
         with open(str(result_file)) as f:
@@ -77,10 +80,9 @@ class Nnenum(CompleteVerifier):
         *,
         config: dict[str, Any],
         timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
-    ) -> tuple[str, Path | None]:
+    ) -> tuple[list[str], Path | None]:
         with tmp_file(".txt") as tmp:
             result_file = Path(tmp.name)
-        source_cmd = get_conda_source_cmd(get_conda_path())
 
         # In nnenum, settings are normally passed as a one word string
         # over the CLI. This word then selects from some pre-defined settings.
@@ -93,25 +95,19 @@ class Nnenum(CompleteVerifier):
             settings_str = "auto"
             config = {}
 
-        run_cmd = f"""
-        {" ".join(source_cmd)}
-        conda activate {self.conda_env_name}
-        python -m nnenum.nnenum {str(network)} {str(property)} {str(timeout)} \
-        {str(result_file)} \
-        {str(cpu_count())} \
-        {settings_str} \
-        {shlex.quote(str(config))} \
-        """
-
-        return run_cmd, result_file
+        run_args = [
+            "-m",
+            "nnenum.nnenum",
+            str(network),
+            str(property),
+            str(timeout),
+            str(result_file),
+            str(cpu_count()),
+            settings_str,
+            str(config),
+        ]
 
-    def _verify_batch(
-        self,
-        instances: Iterable[Any],
-        *,
-        config: Configuration | Path | None,
-    ) -> list[CompleteVerificationResult]:
-        raise NotImplementedError("Batch verification not supported yet")
+        return run_args, result_file
 
     def _init_config(
         self,
@@ -1,26 +1,17 @@
 """OvalBab verifier."""
 
-from collections.abc import Iterable
 from contextlib import AbstractContextManager
 from pathlib import Path
-from typing import Any
 
 from ConfigSpace import Configuration, ConfigurationSpace
 
 from autoverify import DEFAULT_VERIFICATION_TIMEOUT_SEC
 from autoverify.util import find_substring
-from autoverify.util.conda import (
-    find_conda_lib,
-    get_conda_path,
-    get_conda_source_cmd,
-)
-from autoverify.util.env import cwd, environment, pkill_matches
 from autoverify.util.tempfiles import tmp_file
 from autoverify.verifier.complete.ovalbab.ovalbab_json_config import (
     OvalbabJsonConfig,
 )
 from autoverify.verifier.verification_result import (
-    CompleteVerificationResult,
     VerificationResultString,
 )
 from autoverify.verifier.verifier import CompleteVerifier
@@ -33,6 +24,7 @@ class OvalBab(CompleteVerifier):
 
     name: str = "ovalbab"
     config_space: ConfigurationSpace = OvalBabConfigspace
+    _warm_preload = ("torch",)
 
     def __init__(
         self,
@@ -45,12 +37,12 @@ class OvalBab(CompleteVerifier):
         super().__init__(batch_size, cpu_gpu_allocation)
 
     @property
-    def contexts(self) -> list[AbstractContextManager[None]]:
-        return [
-            cwd(self.tool_path),
-            environment(LD_LIBRARY_PATH=str(find_conda_lib(self.conda_env_name, "libcudart.so.11.0"))),
-            pkill_matches(["python tools/bab_tools/bab_from_vnnlib.py"]),
-        ]
+    def contexts(self) -> list[AbstractContextManager[None]] | None:
+        return None
+
+    @property
+    def launch_env(self) -> dict[str, str]:
+        return {"LD_LIBRARY_PATH": str(self.resolved_env.find_lib("libcudart.so.11.0"))}
 
     def _parse_result(
         self,
@@ -73,23 +65,27 @@ class OvalBab(CompleteVerifier):
         *,
         config: Path,
         timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
-    ) -> tuple[str, Path | None]:
+    ) -> tuple[list[str], Path | None]:
         with tmp_file(".txt") as tmp:
             result_file = Path(tmp.name)
-        source_cmd = get_conda_source_cmd(get_conda_path())
 
-        run_cmd = f"""
-        {" ".join(source_cmd)}
-        conda activate {self.conda_env_name}
-        python tools/bab_tools/bab_from_vnnlib.py --mode run_instance \
-        --onnx {str(network)} \
-        --vnnlib {str(property)} \
-        --result_file {str(result_file)} \
-        --json {str(config)} \
-        --instance_timeout {timeout}
-        """
+        run_args = [
+            "tools/bab_tools/bab_from_vnnlib.py",
+            "--mode",
+            "run_instance",
+            "--onnx",
+            str(network),
+            "--vnnlib",
+            str(property),
+            "--result_file",
+            str(result_file),
+            "--json",
+            str(config),
+            "--instance_timeout",
+            str(timeout),
+        ]
 
-        return run_cmd, result_file
+        return run_args, result_file
 
     def _init_config(
         self,
@@ -103,11 +99,3 @@ class OvalBab(CompleteVerifier):
             json_config = OvalbabJsonConfig.from_json(config)
 
         return Path(json_config.get_json_file_path())
-
-    def _verify_batch(
-        self,
-        instances: Iterable[Any],
-        *,
-        config: Configuration | Path | None,
-    ) -> list[CompleteVerificationResult]:
-        raise NotImplementedError("Batch verification not supported yet")
@@ -6,7 +6,7 @@ from typing import IO, Any
 import yaml
 from ConfigSpace import Configuration
 
-from autoverify.util.tempfiles import tmp_yaml_file, tmp_yaml_file_from_dict
+from autoverify.util.tempfiles import tmp_yaml_file_from_dict
 
 
 class SDPCrownYamlConfig:
@@ -41,9 +41,7 @@ class SDPCrownYamlConfig:
         if yaml_override:
             raise NotImplementedError("from_yaml: YAML override not supported for SDP-CROWN")
 
-        with tmp_yaml_file() as new_yaml_file:
-            yaml.dump(sdpcrown_dict, new_yaml_file)
-            return cls(new_yaml_file)
+        return cls(tmp_yaml_file_from_dict(sdpcrown_dict))
 
     @classmethod
     def from_config(
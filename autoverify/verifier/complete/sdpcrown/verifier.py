@@ -1,6 +1,5 @@
 """SDP-CROWN verifier."""
 
-from collections.abc import Iterable
 from contextlib import AbstractContextManager
 from pathlib import Path
 from typing import Any
@@ -9,14 +8,11 @@ from ConfigSpace import Configuration, ConfigurationSpace
 
 from autoverify import DEFAULT_VERIFICATION_TIMEOUT_SEC
 from autoverify.util import find_substring
-from autoverify.util.conda import get_conda_path, get_conda_source_cmd
-from autoverify.util.env import cwd
 from autoverify.util.path import check_file_extension
 from autoverify.util.tempfiles import tmp_file
 from autoverify.verifier.complete.sdpcrown.configspace import SDPCrownConfigspace
 from autoverify.verifier.complete.sdpcrown.sdpcrown_yaml_config import SDPCrownYamlConfig
 from autoverify.verifier.verification_result import (
-    CompleteVerificationResult,
     VerificationResultString,
 )
 from autoverify.verifier.verifier import CompleteVerifier
@@ -27,6 +23,7 @@ class SDPCrown(CompleteVerifier):
 
     name: str = "sdpcrown"
     config_space: ConfigurationSpace = SDPCrownConfigspace
+    _warm_preload = ("torch",)
 
     def __init__(
         self,
@@ -41,6 +38,9 @@ class SDPCrown(CompleteVerifier):
         super().__init__(batch_size, cpu_gpu_allocation)
         self._yaml_override = yaml_override
 
+    def get_init_attributes(self) -> dict[str, Any]:
+        return {**super().get_init_attributes(), "yaml_override": self._yaml_override}
+
     @staticmethod
     def _check_instance(network: Path, property: Path) -> None:
         """Check that the network/property files exist and have supported formats.
@@ -60,10 +60,12 @@ class SDPCrown(CompleteVerifier):
             raise ValueError("Property should be in vnnlib format")
 
     @property
-    def contexts(self) -> list[AbstractContextManager[None]]:
-        return [
-            cwd(self.tool_path),
-        ]
+    def contexts(self) -> list[AbstractContextManager[None]] | None:
+        return None
+
+    def _detect_verdict(self, line: str) -> VerificationResultString | None:
+        # A counter example may still be written after "Result: sat"
+        return "UNSAT" if find_substring("Result: unsat", line) else None
 
     def _parse_result(
         self,
@@ -95,31 +97,21 @@ class SDPCrown(CompleteVerifier):
         *,
         config: Path,
         timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
-    ) -> tuple[str, Path | None]:
+    ) -> tuple[list[str], Path | None]:
         with tmp_file(".txt") as tmp:
             result_file = Path(tmp.name)
-        source_cmd = get_conda_source_cmd(get_conda_path())
-
-        run_cmd = f"""
-        {" ".join(source_cmd)}
-        conda activate {self.conda_env_name}
-        python sdp_crown.py \
-            --model {str(network)} \
-            --config {str(config)} \
-            --vnnlib_property {str(property)}
-        """
 
-        return run_cmd, result_file
+        run_args = [
+            "sdp_crown.py",
+            "--model",
+            str(network),
+            "--config",
+            str(config),
+            "--vnnlib_property",
+            str(property),
+        ]
 
-    #
-    def _verify_batch(
-        self,
-        instances: Iterable[Any],
-        *,
-        config: Configuration | Path | None,
-    ) -> list[CompleteVerificationResult]:
-        """Batch verification not supported yet."""
-        raise NotImplementedError("Batch verification not supported for SDP-CROWN.")
+        return run_args, result_file
 
     def _init_config(
         self,
@@ -1,7 +1,5 @@
 """VeriNet verifier."""
 
-import shlex
-from collections.abc import Iterable
 from contextlib import AbstractContextManager
 from pathlib import Path
 from typing import Any
@@ -10,15 +8,8 @@ from ConfigSpace import Configuration, ConfigurationSpace
 
 from autoverify import DEFAULT_VERIFICATION_TIMEOUT_SEC
 from autoverify.util import find_substring
-from autoverify.util.conda import (
-    find_conda_lib,
-    get_conda_path,
-    get_conda_source_cmd,
-)
-from autoverify.util.env import cwd, environment, pkill_matches
 from autoverify.util.onnx import get_input_shape
 from autoverify.verifier.verification_result import (
-    CompleteVerificationResult,
     VerificationResultString,
 )
 from autoverify.verifier.verifier import CompleteVerifier
@@ -32,6 +23,7 @@ class Verinet(CompleteVerifier):
 
     name: str = "verinet"
     config_space: ConfigurationSpace = VerinetConfigspace
+    _warm_preload = ("torch",)
 
     # HACK: Quick hack to add some attributes to a VeriNet instance.
     # Ideally, these could be passed when calling `verify_property/instance`
@@ -55,23 +47,34 @@ class Verinet(CompleteVerifier):
         self._dnnv_simplify = dnnv_simplify
         self._transpose_matmul_weights = transpose_matmul_weights
 
+    def get_init_attributes(self) -> dict[str, Any]:
+        return {
+            **super().get_init_attributes(),
+            "gpu_mode": self._gpu_mode,
+            "input_shape": self._input_shape,
+            "dnnv_simplify": self._dnnv_simplify,
+            "transpose_matmul_weights": self._transpose_matmul_weights,
+        }
+
     @property
-    def contexts(self) -> list[AbstractContextManager[None]]:
-        return [
-            cwd(self.tool_path),
-            environment(
-                OPENBLAS_NUM_THREADS="1",
-                OMP_NUM_THREADS="1",
-                LD_LIBRARY_PATH=str(find_conda_lib(self.conda_env_name, "libcudart.so.11.0")),
-            ),
-            pkill_matches(
-                [
-                    "multiprocessing.spawn",
-                    "multiprocessing.forkserver",
-                    "python cli.py",  # TODO: Too broad
-                ]
-            ),
-        ]
+    def contexts(self) -> list[AbstractContextManager[None]] | None:
+        return None
+
+    @property
+    def launch_env(self) -> dict[str, str]:
+        return {
+            "OPENBLAS_NUM_THREADS": "1",
+            "OMP_NUM_THREADS": "1",
+            "LD_LIBRARY_PATH": str(self.resolved_env.find_lib("libcudart.so.11.0")),
+        }
+
+    def _detect_verdict(self, line: str) -> VerificationResultString | None:
+        if find_substring("STATUS:  Status.Safe", line):
+            return "UNSAT"
+        elif find_substring("STATUS:  Status.Unsafe", line):
+            return "SAT"
+
+        return None
 
     def _parse_result(
         self,
@@ -94,31 +97,23 @@ class Verinet(CompleteVerifier):
         *,
         config: Configuration,
         timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
-    ) -> tuple[str, Path | None]:
-        source_cmd = get_conda_source_cmd(get_conda_path())
+    ) -> tuple[list[str], Path | None]:
         input_shape = self._input_shape or get_input_shape(network)
 
         # params in order:
         # network, prop, timeout, config, input_shape, max_procs, gpu_mode,
         # dnnv_simplify
-        run_cmd = f"""
-        {" ".join(source_cmd)}
-        conda activate {self.conda_env_name}
-        python cli.py {str(network)} {str(property)} {timeout} \
-        {shlex.quote(str(dict(config)))} \
-        {shlex.quote(str(input_shape))} \
-        {-1} \
-        {self._gpu_mode} \
-        {self._dnnv_simplify} \
-        {self._transpose_matmul_weights} \
-        """
-
-        return run_cmd, None
-
-    def _verify_batch(
-        self,
-        instances: Iterable[Any],
-        *,
-        config: Configuration | Path | None,
-    ) -> list[CompleteVerificationResult]:
-        raise NotImplementedError("Batch verification not supported yet")
+        run_args = [
+            "cli.py",
+            str(network),
+            str(property),
+            str(timeout),
+            str(dict(config)),
+            str(input_shape),
+            str(-1),
+            str(self._gpu_mode),
+            str(self._dnnv_simplify),
+            str(self._transpose_matmul_weights),
+        ]
+
+        return run_args, None
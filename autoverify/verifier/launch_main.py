@@ -0,0 +1,41 @@
+"""Exec shim that applies the limits of a `LaunchSpec` to a tool process.
+
+Applying the CPU affinity, resource limits and cgroup of a tool between fork
+and exec (a `preexec_fn`) is not safe when the launching process has threads.
+Instead, the tool is launched through this file: it applies them to its own
+process and then replaces itself with the tool, which keeps the pid, the
+limits, the affinity and the cgroup.
+
+This file is executed with `python -I -S`, so it must not import anything
+from `autoverify` and should only use the standard library.
+
+Usage: `launch_main.py SETTINGS PROGRAM [ARG ...]`, where `SETTINGS` is a
+JSON object with the optional keys `cgroup`, `rlimits` and `cpus`.
+"""
+
+import json
+import os
+import resource
+import sys
+
+
+def main():
+    """Apply the settings and exec the tool."""
+    settings = json.loads(sys.argv[1])
+    argv = sys.argv[2:]
+
+    if settings.get("cgroup"):
+        with open(os.path.join(settings["cgroup"], "cgroup.procs"), "w") as f:
+            f.write(str(os.getpid()))
+
+    for limit, soft, hard in settings.get("rlimits") or []:
+        resource.setrlimit(limit, (soft, hard))
+
+    if settings.get("cpus"):
+        os.sched_setaffinity(0, settings["cpus"])
+
+    os.execv(argv[0], argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Everything a single tool process is launched with."""
+
+import json
+import resource
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+LAUNCH_MAIN = Path(__file__).resolve().parent / "launch_main.py"
+
+
+@dataclass(frozen=True)
+class LaunchSpec:
+    """How to launch one tool process.
+
+    The spec is passed straight to the subprocess, nothing about the launch
+    is set on the calling process. This way launches from different threads
+    can not see each other's working directory or environment variables.
+
+    Attributes:
+        cwd: Working directory of the tool.
+        env: The complete environment of the tool.
+        cpus: CPUs the tool is pinned to, `None` to not pin it.
+        memory_limit_mb: Address space limit (`RLIMIT_AS`) of every process
+            of the tool, `None` for no limit.
+        cpu_time_limit: CPU seconds limit (`RLIMIT_CPU`) of every process of
+            the tool, `None` for no limit.
+        cgroup: Directory of the cgroup the tool is started in, if any.
+    """
+
+    cwd: Path
+    env: dict[str, str]
+    cpus: list[int] | None = None
+    memory_limit_mb: int | None = None
+    cpu_time_limit: int | None = None
+    cgroup: Path | None = None
+
+    def rlimits(self) -> dict[int, tuple[int, int]]:
+        """The resource limits of the tool, by `resource.RLIMIT_*` constant."""
+        limits: dict[int, tuple[int, int]] = {}
+
+        if self.memory_limit_mb is not None:
+            limit = self.memory_limit_mb * 1024 * 1024
+            limits[resource.RLIMIT_AS] = limit, limit
+
+        if self.cpu_time_limit is not None:
+            # SIGXCPU at the soft limit gives the tool a chance to shut down
+            limits[resource.RLIMIT_CPU] = self.cpu_time_limit, self.cpu_time_limit + 5
+
+        return limits
+
+    def command(self, argv: Sequence[str]) -> list[str]:
+        """The command that launches `argv` with the affinity and limits.
+
+        These are applied by the `launch_main.py` shim, which then execs
+        `argv`. Without anything to apply, `argv` is launched directly.
+        """
+        settings = {
+            "cgroup": str(self.cgroup) if self.cgroup is not None else None,
+            "rlimits": [(limit, soft, hard) for limit, (soft, hard) in self.rlimits().items()],
+            "cpus": self.cpus,
+        }
+
+        if not any(settings.values()):
+            return list(argv)
+
+        # -I ignores the PYTHON* variables meant for the tool's interpreter
+        return [sys.executable, "-I", "-S", str(LAUNCH_MAIN), json.dumps(settings), *argv]
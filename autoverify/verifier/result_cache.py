@@ -0,0 +1,316 @@
+"""Persistent cache of verification results.
+
+Tuning and evaluation frequently run the exact same verification query more
+than once, e.g. SMAC intensification or Hydra re-running default
+configurations. The `ResultCache` stores results on disk, keyed by the
+content of the network and property, the configuration, the verifier (with
+its init attributes) and the commit of the installed tool.
+
+Entries are single JSON files that are written atomically, so the cache can
+be shared by concurrent processes, also on different hosts using a shared
+filesystem. Concurrent writers of the same key can only lose information
+(the entry stays valid), since entries are merged before they are written.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ConfigSpace import Configuration
+from xdg_base_dirs import xdg_cache_home
+
+from autoverify.cli.util.git import read_head_commit
+from autoverify.config import get_config
+from autoverify.verifier.verification_result import CompleteVerificationData
+
+if TYPE_CHECKING:
+    from autoverify.verifier.verifier import Verifier
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = xdg_cache_home() / "autoverify" / "results"
+_FORMAT_VERSION = 1
+_EVICT_EVERY = 64
+_DECISIVE = ("SAT", "UNSAT")
+
+_file_hashes: dict[tuple[str, int, int, int], str] = {}
+
+
+def hash_file(file: Path) -> str:
+    """Sha256 of the contents of a file, memoized on path, size and mtime."""
+    stat = file.stat()
+    memo_key = (str(file), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    if memo_key not in _file_hashes:
+        digest = hashlib.sha256()
+
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+        _file_hashes[memo_key] = digest.hexdigest()
+
+    return _file_hashes[memo_key]
+
+
+def canonical_config(config: Configuration | Path) -> str:
+    """A string that is the same for equivalent configurations."""
+    if isinstance(config, Path):
+        return "file:" + hash_file(config)
+
+    return json.dumps(dict(config), sort_keys=True, default=str)
+
+
+@dataclass
+class CacheStats:
+    """Statistics of a `ResultCache`, for this process only.
+
+    Attributes:
+        hits: Lookups that were answered from the cache.
+        misses: Lookups that were not.
+        writes: Results that were written to the cache.
+        evictions: Entries removed to stay under the size limit.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+
+class ResultCache:
+    """On-disk, content-addressed cache of verification results.
+
+    Lookups are timeout aware:
+
+    - A cached `SAT` or `UNSAT` answers any request. If it took longer than
+      the requested timeout, the answer is `TIMEOUT`, just like a new run.
+    - A cached `TIMEOUT` at `T` seconds answers requests with a timeout of
+      at most `T`.
+    - Errors are never cached.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, *, max_size: int | None = None):
+        """New instance.
+
+        Args:
+            cache_dir: Directory the entries are stored in.
+            max_size: Maximum size of the cache in bytes. If it is exceeded,
+                the least recently used entries are removed.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+
+    def make_key(
+        self,
+        verifier: "Verifier",
+        network: Path,
+        property: Path,
+        config: Configuration | Path,
+    ) -> str:
+        """Make the cache key of a verification query."""
+        try:
+            commit = read_head_commit(verifier.tool_path)
+        except FileNotFoundError:
+            commit = None
+
+        key_data = {
+            "version": _FORMAT_VERSION,
+            "verifier": verifier.name,
+            "init": verifier.get_init_attributes(),
+            "commit": commit,
+            "network": hash_file(network),
+            "property": hash_file(property),
+            "config": canonical_config(config),
+        }
+        key_str = json.dumps(key_data, sort_keys=True, default=str)
+
+        return hashlib.sha256(key_str.encode()).hexdigest()
+
+    def get(self, key: str, timeout: int) -> CompleteVerificationData | None:
+        """Look up a result for a query with the given timeout.
+
+        Returns:
+            CompleteVerificationData | None: The result or `None` on a miss.
+        """
+        entry = self._read(self._entry_path(key))
+        data = _answer(entry, timeout) if entry else None
+
+        with self._lock:
+            if data is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+
+        if data is not None:
+            # The mtime is used to find the least recently used entries
+            with suppress(OSError):
+                os.utime(self._entry_path(key))
+
+        return data
+
+    def put(self, key: str, data: CompleteVerificationData, timeout: int):
+        """Store the result of a query that ran with the given timeout."""
+        if data.result not in (*_DECISIVE, "TIMEOUT"):
+            return
+
+        new_entry = {
+            "version": _FORMAT_VERSION,
+            "result": data.result,
+            "took": data.took,
+            "timeout": timeout,
+            "counter_example": data.counter_example,
+            "stdout": data.stdout,
+        }
+
+        path = self._entry_path(key)
+        old_entry = self._read(path)
+
+        if old_entry is not None and not _is_better(new_entry, old_entry):
+            return
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp", suffix=".json")
+
+            with os.fdopen(fd, "w") as f:
+                json.dump(new_entry, f)
+
+            os.replace(tmp_name, path)
+        except OSError as err:
+            logger.warning(f"Could not write result cache entry {path}: {err}")
+            return
+
+        with self._lock:
+            self.stats.writes += 1
+            self._puts_since_evict += 1
+            should_evict = self.max_size is not None and self._puts_since_evict >= _EVICT_EVERY
+
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the size limit is met.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self._lock:
+            self._puts_since_evict = 0
+
+        if self.max_size is None:
+            return 0
+
+        entries: list[tuple[float, int, Path]] = []
+
+        for path in self.cache_dir.glob("*/*.json"):
+            with suppress(FileNotFoundError):
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+
+            # Another process may have evicted it already
+            with suppress(FileNotFoundError):
+                path.unlink()
+                removed += 1
+
+            total -= size
+
+        with self._lock:
+            self.stats.evictions += removed
+
+        return removed
+
+    def size(self) -> int:
+        """Total size of all entries in bytes."""
+        total = 0
+
+        for path in self.cache_dir.glob("*/*.json"):
+            with suppress(FileNotFoundError):
+                total += path.stat().st_size
+
+        return total
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    @staticmethod
+    def _read(path: Path) -> dict[str, Any] | None:
+        try:
+            with open(path) as f:
+                entry: dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as err:
+            logger.warning(f"Ignoring unreadable result cache entry {path}: {err}")
+            return None
+
+        if entry.get("version") != _FORMAT_VERSION:
+            return None
+
+        return entry
+
+
+def _answer(entry: dict[str, Any], timeout: int) -> CompleteVerificationData | None:
+    if entry["result"] in _DECISIVE and entry["took"] <= timeout:
+        return CompleteVerificationData(
+            entry["result"],
+            entry["took"],
+            counter_example=entry["counter_example"],
+            stdout=entry["stdout"],
+        )
+
+    # A decisive result that took longer than the timeout would time out
+    if entry["result"] in _DECISIVE or timeout <= entry["timeout"]:
+        return CompleteVerificationData("TIMEOUT", timeout, stdout=entry["stdout"])
+
+    return None
+
+
+def _is_better(new: dict[str, Any], old: dict[str, Any]) -> bool:
+    """If the new entry answers more queries than the old entry."""
+    if old["result"] in _DECISIVE:
+        return new["result"] in _DECISIVE and new["took"] < old["took"]
+
+    return new["result"] in _DECISIVE or new["timeout"] > old["timeout"]
+
+
+_default_cache: ResultCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_result_cache() -> ResultCache:
+    """The result cache configured in the auto-verify config."""
+    global _default_cache
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            config = get_config()
+            _default_cache = ResultCache(
+                config.result_cache_path or DEFAULT_CACHE_DIR,
+                max_size=config.result_cache_max_size_mb * 1024 * 1024,
+            )
+
+        return _default_cache
@@ -0,0 +1,135 @@
+"""Streaming handling of the output of a tool process.
+
+Tools such as abcrown print a lot of output during branch and bound. Instead
+of holding all of it in memory, a `RunOutput` keeps only a bounded tail,
+which is what ends up in `CompleteVerificationData.stdout`. The complete
+output can be spilled to a compressed log file per run. The verdict is
+detected as soon as the line announcing it is printed.
+"""
+
+import gzip
+import tempfile
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO
+
+from autoverify.verifier.verification_result import VerificationResultString
+
+DEFAULT_TAIL_SIZE = 256 * 1024
+
+
+class RunOutput:
+    """Output of a single tool process, fed to it while it is running.
+
+    Attributes:
+        verdict: The verdict detected in the output so far, if any.
+        verdict_t: `time.monotonic()` at which the verdict was detected.
+        log_file: File the complete output is written to, if any.
+        truncated: If output was dropped from the tail.
+    """
+
+    def __init__(
+        self,
+        *,
+        detect: Callable[[str], VerificationResultString | None] | None = None,
+        tail_size: int = DEFAULT_TAIL_SIZE,
+        log_file: Path | None = None,
+    ):
+        """New instance.
+
+        Args:
+            detect: Returns the verdict a line of output announces, if any.
+            tail_size: Number of characters of output kept in memory.
+            log_file: Gzip compressed file the complete output is written to.
+        """
+        self._detect = detect
+        self._tail_size = tail_size
+        self._tail: deque[str] = deque()
+        self._tail_len = 0
+        self._partial = ""
+        self._log: IO[str] | None = None
+
+        self.verdict: VerificationResultString | None = None
+        self.verdict_t: float | None = None
+        self.log_file = log_file
+        self.truncated = False
+
+        if log_file is not None:
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            self._log = gzip.open(log_file, "wt", compresslevel=6)  # noqa: SIM115
+
+    def feed(self, text: str) -> bool:
+        """Add output, which does not have to consist of complete lines.
+
+        Returns:
+            bool: If the verdict was detected in this piece of output.
+        """
+        if self._log is not None:
+            self._log.write(text)
+
+        self._append_tail(text)
+
+        if self._detect is None or self.verdict is not None:
+            return False
+
+        lines = (self._partial + text).split("\n")
+        # Lines that never end (e.g. progress bars) must not grow unbounded
+        self._partial = lines.pop()[-self._tail_size :]
+
+        for line in lines:
+            if verdict := self._detect(line + "\n"):
+                self.verdict = verdict
+                self.verdict_t = time.monotonic()
+                return True
+
+        return False
+
+    def tail(self) -> str:
+        """The last `tail_size` characters of output."""
+        return "".join(self._tail)
+
+    def close(self):
+        """Flush the log file, the tail stays available."""
+        if self._partial and self._detect is not None and self.verdict is None:
+            self.verdict = self._detect(self._partial)
+            self.verdict_t = time.monotonic() if self.verdict else None
+
+        self._partial = ""
+
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _append_tail(self, text: str):
+        if len(text) >= self._tail_size:
+            self.truncated = self.truncated or self._tail_len + len(text) > self._tail_size
+            self._tail.clear()
+            self._tail.append(text[-self._tail_size :])
+            self._tail_len = len(self._tail[0])
+            return
+
+        self._tail.append(text)
+        self._tail_len += len(text)
+
+        while self._tail_len > self._tail_size:
+            self.truncated = True
+            excess = self._tail_len - self._tail_size
+            first = self._tail[0]
+
+            if len(first) <= excess:
+                self._tail.popleft()
+                self._tail_len -= len(first)
+            else:
+                self._tail[0] = first[excess:]
+                self._tail_len -= excess
+
+
+def new_log_file(log_dir: Path, verifier: str) -> Path:
+    """Reserve a unique path for the compressed log of a run."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    prefix = f"{verifier}_{time.strftime('%Y%m%d-%H%M%S')}_"
+
+    with tempfile.NamedTemporaryFile(dir=log_dir, prefix=prefix, suffix=".log.gz", delete=False) as f:
+        return Path(f.name)
@@ -1,12 +1,33 @@
 """Classes for data about verification."""
 
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Literal
 
 from result import Result
 
 # TODO: Enum?
-VerificationResultString = Literal["SAT", "UNSAT", "TIMEOUT", "ERR"]
+VerificationResultString = Literal["SAT", "UNSAT", "TIMEOUT", "MEMOUT", "ERR"]
+
+
+@dataclass
+class ResourceUsage:
+    """Resources used by a single tool process and its descendants.
+
+    Attributes:
+        cpu_user: Seconds of user mode CPU time.
+        cpu_sys: Seconds of kernel mode CPU time.
+        peak_rss_mb: Highest resident memory of the process tree, in MiB.
+        wall: Seconds from launching the tool until it exited (monotonic).
+        teardown: Seconds from killing the tool until it exited, 0 if the
+            tool exited by itself.
+    """
+
+    cpu_user: float
+    cpu_sys: float
+    peak_rss_mb: float
+    wall: float
+    teardown: float = 0.0
 
 
 @dataclass
@@ -19,6 +40,10 @@ class CompleteVerificationData:
         counter_example: Example that violates property (if SAT)
         err: stderr
         stdout: stdout
+        returncode: Exit code of the tool process, negative if it was
+            killed by a signal
+        log_file: Compressed file with the complete output, if it was kept
+        usage: Resources used by the tool, if they were measured
     """
 
     result: VerificationResultString
@@ -27,6 +52,9 @@ class CompleteVerificationData:
     obtained_labels: list[str] = None
     err: str = ""
     stdout: str = ""
+    returncode: int | None = None
+    log_file: Path | None = None
+    usage: ResourceUsage | None = None
 
 
 # FIXME: This doesnt make any sense
@@ -0,0 +1,320 @@
+"""Handles of running verifications.
+
+A `VerificationRun` owns everything that belongs to a single tool process:
+its output, its watchdog and its cancellation state. Nothing is stored on the
+verifier object, so one verifier can drive any number of runs at the same
+time and cancelling one run never affects another.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from autoverify.util.cgroup import RunCgroup
+from autoverify.util.proc import ProcessTreeSampler, kill_process_tree, terminate_process_tree
+from autoverify.verifier.run_output import RunOutput
+from autoverify.verifier.verification_result import ResourceUsage
+from autoverify.verifier.warm_worker import WarmProcess
+
+T = TypeVar("T")
+
+# Seconds between samples of the memory and CPU time of the process tree
+SAMPLE_INTERVAL_SEC = 1.0
+
+# Seconds a tool gets to exit after SIGTERM, before it is killed with SIGKILL
+DEFAULT_KILL_GRACE_SEC = 5.0
+
+
+class VerificationRun(Generic[T]):
+    """A verification that was started in the background.
+
+    The tool process is read by a thread of the run, and a watchdog kills it
+    once the timeout has passed or the run is cancelled. If the run stops on
+    its verdict, the process is also killed once its output announced the
+    verdict. Killing sends SIGTERM to the process tree first, whatever did
+    not exit after the grace period gets SIGKILL. When the process has
+    exited, processes it left behind are killed the same way and the
+    `finish` callback turns its output into the result of the run.
+
+    While it runs, the CPU time and memory of the process tree are sampled.
+    Together with the `wait4` resource usage of the tool, these are passed to
+    `finish` as a `ResourceUsage`.
+    """
+
+    def __init__(
+        self,
+        process: subprocess.Popen[str] | WarmProcess | None,
+        *,
+        timeout: float,
+        finish: Callable[..., T] | None = None,
+        output: RunOutput | None = None,
+        stop_on_verdict: bool = False,
+        on_line: Callable[[str], None] | None = None,
+        on_exit: Callable[[], None] | None = None,
+        kill_grace: float = DEFAULT_KILL_GRACE_SEC,
+        cgroup: RunCgroup | None = None,
+    ):
+        """Start tracking a launched process, use `CompleteVerifier.start`.
+
+        Args:
+            process: The launched tool process.
+            timeout: Seconds after which the process is killed.
+            finish: Callback making the result of the run. It is called
+                with the `RunOutput`, the return code and the keyword
+                arguments `timed_out`, `cancelled`, `memout`, `took` and
+                `usage`.
+            output: Collects the output, by default only a bounded tail of
+                it is kept.
+            stop_on_verdict: Kill the process as soon as `output` detected
+                the verdict, instead of waiting for the tool to exit.
+            on_line: Called with every line of output as it is read.
+            on_exit: Called once the process exited and the result is made,
+                e.g. to release resources of the launch.
+            kill_grace: Seconds the tool gets to exit after SIGTERM, before
+                it is killed with SIGKILL.
+            cgroup: The cgroup the tool runs in. It is used to kill the
+                tool and to find out if it ran out of memory.
+        """
+        self._process = process
+        self._timeout = timeout
+        self._finish = finish
+        self._output = output if output is not None else RunOutput()
+        self._stop_on_verdict = stop_on_verdict
+        self._on_line = on_line
+        self._on_exit = on_exit
+        self._kill_grace = kill_grace
+        self._cgroup = cgroup
+
+        self._start_t = time.monotonic()
+        self._end_t: float | None = None
+        self._kill_t: float | None = None
+        self._stop = threading.Event()
+        self._exited = threading.Event()
+        self._done = threading.Event()
+        self._cancelled = False
+        self._timed_out = False
+        self._stopped_early = False
+        self._result: T | None = None
+        self._error: BaseException | None = None
+
+        if process is not None:
+            self._sampler = ProcessTreeSampler(process.pid)
+            self._watchdog = threading.Thread(target=self._watch, daemon=True)
+            self._reader = threading.Thread(target=self._read, daemon=True)
+            self._watchdog.start()
+            self._reader.start()
+
+    @classmethod
+    def completed(cls, result: T) -> "VerificationRun[T]":
+        """A run that is already done, e.g. because its result was cached."""
+        run: VerificationRun[T] = cls(None, timeout=0)
+        run._result = result
+        run._end_t = run._start_t
+        run._done.set()
+
+        return run
+
+    @property
+    def pid(self) -> int | None:
+        """Process id of the tool, `None` if no process was needed."""
+        return self._process.pid if self._process is not None else None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started, or how long it took when done."""
+        end_t = self._end_t if self._end_t is not None else time.monotonic()
+        return end_t - self._start_t
+
+    @property
+    def done(self) -> bool:
+        """If the run has finished and its result is available."""
+        return self._done.is_set()
+
+    @property
+    def stopped_early(self) -> bool:
+        """If the process was killed because its verdict was known."""
+        return self._stopped_early
+
+    @property
+    def cancelled(self) -> bool:
+        """If the run was cancelled before the tool finished."""
+        return self._cancelled
+
+    def poll(self) -> T | None:
+        """Return the result if the run is done, `None` otherwise."""
+        if not self.done:
+            return None
+
+        return self.wait()
+
+    def wait(self, timeout: float | None = None) -> T:
+        """Wait for the run to finish and return its result.
+
+        Args:
+            timeout: Maximum number of seconds to wait, wait indefinitely if
+                `None`. This does not affect the run itself.
+
+        Raises:
+            TimeoutError: If the run did not finish within `timeout` seconds.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Run did not finish within {timeout} seconds")
+
+        if self._error is not None:
+            raise self._error
+
+        return self._result  # type: ignore
+
+    def cancel(self):
+        """Kill the tool process, the run finishes as soon as it exited.
+
+        Cancelling a run that is already done has no effect.
+        """
+        if self.done or self._stop.is_set():
+            return
+
+        self._cancelled = True
+        self._stop.set()
+
+    def _watch(self):
+        assert self._process is not None
+        deadline = self._start_t + self._timeout
+
+        while True:
+            self._sampler.sample()
+            remaining = deadline - time.monotonic()
+
+            if remaining <= 0:
+                self._timed_out = True
+                break
+
+            if self._stop.wait(min(remaining, SAMPLE_INTERVAL_SEC)):
+                break
+
+        # The process was either stopped, timed out or already exited
+        if self._timed_out or self._cancelled or self._stopped_early:
+            self._kill_t = time.monotonic()
+            kill_process_tree(self._process.pid)
+
+            # Tools that ignore SIGTERM must not keep their cores any longer
+            if not self._exited.wait(self._kill_grace):
+                kill_process_tree(self._process.pid, signal.SIGKILL)
+
+                if self._cgroup is not None:
+                    self._cgroup.kill()
+
+    def _read(self):
+        assert self._process is not None
+        output = self._output
+
+        try:
+            stdout = self._process.stdout
+            assert stdout is not None
+
+            for line in iter(stdout.readline, ""):
+                if output.feed(line) and self._stop_on_verdict and not self._stop.is_set():
+                    self._stopped_early = True
+                    self._stop.set()
+
+                if self._on_line is not None:
+                    self._on_line(line)
+
+            stdout.close()
+            output.close()
+
+            # Kill what the tool left behind (e.g. multiprocessing workers)
+            # before reaping it, so its pid can not be reused in the meantime
+            if isinstance(self._process, subprocess.Popen):
+                os.waitid(os.P_PID, self._process.pid, os.WEXITED | os.WNOWAIT)
+
+            self._end_t = time.monotonic()
+
+            # Stop the watchdog before reaping, so it does not kill a recycled pid
+            self._exited.set()
+            self._stop.set()
+            self._watchdog.join()
+            timed_out = self._timed_out
+
+            terminate_process_tree(self._process.pid, self._kill_grace)
+
+            if self._cgroup is not None:
+                self._cgroup.kill()
+
+            return_code, rusage = self._reap()
+            memout = self._cgroup is not None and self._cgroup.oom_killed()
+
+            took = self.elapsed
+
+            if self._stopped_early and output.verdict_t is not None:
+                took = output.verdict_t - self._start_t
+
+            if self._finish is not None:
+                self._result = self._finish(
+                    output,
+                    return_code,
+                    timed_out=timed_out,
+                    cancelled=self._cancelled and not timed_out,
+                    memout=memout,
+                    took=took,
+                    usage=self._usage(rusage),
+                )
+        except BaseException as err:
+            self._error = err
+        finally:
+            self._stop.set()
+            output.close()
+
+            if self._end_t is None:
+                self._end_t = time.monotonic()
+
+            try:
+                if self._on_exit is not None:
+                    self._on_exit()
+            finally:
+                self._done.set()
+
+    def _reap(self) -> tuple[int, dict[str, float] | None]:
+        """Reap the tool, returning its return code and resource usage."""
+        assert self._process is not None
+
+        if isinstance(self._process, subprocess.Popen):
+            _, status, rusage = os.wait4(self._process.pid, 0)
+            self._process.returncode = os.waitstatus_to_exitcode(status)
+
+            return self._process.returncode, {
+                "utime": rusage.ru_utime,
+                "stime": rusage.ru_stime,
+                "maxrss": rusage.ru_maxrss,
+            }
+
+        return_code = self._process.wait()
+        return return_code, self._process.rusage
+
+    def _usage(self, rusage: dict[str, float] | None) -> ResourceUsage:
+        """Combine the samples and the rusage of the tool.
+
+        The rusage includes descendants the tool waited for, the samples also
+        include descendants it did not wait for.
+        """
+        assert self._end_t is not None
+        cpu_user, cpu_sys, peak_rss = self._sampler.cpu_user, self._sampler.cpu_sys, self._sampler.peak_rss
+
+        if rusage is not None:
+            cpu_user = max(cpu_user, rusage["utime"])
+            cpu_sys = max(cpu_sys, rusage["stime"])
+            peak_rss = max(peak_rss, int(rusage["maxrss"]) * 1024)
+
+        if self._cgroup is not None:
+            peak_rss = max(peak_rss, self._cgroup.peak_memory() or 0)
+
+        return ResourceUsage(
+            cpu_user=cpu_user,
+            cpu_sys=cpu_sys,
+            peak_rss_mb=peak_rss / (1024 * 1024),
+            wall=self._end_t - self._start_t,
+            teardown=max(0.0, self._end_t - self._kill_t) if self._kill_t is not None else 0.0,
+        )
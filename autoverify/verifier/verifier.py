@@ -1,39 +1,70 @@
 """Base class for verifiers."""
 
+import asyncio
+import copy
+import math
 import os
+import re
 import signal
 import subprocess
 import threading
 import time
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import AbstractContextManager, ExitStack, suppress
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 from ConfigSpace import Configuration, ConfigurationSpace
 from result import Err, Ok
 
 from autoverify import DEFAULT_VERIFICATION_TIMEOUT_SEC
-from autoverify.cli.install import TOOL_DIR_NAME, VERIFIER_DIR
-from autoverify.util.conda import (
-    get_conda_env_lib_path,
-    get_verifier_conda_env_name,
-)
-from autoverify.util.env import environment
+from autoverify.cli.install import TOOL_DIR_NAME
+from autoverify.config import get_config
+from autoverify.util.cgroup import RunCgroup
+from autoverify.util.conda import get_verifier_conda_env_name
 from autoverify.util.instances import VerificationInstance
 from autoverify.util.path import check_file_extension
-from autoverify.util.proc import nvidia_gpu_count, pid_exists, taskset_cpu_range
+from autoverify.util.proc import cpu_count, nvidia_gpu_count
+from autoverify.util.resolved_env import (
+    ResolvedEnv,
+    find_verifier_install,
+    resolve_verifier_env,
+)
+from autoverify.util.tempfiles import RunWorkspace
+from autoverify.verifier.launch_spec import LaunchSpec
+from autoverify.verifier.result_cache import ResultCache, get_default_result_cache
+from autoverify.verifier.run_output import RunOutput, new_log_file
 from autoverify.verifier.verification_result import (
     CompleteVerificationData,
     CompleteVerificationResult,
+    ResourceUsage,
     VerificationResultString,
 )
+from autoverify.verifier.verification_run import VerificationRun
+from autoverify.verifier.warm_worker import (
+    DEFAULT_MAX_JOBS,
+    WarmProcess,
+    WarmWorkerKey,
+    warm_worker_pool,
+)
+
+# Seconds per instance a batch process may take on top of the timeouts
+_BATCH_SLACK_SEC = 30
+
+# Output of tools that failed to allocate memory under a memory limit
+_OUT_OF_MEMORY = re.compile(r"MemoryError|std::bad_alloc|Cannot allocate memory")
+
+T = TypeVar("T")
 
 
 class Verifier(ABC):
     """Abstract class to represent a verifier tool."""
 
+    # Modules a warm worker imports once before serving verifications
+    _warm_preload: tuple[str, ...] = ()
+
     # TODO: GPU Mode attribute
     def __init__(
         self,
@@ -47,6 +78,14 @@ class Verifier(ABC):
         self._batch_size = batch_size
         self._cpu_gpu_allocation = cpu_gpu_allocation
         self._printed_tool_path = False
+        self._warm_worker: bool | None = None
+        self._warm_max_jobs: int | None = None
+        self._use_result_cache: bool | None = None
+        self._result_cache: ResultCache | None = None
+        self._early_stop: bool | None = None
+        self._memory_limit_mb: int | None = None
+        self._active_runs: set[VerificationRun[Any]] = set()
+        self._active_runs_lock = threading.Lock()
 
     def get_init_attributes(self) -> dict[str, Any]:
         """Get attributes provided during initialization of the verifier."""
@@ -54,6 +93,19 @@ class Verifier(ABC):
             "batch_size": self._batch_size,
         }
 
+    def with_allocation(self, cpu_gpu_allocation: tuple[int, int, int] | None) -> "Verifier":
+        """A copy of the verifier that runs on other cores and another GPU.
+
+        The copy keeps the options of this verifier (see the `use_*`
+        methods), but does not share its active runs.
+        """
+        verifier = copy.copy(self)
+        verifier._cpu_gpu_allocation = cpu_gpu_allocation
+        verifier._active_runs = set()
+        verifier._active_runs_lock = threading.Lock()
+
+        return verifier
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -69,18 +121,34 @@ class Verifier(ABC):
     @property
     @abstractmethod
     def contexts(self) -> list[AbstractContextManager[None]] | None:
-        """Contexts to run the verification in."""
+        """Contexts to run the verification in.
+
+        Contexts must not change process-global state such as the working
+        directory or `os.environ`, since verifications run concurrently. Use
+        `working_dir` and `launch_env` to set those for the tool instead.
+        """
         raise NotImplementedError
 
     @property
     def tool_path(self) -> Path:
         """The path where the verifier is installed."""
-        tool_path = VERIFIER_DIR / self.name / TOOL_DIR_NAME
+        _, install_dir = find_verifier_install(self.name)
+        return install_dir / TOOL_DIR_NAME
 
-        if not tool_path.exists():
-            raise FileNotFoundError(f"Could not find installation for tool {self.name}")
+    @property
+    def working_dir(self) -> Path:
+        """The directory the verifier is run from."""
+        return self.tool_path
+
+    @property
+    def launch_env(self) -> dict[str, str]:
+        """Environment variables set for the tool, before env activation."""
+        return {}
 
-        return Path(tool_path)  # mypy complains tool_path is any
+    @property
+    def resolved_env(self) -> ResolvedEnv:
+        """The (conda or venv) environment the verifier runs in."""
+        return resolve_verifier_env(self.name)
 
     @property
     def conda_env_name(self) -> str:
@@ -89,7 +157,7 @@ class Verifier(ABC):
 
     @property
     def conda_lib_path(self) -> Path:
-        return get_conda_env_lib_path(self.conda_env_name)
+        return self.resolved_env.prefix / "lib"
 
     @property
     def default_config(self) -> Configuration:
@@ -104,8 +172,13 @@ class Verifier(ABC):
         *,
         config: Any,
         timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
-    ) -> tuple[str, Path | None]:
-        """Get the cli command to run the verification."""
+    ) -> tuple[list[str], Path | None]:
+        """Get the arguments passed to the tool's Python interpreter.
+
+        For example `["abcrown.py", "--config", "cfg.yaml"]` or
+        `["-m", "nnenum.nnenum", ...]`, together with the file the tool
+        writes its result to (if any).
+        """
         raise NotImplementedError
 
     @abstractmethod
@@ -117,6 +190,17 @@ class Verifier(ABC):
         """Parse the output to get the result."""
         raise NotImplementedError
 
+    def _detect_verdict(self, line: str) -> VerificationResultString | None:
+        """Detect the verdict in a line of output, while the tool is running.
+
+        Only return a verdict once it is final, i.e. when the tool has
+        written everything `_parse_result` needs. Runs that stop on their
+        verdict kill the tool right after this line. Returns `None` by
+        default, in which case the verdict is only parsed after the tool
+        exited.
+        """
+        return None
+
     def _init_config(
         self,
         network: Path,
@@ -177,8 +261,9 @@ class CompleteVerifier(Verifier):
         """Verify the property on the network.
 
         Runs the verifier and feeds the network/property instance as input.
-        Complete verification will result in one of the following four
-        possibilities: `SAT`, `UNSAT`, `TIMEOUT`, `ERR`.
+        Complete verification will result in one of the following
+        possibilities: `SAT`, `UNSAT`, `TIMEOUT`, `MEMOUT`, `ERR`. A `MEMOUT`
+        only happens when the memory of runs is limited.
 
         Args:
             network: The `Path` to the network in `.onnx` format.
@@ -193,6 +278,119 @@ class CompleteVerifier(Verifier):
             CompleteVerificationResult: A `Result` object containing information
             about the verification attempt. TODO: Link docs or something
         """
+        return self.start(network, property, config=config, timeout=timeout).wait()
+
+    def start(
+        self,
+        network: Path,
+        property: Path,
+        *,
+        config: Configuration | Path | None = None,
+        timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
+    ) -> VerificationRun[CompleteVerificationResult]:
+        """Start verifying the property on the network in the background.
+
+        The verifier object holds no state of the run, so any number of runs
+        can be started concurrently. The returned handle is used to wait for,
+        poll or cancel the run. A cancelled run results in a `TIMEOUT` with
+        the time it ran for, which is not stored in the result cache.
+
+        Args:
+            network: The `Path` to the network in `.onnx` format.
+            property: The `Path` to the property in `.vnnlib` format.
+            config: The configuration of the verification tool to be used. If
+                `None` is passed, the default configuration of the verification
+                tool will be used.
+            timeout: The maximum number of seconds that can be spent on the
+                verification query.
+
+        Returns:
+            VerificationRun[CompleteVerificationResult]: Handle of the run,
+            its result is what `verify_property` would return.
+        """
+        network, property, config = self._prepare_query(network, property, config)
+        cache_key, cached = self._lookup_cache(network, property, config, timeout)
+
+        if cached is not None:
+            return VerificationRun.completed(Ok(cached))
+
+        run_args, result_file, workspace = self._prepare_run(network, property, config, timeout)
+
+        def _finish(
+            output: RunOutput,
+            return_code: int,
+            *,
+            timed_out: bool,
+            cancelled: bool,
+            memout: bool,
+            took: float,
+            usage: ResourceUsage,
+        ) -> CompleteVerificationResult:
+            outcome = self._finish_run(
+                output,
+                return_code,
+                timed_out=timed_out or cancelled,
+                memout=memout,
+                took=took,
+                result_file=result_file,
+                usage=usage,
+            )
+
+            if cancelled:
+                return Ok(outcome)
+
+            # Runs that ran out of time or memory count as using the whole
+            # budget, how long they actually ran is in the usage
+            if outcome.result in ("TIMEOUT", "MEMOUT"):
+                outcome.took = timeout
+
+            return self._finish_query(cache_key, outcome, timeout)
+
+        return self._start_run(
+            run_args,
+            timeout=timeout,
+            finish=_finish,
+            stop_on_verdict=self._uses_early_stop(),
+            workspace=workspace,
+        )
+
+    async def averify_property(
+        self,
+        network: Path,
+        property: Path,
+        *,
+        config: Configuration | Path | None = None,
+        timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
+    ) -> CompleteVerificationResult:
+        """Verify the property on the network, asynchronously.
+
+        Same as `verify_property`, but awaiting the result does not block
+        the event loop, so a single event loop can drive many verifications
+        at the same time. The tool is run by `start`, cancelling the task
+        cancels the run and returns once the tool was killed.
+
+        Args:
+            network: The `Path` to the network in `.onnx` format.
+            property: The `Path` to the property in `.vnnlib` format.
+            config: The configuration of the verification tool to be used. If
+                `None` is passed, the default configuration of the verification
+                tool will be used.
+            timeout: The maximum number of seconds that can be spent on the
+                verification query.
+
+        Returns:
+            CompleteVerificationResult: A `Result` object containing information
+            about the verification attempt.
+        """
+        run = self.start(network, property, config=config, timeout=timeout)
+        return await _await_run(run)
+
+    def _prepare_query(
+        self,
+        network: Path,
+        property: Path,
+        config: Configuration | Path | None,
+    ) -> tuple[Path, Path, Configuration | Path]:
         self._print_verifier_path_once()
         network, property = network.resolve(), property.resolve()
         self._check_instance(network, property)
@@ -200,35 +398,99 @@ class CompleteVerifier(Verifier):
         if config is None:
             config = self.default_config
 
-        # Tools use different configuration formats and methods, so we let
-        # them do some initialization here
+        return network, property, config
 
-        config = self._init_config(
-            network,
-            property,
-            config,
-        )
+    def _lookup_cache(
+        self,
+        network: Path,
+        property: Path,
+        config: Configuration | Path,
+        timeout: int,
+    ) -> tuple[str | None, CompleteVerificationData | None]:
+        """Return the cache key (if caching) and the cached outcome (if any)."""
+        result_cache = self._get_result_cache()
 
-        run_cmd, output_file = self._get_run_cmd(
-            network,
-            property,
-            config=config,
-            timeout=timeout,
-        )
+        if result_cache is None:
+            return None, None
+
+        cache_key = result_cache.make_key(self, network, property, config)
+        return cache_key, result_cache.get(cache_key, timeout)
+
+    def _finish_query(
+        self,
+        cache_key: str | None,
+        outcome: CompleteVerificationData,
+        timeout: int,
+    ) -> CompleteVerificationResult:
+        result_cache = self._get_result_cache()
+
+        if result_cache is not None and cache_key is not None:
+            result_cache.put(cache_key, outcome, timeout)
+
+        # TODO: What is the point of wrapping in Ok/Err here
+        return Ok(outcome) if outcome.result != "ERR" else Err(outcome)
+
+    def _prepare_run(
+        self,
+        network: Path,
+        property: Path,
+        config: Configuration | Path,
+        timeout: int,
+    ) -> tuple[list[str], Path | None, RunWorkspace]:
+        """Make the files and arguments of a run.
+
+        The files are created in a new workspace, which must be closed once
+        the result of the run was parsed.
+        """
+        workspace = RunWorkspace.create(self.name)
+
+        try:
+            with workspace.activate():
+                # Tools use different configuration formats and methods, so
+                # we let them do some initialization here
+                tool_config = self._init_config(
+                    network,
+                    property,
+                    config,
+                )
+
+                run_args, result_file = self._get_run_cmd(
+                    network,
+                    property,
+                    config=tool_config,
+                    timeout=timeout,
+                )
+        except BaseException:
+            workspace.close()
+            raise
+
+        return run_args, result_file, workspace
+
+    def _verify_property(
+        self,
+        network: Path,
+        property: Path,
+        *,
+        config: Configuration | Path,
+        timeout: int,
+        warm: bool | None = None,
+    ) -> CompleteVerificationData:
+        run_args, result_file, workspace = self._prepare_run(network, property, config, timeout)
 
         outcome = self._run_verification(
-            run_cmd,
-            result_file=output_file,
+            run_args,
+            result_file=result_file,
             timeout=timeout,
+            warm=warm,
+            workspace=workspace,
         )
 
         # Shutting down after timeout may take some time, so we set the took
         # value to the actual timeout
-        if outcome.result == "TIMEOUT":
+        if outcome.result in ("TIMEOUT", "MEMOUT"):
             outcome.took = timeout
 
-        # TODO: What is the point of wrapping in Ok/Err here
-        return Ok(outcome) if outcome.result != "ERR" else Err(outcome)
+        return outcome
 
     def verify_instance(
         self,
@@ -244,16 +506,63 @@ class CompleteVerifier(Verifier):
             config=config,
         )
 
+    def start_instance(
+        self,
+        instance: VerificationInstance,
+        *,
+        config: Configuration | Path | None = None,
+    ) -> VerificationRun[CompleteVerificationResult]:
+        """See the `start` docstring."""
+        return self.start(
+            instance.network,
+            instance.property,
+            timeout=instance.timeout,
+            config=config,
+        )
+
+    async def averify_instance(
+        self,
+        instance: VerificationInstance,
+        *,
+        config: Configuration | Path | None = None,
+    ) -> CompleteVerificationResult:
+        """See the `averify_property` docstring."""
+        return await self.averify_property(
+            instance.network,
+            instance.property,
+            timeout=instance.timeout,
+            config=config,
+        )
+
     def verify_batch(
         self,
         instances: Iterable[VerificationInstance],
         *,
         config: Configuration | Path | None = None,
     ) -> list[CompleteVerificationResult]:
-        """Verify a batch.
+        """Verify a batch of instances.
+
+        Instances are grouped by network. If the tool can verify several
+        properties in one process, each group is verified by a single tool
+        process, so the network is loaded and torch/CUDA are initialized only
+        once per network. Every instance keeps its own timeout and result.
+        Instances the tool can not batch are verified one after the other, in
+        a warm worker if warm workers are used (see `use_warm_worker`).
 
-        Not yet implemented.
+        Args:
+            instances: The instances to verify.
+            config: The configuration used for all instances. If `None` is
+                passed, the default configuration is used.
+
+        Returns:
+            list[CompleteVerificationResult]: The results, in the same order
+            as `instances`.
         """
+        self._print_verifier_path_once()
+        instances = [
+            VerificationInstance(inst.network.resolve(), inst.property.resolve(), inst.timeout) for inst in instances
+        ]
+
         for instance in instances:
             self._check_instance(instance.network, instance.property)
 
@@ -265,125 +574,545 @@ class CompleteVerifier(Verifier):
             config=config,
         )
 
-    @abstractmethod
     def _verify_batch(
         self,
-        instances: Iterable[VerificationInstance],
+        instances: list[VerificationInstance],
         *,
-        config: Configuration | Path | None,
+        config: Configuration | Path,
     ) -> list[CompleteVerificationResult]:
-        raise NotImplementedError
+        outcomes: list[CompleteVerificationData | None] = [None] * len(instances)
+        result_cache = self._get_result_cache()
+        cache_keys: list[str] = []
+        by_network: dict[Path, list[int]] = {}
+
+        for i, instance in enumerate(instances):
+            if result_cache is not None:
+                cache_keys.append(result_cache.make_key(self, instance.network, instance.property, config))
+                outcomes[i] = result_cache.get(cache_keys[i], instance.timeout)
+
+                if outcomes[i] is not None:
+                    continue
+
+            by_network.setdefault(instance.network, []).append(i)
+
+        for network, indices in by_network.items():
+            group = [instances[i] for i in indices]
+            workspace = RunWorkspace.create(self.name)
+
+            try:
+                with workspace.activate():
+                    batch_outcomes = self._verify_network_batch(network, group, config=config)
+            finally:
+                workspace.close()
+
+            for i, outcome in zip(indices, batch_outcomes, strict=True):
+                outcomes[i] = outcome
+
+        for i, instance in enumerate(instances):
+            if outcomes[i] is None:
+                outcomes[i] = self._verify_property(
+                    instance.network,
+                    instance.property,
+                    config=config,
+                    timeout=instance.timeout,
+                    warm=self._uses_warm_worker(),
+                )
 
-    def _allocate_run_cmd(
+        results: list[CompleteVerificationResult] = []
+
+        for i, (instance, outcome) in enumerate(zip(instances, outcomes, strict=True)):
+            assert outcome is not None
+
+            if result_cache is not None:
+                result_cache.put(cache_keys[i], outcome, instance.timeout)
+
+            results.append(Ok(outcome) if outcome.result != "ERR" else Err(outcome))
+
+        return results
+
+    def _verify_network_batch(
+        self,
+        network: Path,
+        instances: list[VerificationInstance],
+        *,
+        config: Configuration | Path,
+    ) -> list[CompleteVerificationData | None]:
+        """Verify several properties of one network in a single tool process.
+
+        Tools that support this override this method, see `_run_batch`.
+
+        Returns:
+            list[CompleteVerificationData | None]: An outcome per instance,
+            `None` for instances that still have to be verified on their own.
+        """
+        return [None] * len(instances)
+
+    def _run_batch(
         self,
-        run_cmd: str,
-        contexts: list[AbstractContextManager[None]],
-    ) -> str:
-        # TODO: GPU allocation
-        assert self._cpu_gpu_allocation is not None
+        run_args: list[str],
+        instances: list[VerificationInstance],
+        *,
+        banner: re.Pattern[str],
+        slack: int = _BATCH_SLACK_SEC,
+    ) -> list[CompleteVerificationData | None]:
+        """Run a tool process that verifies the instances in order.
 
-        taskset_cmd = taskset_cpu_range(self._cpu_gpu_allocation[0:2])
-        lines = []
+        The tool must print a line matching `banner` before it starts on an
+        instance, with the index of the instance as its first group. The
+        output after a banner is parsed as the output of that instance. An
+        instance that was not finished when the process exited (or crashed)
+        gets no outcome.
+
+        Args:
+            run_args: Arguments for the tool's interpreter.
+            instances: The instances, in the order the tool verifies them.
+            banner: Pattern of the line announcing the next instance.
+            slack: Seconds per instance the process may take on top of the
+                instance timeouts, for loading and shutting down.
+        """
+        total_timeout = sum(inst.timeout + slack for inst in instances)
+        tail_size = get_config().output_tail_kb * 1024
+        # (instance index, start time, output) of each banner, only the tail
+        # of the output of an instance is kept
+        segments: list[tuple[int, float, RunOutput]] = []
+
+        def _on_line(line: str):
+            if match := banner.search(line):
+                segments.append((int(match.group(1)), time.monotonic(), RunOutput(tail_size=tail_size)))
+            elif segments:
+                segments[-1][2].feed(line)
+
+        data = self._run_verification(run_args, timeout=total_timeout, on_line=_on_line)
+        end_t = time.monotonic()
+
+        outcomes: list[CompleteVerificationData | None] = [None] * len(instances)
+        exited_cleanly = data.returncode == 0
+
+        for n, (index, start_t, segment_output) in enumerate(segments):
+            is_last = n == len(segments) - 1
+
+            if not 0 <= index < len(instances) or (is_last and not exited_cleanly):
+                continue
+
+            stop_t = segments[n + 1][1] if not is_last else end_t
+            output = segment_output.tail()
+            result, counter_example = self._parse_result(output, None)
+            took = stop_t - start_t
+
+            if result == "TIMEOUT":
+                took = instances[index].timeout
+
+            outcomes[index] = CompleteVerificationData(result, took, counter_example, stdout=output)
+
+        return outcomes
+
+    def _allocated_cpus(self) -> list[int] | None:
+        if self._cpu_gpu_allocation is None:
+            return None
+
+        low, high = self._cpu_gpu_allocation[0:2]
+        return list(range(low, high + 1))
+
+    def _allocated_gpu_env(self) -> dict[str, str]:
+        if self._cpu_gpu_allocation is None:
+            return {}
 
         gpu_dev = self._cpu_gpu_allocation[2]
+
+        if gpu_dev < 0:
+            return {}
+
         gpus = nvidia_gpu_count()
 
         if gpu_dev > gpus - 1:
             raise ValueError(f"Asked for GPU {gpu_dev} (0-indexed), but only found {gpus} GPU(s)")
 
-        if gpu_dev >= 0:
-            contexts.append(environment(CUDA_VISIBLE_DEVICES=str(gpu_dev)))
+        return {"CUDA_VISIBLE_DEVICES": str(gpu_dev)}
 
-        for line in run_cmd.splitlines():
-            line = line.lstrip()
-            if len(line) == 0 or line.isspace():
-                continue
+    def _get_launch_spec(
+        self,
+        *,
+        timeout: float | None = None,
+        cgroup: RunCgroup | None = None,
+    ) -> LaunchSpec:
+        """Everything the tool is launched with, without touching this process.
 
-            # HACK: Why does taskset not work with `source` and `conda`?
-            if line.startswith("source") or line.startswith("conda"):
-                lines.append(line)
-            else:
-                lines.append(taskset_cmd + " " + line)
+        Args:
+            timeout: Timeout of the run, to derive the CPU time limit from.
+            cgroup: The cgroup of the run, which then enforces the memory
+                limit instead of `RLIMIT_AS`.
+        """
+        config = get_config()
+        env = self.resolved_env.activate({**os.environ, **self.launch_env})
+        env.update(self._allocated_gpu_env())
+        cpus = self._allocated_cpus()
+        cpu_time_limit: int | None = None
+
+        # A tool may use all of its cores for the whole timeout, plus the
+        # grace period it gets to shut down
+        if config.limit_cpu_time and timeout is not None:
+            cpu_time_limit = math.ceil((timeout + config.kill_grace_sec) * (len(cpus) if cpus else cpu_count()))
+
+        return LaunchSpec(
+            cwd=self.working_dir,
+            env=env,
+            cpus=cpus,
+            memory_limit_mb=self._get_memory_limit() if cgroup is None else None,
+            cpu_time_limit=cpu_time_limit,
+            cgroup=cgroup.path if cgroup is not None else None,
+        )
 
-        return "\n".join(lines)
+    def _new_cgroup(self) -> RunCgroup | None:
+        """The cgroup of a new run, if cgroups are configured."""
+        cgroup_path = get_config().cgroup_path
+
+        if cgroup_path is None:
+            return None
+
+        cpus = self._allocated_cpus()
+        return RunCgroup.create(
+            cgroup_path,
+            memory_limit_mb=self._get_memory_limit(),
+            cpus=len(cpus) if cpus else None,
+        )
+
+    def use_warm_worker(self, enabled: bool = True, *, max_jobs: int = DEFAULT_MAX_JOBS):
+        """Run verifications in a long-lived warm worker.
+
+        The worker activates the environment and imports the heavy modules
+        of the tool once, then forks a fresh process for every verification.
+        Workers are shared between all verifier objects of the same tool and
+        are recycled after `max_jobs` verifications or when they crash.
+        Results and timeout semantics are the same as without a worker.
+
+        Args:
+            enabled: Use a warm worker or not. If this is never called, the
+                `warm_workers` option of the auto-verify config is used.
+            max_jobs: Number of verifications after which a worker is
+                replaced by a fresh one.
+        """
+        self._warm_worker = enabled
+        self._warm_max_jobs = max_jobs
+
+    def use_result_cache(self, enabled: bool = True, *, cache: ResultCache | None = None):
+        """Reuse results of identical verification queries.
+
+        Queries are identical if the network and property files have the same
+        contents and the configuration, init attributes and installed commit
+        of the verifier are the same. See `ResultCache` for how timeouts are
+        handled.
+
+        Args:
+            enabled: Use the cache or not. If this is never called, the
+                `result_cache` option of the auto-verify config is used.
+            cache: The cache to use, defaults to the one configured in the
+                auto-verify config.
+        """
+        self._use_result_cache = enabled
+        self._result_cache = cache
+
+    def use_early_stop(self, enabled: bool = True):
+        """Stop the tool as soon as its output announces the final verdict.
+
+        Tools often spend a while tearing down (e.g. releasing CUDA) after
+        printing their verdict. With early stopping the tool is killed right
+        after the verdict line and the time until that line is reported.
+        Only verifiers that implement `_detect_verdict` stop early.
+
+        Args:
+            enabled: Stop early or not. If this is never called, the
+                `stop_on_verdict` option of the auto-verify config is used.
+        """
+        self._early_stop = enabled
+
+    def use_memory_limit(self, limit_mb: int | None):
+        """Limit the memory every run of this verifier may use.
+
+        Without a cgroup (see the `cgroup_path` config option) the limit is
+        set as `RLIMIT_AS` on every process of the tool, which counts virtual
+        memory. Tools using CUDA reserve a lot of virtual memory, so these
+        need a cgroup to be limited. Runs that exceed the limit result in a
+        `MEMOUT`.
+
+        Args:
+            limit_mb: The limit in MiB, `None` to not limit the memory. If
+                this is never called, the `memory_limit_mb` option of the
+                auto-verify config is used.
+        """
+        self._memory_limit_mb = limit_mb if limit_mb is not None else 0
+
+    def _get_memory_limit(self) -> int | None:
+        limit = self._memory_limit_mb
+
+        if limit is None:
+            limit = get_config().memory_limit_mb
+
+        return limit or None
+
+    def _uses_early_stop(self) -> bool:
+        if self._early_stop is None:
+            return get_config().stop_on_verdict
+
+        return self._early_stop
+
+    def _new_run_output(self) -> RunOutput:
+        """Output of a new run, as configured in the auto-verify config."""
+        config = get_config()
+        log_dir = config.output_log_path
+        log_file = new_log_file(log_dir, self.name) if log_dir is not None else None
+
+        return RunOutput(
+            detect=self._detect_verdict,
+            tail_size=config.output_tail_kb * 1024,
+            log_file=log_file,
+        )
+
+    def _get_result_cache(self) -> ResultCache | None:
+        enabled = self._use_result_cache
+
+        if enabled is None:
+            enabled = get_config().result_cache
+
+        if not enabled:
+            return None
+
+        return self._result_cache or get_default_result_cache()
+
+    def _uses_warm_worker(self) -> bool:
+        if self._warm_worker is None:
+            return get_config().warm_workers
+
+        return self._warm_worker
+
+    def _launch_warm(
+        self,
+        run_args: list[str],
+        stack: ExitStack,
+        spec: LaunchSpec,
+    ) -> WarmProcess:
+        """Launch the verification in a warm worker."""
+        resolved_env = self.resolved_env
+        key = WarmWorkerKey(self.name, str(resolved_env.prefix), str(spec.cwd))
+        max_jobs = self._warm_max_jobs or get_config().warm_worker_max_jobs
+        worker = warm_worker_pool.acquire(
+            key,
+            python=str(resolved_env.python),
+            env=spec.env,
+            preload=self._warm_preload,
+            max_jobs=max_jobs,
+        )
+        stack.callback(warm_worker_pool.release, key, worker)
+
+        return worker.launch(
+            run_args,
+            cwd=spec.cwd,
+            env=spec.env,
+            cpus=spec.cpus,
+            rlimits=spec.rlimits(),
+            cgroup=spec.cgroup,
+        )
+
+    def _launch(self, run_args: list[str], spec: LaunchSpec) -> subprocess.Popen[str]:
+        """Launch the tool's interpreter directly, without a shell."""
+        return subprocess.Popen(
+            spec.command([str(self.resolved_env.python), *run_args]),
+            cwd=spec.cwd,
+            env=spec.env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            start_new_session=True,
+        )
 
     def set_timeout_event(self):
-        """Signal that the process has timed out."""
-        with suppress(AttributeError):
-            self._timeout_event.set()  # type: ignore
+        """Cancel all runs of this verifier that are still active."""
+        with self._active_runs_lock:
+            runs = list(self._active_runs)
 
-    def _run_verification(
+        for run in runs:
+            run.cancel()
+
+    def _start_run(
         self,
-        run_cmd: str,
+        run_args: list[str],
         *,
-        result_file: Path | None = None,
-        timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
-    ) -> CompleteVerificationData:
+        timeout: float,
+        finish: Callable[..., Any],
+        stop_on_verdict: bool = False,
+        on_line: Callable[[str], None] | None = None,
+        warm: bool | None = None,
+        workspace: RunWorkspace | None = None,
+    ) -> VerificationRun[Any]:
+        """Launch the tool and return the handle tracking it.
+
+        Args:
+            run_args: Arguments for the tool's interpreter.
+            timeout: Seconds after which the tool is killed.
+            finish: Makes the result of the run, see `VerificationRun`.
+            stop_on_verdict: Kill the tool once the verdict was detected.
+            on_line: Called with every line of output as it is read.
+            warm: Use a warm worker, defaults to `use_warm_worker`.
+            workspace: Workspace of the run, closed once its result is made.
+        """
         contexts = self.contexts or []
-        output_lines: list[str] = []
-        result: str = ""
+        process: subprocess.Popen[str] | WarmProcess
+
+        # The stack is closed by the run, once the tool exited
+        stack = ExitStack()
 
-        if self._cpu_gpu_allocation is not None:
-            run_cmd = self._allocate_run_cmd(run_cmd, contexts)
+        if workspace is not None:
+            stack.callback(workspace.close)
 
-        with ExitStack() as stack:
+        try:
             for context in contexts:
                 stack.enter_context(context)
 
-            process = subprocess.Popen(
-                run_cmd,
-                executable="/bin/bash",
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                shell=True,
-                universal_newlines=True,
-                preexec_fn=os.setsid,
-            )
+            cgroup = self._new_cgroup()
+
+            if cgroup is not None:
+                stack.callback(cgroup.remove)
 
-            before_t = time.time()
-            self._timeout_event: threading.Event | None = threading.Event()
+            spec = self._get_launch_spec(timeout=timeout, cgroup=cgroup)
 
-            def _terminate(timeout_sec):
-                assert self._timeout_event
-                on_time = self._timeout_event.wait(timeout_sec)
+            if warm if warm is not None else self._uses_warm_worker():
+                process = self._launch_warm(run_args, stack, spec)
+            else:
+                process = self._launch(run_args, spec)
+        except BaseException:
+            stack.close()
+            raise
+
+        run: VerificationRun[Any]
+
+        def _on_exit():
+            with self._active_runs_lock:
+                self._active_runs.discard(run)
+
+            stack.close()
+
+        with self._active_runs_lock:
+            run = VerificationRun(
+                process,
+                timeout=timeout,
+                finish=finish,
+                output=self._new_run_output(),
+                stop_on_verdict=stop_on_verdict,
+                on_line=on_line,
+                on_exit=_on_exit,
+                kill_grace=get_config().kill_grace_sec,
+                cgroup=cgroup,
+            )
+            self._active_runs.add(run)
 
-                if not on_time:
-                    global result
-                    result = "TIMEOUT"  # type: ignore
+        return run
 
-                if pid_exists(process.pid):
-                    os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+    def _run_verification(
+        self,
+        run_args: list[str],
+        *,
+        result_file: Path | None = None,
+        timeout: int = DEFAULT_VERIFICATION_TIMEOUT_SEC,
+        on_line: Callable[[str], None] | None = None,
+        warm: bool | None = None,
+        workspace: RunWorkspace | None = None,
+    ) -> CompleteVerificationData:
+        def _finish(
+            output: RunOutput,
+            return_code: int,
+            *,
+            timed_out: bool,
+            cancelled: bool,
+            memout: bool,
+            took: float,
+            usage: ResourceUsage,
+        ) -> CompleteVerificationData:
+            return self._finish_run(
+                output,
+                return_code,
+                timed_out=timed_out or cancelled,
+                memout=memout,
+                took=took,
+                result_file=result_file,
+                usage=usage,
+            )
 
-            t = threading.Thread(target=_terminate, args=[timeout])
-            t.start()
+        run: VerificationRun[CompleteVerificationData] = self._start_run(
+            run_args,
+            timeout=timeout,
+            finish=_finish,
+            on_line=on_line,
+            warm=warm,
+            workspace=workspace,
+        )
+        return run.wait()
 
-            assert process.stdout
+    def _finish_run(
+        self,
+        output: RunOutput,
+        return_code: int,
+        *,
+        timed_out: bool,
+        took: float,
+        result_file: Path | None,
+        memout: bool = False,
+        usage: ResourceUsage | None = None,
+    ) -> CompleteVerificationData:
+        """Turn the output and exit status of a tool run into its outcome.
 
-            for line in iter(process.stdout.readline, ""):
-                output_lines.append(line)
+        A run is a `MEMOUT` if the kernel killed it for exceeding the memory
+        limit of its cgroup (`memout`), or if it failed to allocate memory
+        while `RLIMIT_AS` was set. Exceeding the CPU time limit is a
+        `TIMEOUT`.
+        """
+        result: VerificationResultString
+        counter_example: str | None = None
+        tail = output.tail()
+
+        if memout or (return_code != 0 and self._get_memory_limit() is not None and _OUT_OF_MEMORY.search(tail)):
+            result = "MEMOUT"
+        elif timed_out or return_code == -signal.SIGXCPU:
+            result = "TIMEOUT"
+        elif return_code > 0:
+            result = "ERR"
+        else:
+            result, counter_example = self._parse_result(tail, result_file)
+
+            # The verdict line may no longer be in the tail of long outputs
+            if result == "TIMEOUT" and output.verdict in ("SAT", "UNSAT"):
+                result = output.verdict
+
+        return CompleteVerificationData(
+            result,
+            took,
+            counter_example,
+            err="",  # TODO: Remove err field; its piped it to stdout
+            stdout=tail,
+            returncode=return_code,
+            log_file=output.log_file,
+            usage=usage,
+        )
 
-            process.stdout.close()
-            return_code = process.wait()
-            took_t = time.time() - before_t
-            self._timeout_event.set()
 
-            output_str = "".join(output_lines)
-            counter_example: str | None = None
+async def _await_run(run: VerificationRun[T]) -> T:
+    """Wait for the result of a run without blocking the event loop.
 
-            if result != "TIMEOUT":
-                if return_code > 0:
-                    result = "ERR"
-                else:
-                    result, counter_example = self._parse_result(output_str, result_file)
+    Every run is waited for by a thread of its own, with a shared executor
+    runs that finished would wait for a thread that is free. If the waiting
+    task is cancelled, the run is cancelled and the task only gives up once
+    the tool was killed and reaped.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1)
 
-            self._timeout_event = None
+    try:
+        return await loop.run_in_executor(executor, run.wait)
+    except asyncio.CancelledError:
+        run.cancel()
 
-            return CompleteVerificationData(
-                result,  # type: ignore
-                took_t,
-                counter_example,
-                "",  # TODO: Remove err field; its piped it to stdout
-                output_str,
-            )
+        # The result of a cancelled run is of no use to anyone
+        with suppress(Exception):
+            await loop.run_in_executor(executor, run.wait)
 
-        raise RuntimeError("Exception during handling of verification")
+        raise
+    finally:
+        executor.shutdown(wait=False)
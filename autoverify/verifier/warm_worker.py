@@ -0,0 +1,305 @@
+"""Long-lived warm workers for verifiers.
+
+Launching a verifier normally means starting a new Python interpreter that
+imports torch and the tool for every single instance. A `WarmWorker` pays that cost once: it keeps
+an interpreter with the tool's heavy modules imported alive and forks it for
+every job (see `warm_worker_main.py`). The forked job runs in its own session,
+so it can be killed exactly like a normally launched verifier process.
+"""
+
+import array
+import atexit
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import threading
+from collections.abc import Iterable, Mapping, Sequence
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+from autoverify.util.proc import pid_exists
+
+logger = logging.getLogger(__name__)
+
+WORKER_MAIN = Path(__file__).resolve().parent / "warm_worker_main.py"
+DEFAULT_MAX_JOBS = 100
+_MAX_IDLE_PER_KEY = 4
+
+
+class WarmWorkerError(Exception):
+    """Raised when a warm worker could not start or died unexpectedly."""
+
+
+@dataclass(frozen=True)
+class WarmWorkerKey:
+    """Identifies which worker can serve a job.
+
+    Attributes:
+        verifier: Name of the verifier.
+        env: Prefix of the environment the worker runs in.
+        cwd: Directory the worker imports the tool from.
+    """
+
+    verifier: str
+    env: str
+    cwd: str
+
+
+class WarmProcess:
+    """A job running in a warm worker, mimics the parts of `Popen` we use."""
+
+    def __init__(self, worker: "WarmWorker", pid: int, stdout: IO[str]):
+        """New instance, use `WarmWorker.launch` instead."""
+        self._worker = worker
+        self.pid = pid
+        self.stdout = stdout
+        self.returncode: int | None = None
+        self.rusage: dict[str, float] | None = None
+
+    def wait(self) -> int:
+        """Wait for the job to exit and return its return code.
+
+        Afterwards, `rusage` holds the `utime`, `stime` and `maxrss` (KiB) of
+        the job, as measured by the worker, if the worker did not crash.
+        """
+        if self.returncode is None:
+            self.returncode, self.rusage = self._worker._wait_job(self.pid)
+
+        return self.returncode
+
+
+class WarmWorker:
+    """A single warm worker process serving one job at a time."""
+
+    def __init__(
+        self,
+        cwd: Path,
+        *,
+        python: str = "python",
+        env: Mapping[str, str] | None = None,
+        preload: Iterable[str] = (),
+        max_jobs: int = DEFAULT_MAX_JOBS,
+    ):
+        """Spawn a new worker.
+
+        Arguments:
+            cwd: Directory the worker is started in and imports from.
+            python: The Python executable of the tool environment.
+            env: Environment of the worker, should be the activated tool
+                environment. Defaults to `os.environ`.
+            preload: Modules that are imported once by the worker.
+            max_jobs: Number of jobs after which the worker is recycled.
+        """
+        self.jobs_done = 0
+        self.max_jobs = max_jobs
+        self._busy = False
+        self._buffer = b""
+        self._sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        argv = [python, str(WORKER_MAIN), str(child_sock.fileno()), str(cwd), ",".join(preload)]
+
+        try:
+            self._process = subprocess.Popen(
+                argv,
+                cwd=str(cwd),
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=[child_sock.fileno()],
+                start_new_session=True,
+            )
+        finally:
+            child_sock.close()
+
+        ready = self._recv()
+
+        if ready is None or ready.get("event") != "ready":
+            self.close()
+            raise WarmWorkerError(f"Warm worker failed to start in {cwd}")
+
+        if ready["failed"]:
+            logger.warning(f"Warm worker could not preload {ready['failed']}")
+
+    @property
+    def alive(self) -> bool:
+        """If the worker process is still running."""
+        return self._process.poll() is None
+
+    @property
+    def exhausted(self) -> bool:
+        """If the worker served its maximum number of jobs."""
+        return self.jobs_done >= self.max_jobs
+
+    def launch(
+        self,
+        argv: Sequence[str],
+        *,
+        cwd: Path,
+        env: dict[str, str],
+        cpus: Sequence[int] | None = None,
+        rlimits: dict[int, tuple[int, int]] | None = None,
+        cgroup: Path | None = None,
+    ) -> WarmProcess:
+        """Start a job in the worker.
+
+        Arguments:
+            argv: Arguments passed to the Python interpreter, e.g.
+                `["abcrown.py", "--config", "cfg.yaml"]` or
+                `["-m", "nnenum.nnenum", ...]`.
+            cwd: Working directory of the job.
+            env: The complete environment of the job.
+            cpus: CPUs the job is pinned to.
+            rlimits: Resource limits of the job, by `resource.RLIMIT_*`.
+            cgroup: Directory of the cgroup the job is moved into.
+
+        Returns:
+            WarmProcess: Handle to the running job.
+        """
+        read_fd, write_fd = os.pipe()
+        job = {
+            "argv": list(argv),
+            "cwd": str(cwd),
+            "env": env,
+            "cpus": list(cpus) if cpus else None,
+            "rlimits": [[limit, *value] for limit, value in (rlimits or {}).items()],
+            "cgroup": str(cgroup) if cgroup is not None else None,
+        }
+
+        try:
+            data = (json.dumps(job) + "\n").encode()
+            fds = array.array("i", [write_fd])
+            self._sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+            started = self._recv()
+        except OSError as err:
+            os.close(read_fd)
+            raise WarmWorkerError("Could not send job to warm worker") from err
+        finally:
+            os.close(write_fd)
+
+        if started is None or started.get("event") != "started":
+            os.close(read_fd)
+            raise WarmWorkerError(f"Warm worker did not start the job: {started}")
+
+        self.jobs_done += 1
+        self._busy = True
+        return WarmProcess(self, started["pid"], open(read_fd, encoding="utf-8", errors="replace"))
+
+    def _wait_job(self, pid: int) -> tuple[int, dict[str, float] | None]:
+        self._busy = False
+
+        try:
+            msg = self._recv()
+        except OSError:
+            msg = None
+
+        if msg is None or msg.get("event") != "exit":
+            # The worker died while the job was running, make sure the
+            # orphaned job does not keep running.
+            if pid_exists(pid):
+                with suppress(ProcessLookupError, PermissionError):
+                    os.killpg(pid, signal.SIGKILL)
+
+            self.close()
+            return -signal.SIGKILL, None
+
+        return int(msg["returncode"]), msg.get("rusage")
+
+    def _recv(self) -> dict[str, Any] | None:
+        while b"\n" not in self._buffer:
+            chunk = self._sock.recv(65536)
+
+            if not chunk:
+                return None
+
+            self._buffer += chunk
+
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        msg: dict[str, Any] = json.loads(line.decode())
+        return msg
+
+    def close(self):
+        """Shut down the worker."""
+        with suppress(OSError):
+            self._sock.close()
+
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            with suppress(ProcessLookupError, PermissionError):
+                os.killpg(self._process.pid, signal.SIGKILL)
+            self._process.wait()
+
+
+class WarmWorkerPool:
+    """Pool of idle warm workers, keyed by `WarmWorkerKey`."""
+
+    def __init__(self, max_idle_per_key: int = _MAX_IDLE_PER_KEY):
+        """Create a new, empty pool."""
+        self._idle: dict[WarmWorkerKey, list[WarmWorker]] = {}
+        self._lock = threading.Lock()
+        self._max_idle = max_idle_per_key
+
+    def acquire(
+        self,
+        key: WarmWorkerKey,
+        *,
+        python: str = "python",
+        env: Mapping[str, str] | None = None,
+        preload: Iterable[str] = (),
+        max_jobs: int = DEFAULT_MAX_JOBS,
+    ) -> WarmWorker:
+        """Get an idle worker for the key or spawn a new one."""
+        with self._lock:
+            idle = self._idle.get(key, [])
+
+            while idle:
+                worker = idle.pop()
+
+                if worker.alive and not worker.exhausted:
+                    worker.max_jobs = max_jobs
+                    return worker
+
+                worker.close()
+
+        return WarmWorker(
+            Path(key.cwd),
+            python=python,
+            env=env,
+            preload=preload,
+            max_jobs=max_jobs,
+        )
+
+    def release(self, key: WarmWorkerKey, worker: WarmWorker):
+        """Return a worker to the pool, recycling it if needed."""
+        if worker._busy or not worker.alive or worker.exhausted:
+            logger.debug(f"Recycling warm worker for {key.verifier}")
+            worker.close()
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+
+            if len(idle) < self._max_idle:
+                idle.append(worker)
+                return
+
+        worker.close()
+
+    def shutdown(self):
+        """Close all idle workers."""
+        with self._lock:
+            workers = [w for idle in self._idle.values() for w in idle]
+            self._idle.clear()
+
+        for worker in workers:
+            worker.close()
+
+
+warm_worker_pool = WarmWorkerPool()
+atexit.register(warm_worker_pool.shutdown)
@@ -0,0 +1,191 @@
+"""Entry point of a warm verifier worker.
+
+This file is executed by the Python interpreter of a verifier's environment,
+so it must not import anything from `autoverify` and should only use the
+standard library. The worker imports the heavy modules of a tool once and then
+forks a fresh child for every job it receives over its control socket. The
+forked child inherits the already imported modules, runs the tool's entry
+point and writes its output to the pipe that was sent along with the job.
+
+Messages are newline delimited JSON. A job message carries the write end of
+the output pipe as `SCM_RIGHTS` ancillary data.
+"""
+
+import array
+import importlib
+import json
+import os
+import resource
+import runpy
+import signal
+import socket
+import sys
+import traceback
+from contextlib import suppress
+
+_MAX_FDS = 4
+
+
+def _send(sock, message):
+    sock.sendall((json.dumps(message) + "\n").encode())
+
+
+def _recv(sock, buffer):
+    """Receive one message and the file descriptors that came with it."""
+    fds: list[int] = []
+
+    while b"\n" not in buffer:
+        msg, ancdata, _, _ = sock.recvmsg(65536, socket.CMSG_SPACE(_MAX_FDS * array.array("i").itemsize))
+
+        for level, type_, data in ancdata:
+            if level == socket.SOL_SOCKET and type_ == socket.SCM_RIGHTS:
+                fd_array = array.array("i")
+                fd_array.frombytes(data[: len(data) - (len(data) % fd_array.itemsize)])
+                fds.extend(fd_array)
+
+        if not msg:
+            return None, fds, buffer
+
+        buffer += msg
+
+    line, buffer = buffer.split(b"\n", 1)
+    return json.loads(line.decode()), fds, buffer
+
+
+def _preload(modules):
+    failed = []
+
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            failed.append(module)
+
+    return failed
+
+
+def _run_job(job, out_fd):
+    """Runs in the forked child, never returns."""
+    code = 1
+
+    try:
+        os.setsid()
+
+        if job.get("cgroup"):
+            with open(os.path.join(job["cgroup"], "cgroup.procs"), "w") as f:
+                f.write(str(os.getpid()))
+
+        for limit, soft, hard in job.get("rlimits") or []:
+            resource.setrlimit(limit, (soft, hard))
+
+        for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+
+        os.dup2(out_fd, 1)
+        os.dup2(out_fd, 2)
+        os.close(out_fd)
+
+        os.chdir(job["cwd"])
+        os.environ.clear()
+        os.environ.update(job["env"])
+
+        if job.get("cpus"):
+            os.sched_setaffinity(0, job["cpus"])
+
+        argv = job["argv"]
+
+        if argv[0] == "-m":
+            sys.argv = [argv[1]] + argv[2:]
+            runpy.run_module(argv[1], run_name="__main__", alter_sys=True)
+        else:
+            sys.argv = list(argv)
+            sys.path.insert(0, os.path.dirname(os.path.abspath(argv[0])))
+            runpy.run_path(argv[0], run_name="__main__")
+
+        code = 0
+    except SystemExit as err:
+        if err.code is None:
+            code = 0
+        elif isinstance(err.code, int):
+            code = err.code
+        else:
+            print(err.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _returncode(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+
+    return os.WEXITSTATUS(status)
+
+
+def main():
+    """Serve jobs until the control socket is closed."""
+    ctrl_fd = int(sys.argv[1])
+    work_dir = sys.argv[2]
+    modules = [m for m in sys.argv[3].split(",") if m]
+
+    sock = socket.socket(fileno=ctrl_fd)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    os.chdir(work_dir)
+    sys.path.insert(0, work_dir)
+    failed = _preload(modules)
+
+    _send(sock, {"event": "ready", "pid": os.getpid(), "failed": failed})
+    buffer = b""
+
+    while True:
+        job, fds, buffer = _recv(sock, buffer)
+
+        if job is None:
+            break
+
+        if len(fds) != 1:
+            for fd in fds:
+                os.close(fd)
+
+            _send(sock, {"event": "error", "message": "Expected exactly one output fd"})
+            continue
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+
+        if pid == 0:
+            sock.close()
+            _run_job(job, fds[0])
+
+        os.close(fds[0])
+        _send(sock, {"event": "started", "pid": pid})
+
+        # Kill what the job left behind before reaping it, so its pid (and
+        # process group id) can not be reused by an unrelated process yet
+        os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+
+        with suppress(OSError):
+            os.killpg(pid, signal.SIGTERM)
+
+        _, status, rusage = os.wait4(pid, 0)
+        _send(
+            sock,
+            {
+                "event": "exit",
+                "returncode": _returncode(status),
+                "rusage": {"utime": rusage.ru_utime, "stime": rusage.ru_stime, "maxrss": rusage.ru_maxrss},
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from .eval_verifier import eval_verifier
+from .eval_verifier import aiter_eval_verifier, eval_verifier, iter_eval_verifier
 
-__all__ = ["eval_verifier"]
+__all__ = ["eval_verifier", "iter_eval_verifier", "aiter_eval_verifier"]
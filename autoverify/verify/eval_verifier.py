@@ -6,17 +6,23 @@ verifier, collecting detailed results about the verification run.
 
 import copy
 import logging
+from collections.abc import AsyncIterator, Callable, Iterator
 from pathlib import Path
 
 from ConfigSpace import Configuration
 from result import Err, Ok
 
 from autoverify.util.instances import (
+    ResultKey,
     VerificationDataResult,
     csv_append_verification_result,
     init_verification_result_csv,
     read_vnncomp_instances,
+    resume_verification_result_csv,
+    usage_fields,
+    verification_result_key,
 )
+from autoverify.util.results_store import ResultsStore
 from autoverify.util.verification_instance import VerificationInstance
 from autoverify.util.verifiers import verifier_from_name
 from autoverify.util.vnncomp import (
@@ -24,6 +30,7 @@ from autoverify.util.vnncomp import (
     inst_bench_verifier_config,
 )
 from autoverify.verifier import Nnenum
+from autoverify.verifier.verification_result import CompleteVerificationResult
 from autoverify.verifier.verifier import CompleteVerifier
 
 logger = logging.getLogger(__name__)
@@ -52,13 +59,38 @@ def _warmup(
     logger.info("Finished warmup run")
 
 
-def eval_instance(
+def _open_output_csv(
+    output_csv_path: Path | None,
+    resume: bool,
+    results_store: ResultsStore | None = None,
+) -> set[ResultKey]:
+    """Create the output csv, or index the results already written when resuming."""
+    done: set[ResultKey] = set()
+
+    if resume and results_store is not None:
+        done.update(results_store.verdicts())
+
+    if output_csv_path is not None:
+        if resume:
+            done.update(result.key for result in resume_verification_result_csv(output_csv_path))
+        else:
+            init_verification_result_csv(output_csv_path)
+
+    if resume:
+        logger.info(f"Resuming, {len(done)} results were written already")
+
+    return done
+
+
+def _instance_key(verifier: str, instance: VerificationInstance, config: Configuration | Path | None) -> ResultKey:
+    return verification_result_key(instance.network.name, instance.property.name, instance.timeout, verifier, config)
+
+
+def _log_instance(
     verifier: CompleteVerifier,
     instance: VerificationInstance,
-    *,
-    config: Configuration | Path | None = None,
-) -> VerificationDataResult:
-    """_summary_."""
+    config: Configuration | Path | None,
+):
     logger.info(
         f"\nVerifying property {instance.property.name} on "
         f"{instance.network.name} with verifier {verifier.name} and "
@@ -66,6 +98,13 @@ def eval_instance(
         f"(timeout = {instance.timeout} sec.)"
     )
 
+
+def _to_data_result(
+    verifier: CompleteVerifier,
+    instance: VerificationInstance,
+    config: Configuration | Path | None,
+    result: CompleteVerificationResult,
+) -> VerificationDataResult:
     static_data = (
         instance.network.name,
         instance.property.name,
@@ -74,8 +113,6 @@ def eval_instance(
         str(config),
     )
 
-    result = verifier.verify_instance(instance, config=config)
-
     if isinstance(result, Ok):
         logger.info("Verification finished succesfully.")
         unwrap_result = result.unwrap()
@@ -89,6 +126,7 @@ def eval_instance(
             unwrap_result.counter_example,
             unwrap_result.err,
             unwrap_result.stdout,
+            **usage_fields(unwrap_result.usage),
         )
     elif isinstance(result, Err):
         unwrap_result = result.unwrap_err()
@@ -103,11 +141,38 @@ def eval_instance(
             None,
             unwrap_result.err,
             unwrap_result.stdout,
+            **usage_fields(unwrap_result.usage),
         )
 
     raise RuntimeError("Result should be Ok | Err")
 
 
+def eval_instance(
+    verifier: CompleteVerifier,
+    instance: VerificationInstance,
+    *,
+    config: Configuration | Path | None = None,
+) -> VerificationDataResult:
+    """_summary_."""
+    _log_instance(verifier, instance, config)
+    result = verifier.verify_instance(instance, config=config)
+
+    return _to_data_result(verifier, instance, config, result)
+
+
+async def aeval_instance(
+    verifier: CompleteVerifier,
+    instance: VerificationInstance,
+    *,
+    config: Configuration | Path | None = None,
+) -> VerificationDataResult:
+    """Same as `eval_instance`, but runs the verifier asynchronously."""
+    _log_instance(verifier, instance, config)
+    result = await verifier.averify_instance(instance, config=config)
+
+    return _to_data_result(verifier, instance, config, result)
+
+
 # TODO: make vnncompat a param for `eval_verifier`
 # that probably means the `verifier` param needs to become a `str`
 # or maybe make it a param in one of the other functions
@@ -119,14 +184,15 @@ def eval_verifier_vnncompat(
     *,
     warmup: bool = True,
     output_csv_path: Path | None = None,
+    resume: bool = False,
+    results_store: ResultsStore | None = None,
 ) -> dict[VerificationInstance, VerificationDataResult]:  # pragma: no cover
     """_summary_."""
     results: dict[VerificationInstance, VerificationDataResult] = {}
+    done = _open_output_csv(output_csv_path, resume, results_store)
+    instances = [inst for inst in instances if _instance_key(verifier, inst, config) not in done]
 
-    if output_csv_path is not None:
-        init_verification_result_csv(output_csv_path)
-
-    if warmup:
+    if warmup and instances:
         _warmup(verifier, instances[0], config)
 
     for instance in instances:
@@ -138,40 +204,172 @@ def eval_verifier_vnncompat(
 
         if output_csv_path is not None:
             csv_append_verification_result(result, output_csv_path)
+        if results_store is not None:
+            results_store.append(result)
+
+    if results_store is not None:
+        results_store.flush()
 
     return results
 
 
-def eval_verifier(
+def _prepare_eval(
     verifier: CompleteVerifier,
     instances: list[VerificationInstance],
     config: Configuration | Path | None,
     *,
-    warmup: bool = True,
-    use_simplified_network: bool = False,
-    output_csv_path: Path | None = None,
-) -> dict[VerificationInstance, VerificationDataResult]:
-    """_summary_."""
-    results: dict[VerificationInstance, VerificationDataResult] = {}
-
-    if output_csv_path is not None:
-        init_verification_result_csv(output_csv_path)
+    warmup: bool,
+    use_simplified_network: bool,
+    output_csv_path: Path | None,
+    resume: bool,
+    results_store: ResultsStore | None,
+) -> list[VerificationInstance]:
+    """Returns the instances that still need to be verified."""
+    done = _open_output_csv(output_csv_path, resume, results_store)
 
     if use_simplified_network:
         for i, instance in enumerate(instances):
             instances[i] = instance.as_simplified_network()
 
-    if warmup:
-        _warmup(verifier, instances[0], config)
+    pending = [instance for instance in instances if _instance_key(verifier.name, instance, config) not in done]
 
-    for instance in instances:
+    if warmup and pending:
+        _warmup(verifier, pending[0], config)
+
+    return pending
+
+
+def iter_eval_verifier(
+    verifier: CompleteVerifier,
+    instances: list[VerificationInstance],
+    config: Configuration | Path | None,
+    *,
+    warmup: bool = True,
+    use_simplified_network: bool = False,
+    output_csv_path: Path | None = None,
+    resume: bool = False,
+    results_store: ResultsStore | None = None,
+) -> Iterator[tuple[VerificationInstance, VerificationDataResult]]:
+    """Same as `eval_verifier`, but yields every result as soon as it is known.
+
+    Yields:
+        The instance and the result of verifying it, in the order of
+        `instances`. Each result is written to `output_csv_path` before it is
+        yielded. When resuming, instances that already have a result in
+        `output_csv_path` or `results_store` are skipped.
+    """
+    pending = _prepare_eval(
+        verifier,
+        instances,
+        config,
+        warmup=warmup,
+        use_simplified_network=use_simplified_network,
+        output_csv_path=output_csv_path,
+        resume=resume,
+        results_store=results_store,
+    )
+
+    for instance in pending:
         result = eval_instance(verifier, instance, config=config)
-        results[instance] = result
+        logger.info(f"Verification took {result.took} seconds.")
+
+        if output_csv_path is not None:
+            csv_append_verification_result(result, output_csv_path)
+        if results_store is not None:
+            results_store.append(result)
+
+        yield instance, result
+
+    if results_store is not None:
+        results_store.flush()
+
+
+async def aiter_eval_verifier(
+    verifier: CompleteVerifier,
+    instances: list[VerificationInstance],
+    config: Configuration | Path | None,
+    *,
+    warmup: bool = True,
+    use_simplified_network: bool = False,
+    output_csv_path: Path | None = None,
+    resume: bool = False,
+    results_store: ResultsStore | None = None,
+) -> AsyncIterator[tuple[VerificationInstance, VerificationDataResult]]:
+    """Same as `iter_eval_verifier`, but verifies asynchronously.
+
+    The warmup run is still run synchronously.
+    """
+    pending = _prepare_eval(
+        verifier,
+        instances,
+        config,
+        warmup=warmup,
+        use_simplified_network=use_simplified_network,
+        output_csv_path=output_csv_path,
+        resume=resume,
+        results_store=results_store,
+    )
 
+    for instance in pending:
+        result = await aeval_instance(verifier, instance, config=config)
         logger.info(f"Verification took {result.took} seconds.")
 
         if output_csv_path is not None:
             csv_append_verification_result(result, output_csv_path)
+        if results_store is not None:
+            results_store.append(result)
+
+        yield instance, result
+
+    if results_store is not None:
+        results_store.flush()
+
+
+def eval_verifier(
+    verifier: CompleteVerifier,
+    instances: list[VerificationInstance],
+    config: Configuration | Path | None,
+    *,
+    warmup: bool = True,
+    use_simplified_network: bool = False,
+    output_csv_path: Path | None = None,
+    resume: bool = False,
+    results_store: ResultsStore | None = None,
+    on_result: Callable[[VerificationInstance, VerificationDataResult], None] | None = None,
+) -> dict[VerificationInstance, VerificationDataResult]:
+    """Evaluate a verifier on the instances, one after the other.
+
+    Args:
+        verifier: The verifier to evaluate.
+        instances: The instances to verify.
+        config: Configuration of the verifier, the default if `None`.
+        warmup: Do a short run first, e.g. to compile kernels.
+        use_simplified_network: Verify the simplified networks instead.
+        output_csv_path: File every result is appended to.
+        resume: Continue a run that wrote to `output_csv_path` or
+            `results_store` before. Instances that already have a result
+            there are not verified again, and are not part of the returned
+            results.
+        results_store: Store every result is written to.
+        on_result: Called with each instance and its result as soon as the
+            instance was verified.
+    """
+    results: dict[VerificationInstance, VerificationDataResult] = {}
+
+    for instance, result in iter_eval_verifier(
+        verifier,
+        instances,
+        config,
+        warmup=warmup,
+        use_simplified_network=use_simplified_network,
+        output_csv_path=output_csv_path,
+        resume=resume,
+        results_store=results_store,
+    ):
+        results[instance] = result
+
+        if on_result is not None:
+            on_result(instance, result)
 
     return results
 
@@ -183,15 +381,15 @@ def eval_vnn_default(
     output_csv_path: Path,
     *,
     warmup: bool = True,
+    resume: bool = False,
 ) -> dict[VerificationInstance, VerificationDataResult]:  # pragma: no cover
     """_summary_."""
     results: dict[VerificationInstance, VerificationDataResult] = {}
+    done = _open_output_csv(output_csv_path, resume)
     instances = read_vnncomp_instances(benchmark, vnncomp_path)
+    instances = [inst for inst in instances if _instance_key(verifier, inst, None) not in done]
 
-    if output_csv_path is not None:
-        init_verification_result_csv(output_csv_path)
-
-    if warmup:
+    if warmup and instances:
         _warmup(verifier, instances[0], None)
 
     for inst in instances:
@@ -216,19 +414,22 @@ def eval_vnn_verifier(
     configs_dir: Path,
     *,
     warmup: bool = True,
+    resume: bool = False,
 ) -> dict[VerificationInstance, VerificationDataResult]:  # pragma: no cover
     """_summary_."""
     results: dict[VerificationInstance, VerificationDataResult] = {}
+    done = _open_output_csv(output_csv_path, resume)
     instances = read_vnncomp_instances(benchmark, vnncomp_path)
 
-    if output_csv_path is not None:
-        init_verification_result_csv(output_csv_path)
-
     if warmup:
         _warmup(verifier, instances[0], None)
 
     for inst in instances:
         cfg = inst_bench_verifier_config(benchmark, inst, verifier, configs_dir)
+
+        if _instance_key(verifier, inst, cfg) in done:
+            continue
+
         # HACK:
         if verifier == "verinet":
             verifier_inst = inst_bench_to_verifier(benchmark, inst, "verinet")
@@ -4,7 +4,7 @@ from pathlib import Path
 import pytest
 from pytest import MonkeyPatch
 
-from autoverify.cli.util.git import GitRepoInfo, clone_checkout_verifier
+from autoverify.cli.util.git import GitRepoInfo, clone_checkout_verifier, read_head_commit
 
 DUMMY_CLONE_URL = "https://github.com/example/repo.git"
 DUMMY_BRANCH = "main"
@@ -93,3 +93,21 @@ def test_clone_checkout_verifier_with_submodules(
 ):
     # TODO:
     clone_checkout_verifier(dummy_git_repo_info, mock_install_dir, init_submodules=True)
+
+
+def test_read_head_commit(tmp_path: Path):
+    git_dir = tmp_path / ".git"
+    (git_dir / "refs" / "heads").mkdir(parents=True)
+    commit = "0123456789abcdef0123456789abcdef01234567"
+
+    (git_dir / "HEAD").write_text(commit + "\n")
+    assert read_head_commit(tmp_path) == commit
+
+    (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+    (git_dir / "packed-refs").write_text(f"# pack-refs\n{commit} refs/heads/main\n")
+    assert read_head_commit(tmp_path) == commit
+
+    (git_dir / "refs" / "heads" / "main").write_text("f" * 40 + "\n")
+    assert read_head_commit(tmp_path) == "f" * 40
+
+    assert read_head_commit(tmp_path / "not_a_repo") is None
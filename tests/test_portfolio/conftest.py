@@ -1,7 +1,11 @@
+from pathlib import Path
+
 import pytest
 from ConfigSpace import Configuration, ConfigurationSpace
 
-from autoverify.portfolio.portfolio import ConfiguredVerifier, Portfolio
+from autoverify.portfolio.portfolio import ConfiguredVerifier, Portfolio, PortfolioScenario
+from autoverify.util.verification_instance import VerificationInstance
+from autoverify.util.verifiers import get_verifier_configspace
 
 
 @pytest.fixture
@@ -23,3 +27,20 @@ def portfolio(pf_cfg: Configuration, pf_cfg2: Configuration) -> Portfolio:
     pf.update_costs({"foobar": 7.0})
 
     return pf
+
+
+@pytest.fixture
+def nnenum_config() -> Configuration:
+    return get_verifier_configspace("nnenum").get_default_configuration()
+
+
+@pytest.fixture
+def hydra_scenario(trivial_instances: list[VerificationInstance], tmp_path: Path) -> PortfolioScenario:
+    return PortfolioScenario(
+        ["nnenum"],
+        [("nnenum", 0, 0)],
+        trivial_instances,
+        length=2,
+        seconds_per_iter=10.0,
+        output_dir=tmp_path / "hydra",
+    )
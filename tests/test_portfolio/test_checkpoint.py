@@ -0,0 +1,86 @@
+import random
+from pathlib import Path
+
+import pytest
+from ConfigSpace import Configuration
+
+from autoverify.portfolio.hydra.checkpoint import HydraCheckpoint, latest_checkpoint
+from autoverify.portfolio.hydra.cost_matrix import CostMatrix, InstanceCost
+from autoverify.portfolio.hydra.hydra import Hydra
+from autoverify.portfolio.portfolio import ConfiguredVerifier, Portfolio, PortfolioScenario
+
+
+@pytest.fixture
+def checkpoint(nnenum_config: Configuration) -> HydraCheckpoint:
+    pf = Portfolio(ConfiguredVerifier("nnenum", nnenum_config, resources=(1, 0)))
+    pf.update_costs({"a": 1.0, "b": 2.0})
+
+    cost_matrix = CostMatrix()
+    cost_matrix[nnenum_config] = InstanceCost()
+    cost_matrix[nnenum_config].update_cost("a", 1.0)
+    cost_matrix[nnenum_config].update_cost("b", 2.0, capped=True)
+
+    return HydraCheckpoint(
+        iteration=0,
+        portfolio=pf,
+        cost_matrix=cost_matrix,
+        resources={"resources": [3, 0], "cpus_remainder": 1},
+        stop=False,
+        random_state=random.getstate(),
+    )
+
+
+def test_checkpoint_round_trip(checkpoint: HydraCheckpoint, nnenum_config: Configuration, tmp_path: Path):
+    path = checkpoint.save(tmp_path)
+    assert path == tmp_path / "iter_0"
+
+    loaded = HydraCheckpoint.load(path)
+
+    assert loaded.iteration == 0
+    assert loaded.portfolio.get_set() == checkpoint.portfolio.get_set()
+    assert loaded.portfolio.get_all_costs() == {"a": 1.0, "b": 2.0}
+    assert loaded.cost_matrix[nnenum_config].is_capped("b")
+    assert loaded.resources == {"resources": [3, 0], "cpus_remainder": 1}
+    assert not loaded.stop
+
+    expected = random.random()
+    loaded.restore_random_state()
+    assert random.random() == expected
+
+
+def test_latest_checkpoint(checkpoint: HydraCheckpoint, tmp_path: Path):
+    assert latest_checkpoint(tmp_path / "missing") is None
+
+    checkpoint.save(tmp_path)
+    checkpoint.iteration = 10
+    checkpoint.save(tmp_path)
+
+    # Left behind by a crash while writing a checkpoint
+    (tmp_path / ".tmp-iter_11-abc").mkdir()
+
+    assert latest_checkpoint(tmp_path) == tmp_path / "iter_10"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".tmp-iter_11-abc", "iter_0", "iter_10"]
+
+
+def test_hydra_resume(hydra_scenario: PortfolioScenario, nnenum_config: Configuration):
+    hydra = Hydra(hydra_scenario)
+    hydra._iter = 0
+    pf = Portfolio(ConfiguredVerifier("nnenum", nnenum_config, resources=(1, 0)))
+    pf.update_costs({"a": 1.0})
+    hydra._save_checkpoint(pf, [])
+
+    with pytest.raises(FileExistsError):
+        Hydra(hydra_scenario)
+
+    resumed = Hydra(hydra_scenario, resume=True)
+    restored_pf, first_iter = resumed._restore()
+
+    assert first_iter == 1
+    assert restored_pf.get_set() == pf.get_set()
+    assert restored_pf.get_all_costs() == {"a": 1.0}
+    assert resumed._ResourceTracker.get_state() == hydra._ResourceTracker.get_state()
+
+    # A run that stopped early has nothing left to do
+    hydra._stop = True
+    hydra._save_checkpoint(pf, [])
+    assert Hydra(hydra_scenario, resume=True).tune_portfolio().get_set() == pf.get_set()
@@ -1,3 +1,7 @@
+import gc
+from pathlib import Path
+
+import numpy as np
 import pytest
 from ConfigSpace import ConfigurationSpace
 from smac import RunHistory
@@ -57,6 +61,33 @@ def test_update_cost_matrix(simple_configspace: ConfigurationSpace):
     assert cm[cfg2] == {"foo": 200.0, "bar": 110.0, "foo_timeout": 10000.0}
 
 
+def test_update_cost_matrix_capped(simple_configspace: ConfigurationSpace):
+    cfg1, cfg2 = simple_configspace.sample_configuration(2)
+
+    rh = RunHistory()
+    rh.add(cfg1, 10.0, instance="foo", additional_info={"capped": True})
+    rh.add(cfg1, 20.0, instance="bar", additional_info={"capped": False})
+    rh.add(cfg2, 5.0, instance="foo")
+    rh.add(cfg2, 7.0, instance="bar", additional_info={"censored": True})
+
+    cm = CostMatrix()
+    cm.update_matrix(rh)
+
+    assert cm[cfg1] == {"foo": 10.0, "bar": 20.0}
+    assert cm[cfg1].is_capped("foo")
+    assert not cm[cfg1].is_capped("bar")
+    assert not cm[cfg2].is_capped("foo")
+    assert cm[cfg2].is_capped("bar")
+
+    # The average of a capped and a real cost is still a lower bound
+    rh = RunHistory()
+    rh.add(cfg1, 30.0, instance="foo")
+    cm.update_matrix(rh)
+
+    assert cm[cfg1]["foo"] == 20.0
+    assert cm[cfg1].is_capped("foo")
+
+
 @pytest.fixture
 def small_cost_matrix(simple_configspace: ConfigurationSpace) -> CostMatrix:
     cfg1, cfg2 = simple_configspace.sample_configuration(2)
@@ -126,3 +157,137 @@ def test_instance_cost_dunders():
 
     del ic["foo"]
     assert "foo" not in ic
+
+
+@pytest.fixture
+def named_configspace(simple_configspace: ConfigurationSpace) -> ConfigurationSpace:
+    config_space = ConfigurationSpace(name="foo")
+    config_space.add_hyperparameters(list(simple_configspace.values()))
+
+    return config_space
+
+
+def test_cost_matrix_npz(named_configspace: ConfigurationSpace, tmp_path: Path):
+    cfg1, cfg2 = named_configspace.sample_configuration(2)
+
+    cm = CostMatrix(par=5)
+    cm[cfg1] = InstanceCost()
+    cm[cfg1].update_cost("a", 10.0)
+    cm[cfg1].update_cost("a", 20.0, capped=True)
+    cm[cfg2] = InstanceCost()
+    cm[cfg2].update_cost("b", 1.0, timed_out=True)
+
+    npz_path = tmp_path / "cost_matrix.npz"
+    cm.save(npz_path)
+    loaded = CostMatrix.load(npz_path, {"foo": named_configspace})
+
+    assert loaded._par == 5
+    assert set(loaded) == {cfg1, cfg2}
+    assert loaded[cfg1] == {"a": 15.0}
+    assert loaded[cfg1].is_capped("a")
+    assert not loaded[cfg2].is_capped("b")
+    assert loaded[cfg2].is_timed_out("b")
+
+    # Updates keep averaging over the costs before the round trip
+    loaded[cfg1].update_cost("a", 30.0)
+    assert loaded[cfg1]["a"] == 20.0
+
+
+def test_cost_matrix_arrays(small_cost_matrix: CostMatrix):
+    cfg1, cfg2 = small_cost_matrix.configs
+    instances = ["foo", "bar", "foobar", "unknown"]
+
+    np.testing.assert_array_equal(
+        small_cost_matrix.get_costs([cfg1, cfg2], instances),
+        [[20.0, 3.0, np.inf, np.inf], [1.5, 20.0, 42.0, np.inf]],
+    )
+    np.testing.assert_array_equal(small_cost_matrix.get_counts([cfg2], instances), [[1, 1, 1, 0]])
+    assert not small_cost_matrix.get_capped([cfg1, cfg2], instances).any()
+    assert not small_cost_matrix.get_timed_out([cfg1, cfg2], instances).any()
+
+    np.testing.assert_array_equal(
+        small_cost_matrix.subset_costs([[cfg1], [cfg1, cfg2], []], instances),
+        [[20.0, 3.0, np.inf, np.inf], [1.5, 3.0, 42.0, np.inf], [np.inf] * 4],
+    )
+
+    # cfg2 improves foo by 18.5 and solves foobar, cfg1 improves bar by 17
+    contributions = small_cost_matrix.marginal_contributions([cfg1], [cfg1, cfg2], instances)
+    np.testing.assert_array_equal(contributions, [0.0, np.inf])
+    contributions = small_cost_matrix.marginal_contributions([cfg2], [cfg1], instances[:2])
+    np.testing.assert_array_equal(contributions, [17.0])
+
+
+def test_cost_matrix_merge(simple_configspace: ConfigurationSpace):
+    cfg1, cfg2 = simple_configspace.sample_configuration(2)
+
+    cm = CostMatrix()
+    cm[cfg1] = InstanceCost()
+    cm[cfg1].update_cost("foo", 10.0)
+    cm[cfg1].update_cost("foo", 20.0)
+
+    other = CostMatrix()
+    other[cfg1] = InstanceCost()
+    other[cfg1].update_cost("foo", 45.0, capped=True)
+    other[cfg1].update_cost("bar", 1.0)
+    other[cfg2] = {"bar": 2.0}
+
+    cm.merge(other)
+
+    assert cm[cfg1] == {"foo": 25.0, "bar": 1.0}
+    assert cm[cfg1]._val_counts == {"foo": 3, "bar": 1}
+    assert cm[cfg1].is_capped("foo")
+    assert cm[cfg2] == {"bar": 2.0}
+
+
+def test_cost_matrix_grows(simple_configspace: ConfigurationSpace):
+    configs = simple_configspace.sample_configuration(20)
+    instances = [f"inst_{i}" for i in range(20)]
+
+    rh = RunHistory()
+    for i, cfg in enumerate(configs):
+        for j, inst in enumerate(instances):
+            rh.add(cfg, float(i * j), instance=inst)
+
+    cm = CostMatrix()
+    cm.update_matrix(rh)
+
+    assert len(cm) == len(set(configs))
+    assert cm.vbs_cost(configs, instances) == {inst: 0.0 for inst in instances}
+    assert cm[configs[-1]][instances[-1]] == 19.0 * 19.0
+
+
+def test_update_cost_matrix_incremental(simple_configspace: ConfigurationSpace):
+    cfg1, cfg2 = simple_configspace.sample_configuration(2)
+
+    rh = RunHistory()
+    rh.add(cfg1, 10.0, instance="foo")
+    rh.add(cfg2, 0.0, instance="foo", status=StatusType.RUNNING)
+
+    cm = CostMatrix()
+    cm.update_matrix(rh)
+    cm.update_matrix(rh)
+
+    # Trials are only added once, running trials once they finished
+    assert cm[cfg1] == {"foo": 10.0}
+    assert cfg2 not in cm
+    assert cm._watermarks[id(rh)].position == 1
+
+    rh.add(cfg1, 20.0, instance="bar")
+    rh.add(cfg2, 5.0, instance="foo", status=StatusType.SUCCESS, force_update=True)
+    cm.update_matrix(rh)
+
+    assert cm[cfg1] == {"foo": 10.0, "bar": 20.0}
+    assert cm[cfg2] == {"foo": 5.0}
+    assert cm._watermarks[id(rh)].position == 3
+    assert not cm._watermarks[id(rh)].consumed
+
+    # Other runhistories with the same trials are added as well
+    rh2 = RunHistory()
+    rh2.add(cfg1, 30.0, instance="foo")
+    cm.update_matrix(rh2)
+
+    assert cm[cfg1]["foo"] == 20.0
+
+    del rh, rh2
+    gc.collect()
+    assert not cm._watermarks
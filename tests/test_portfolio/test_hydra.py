@@ -0,0 +1,113 @@
+import threading
+import time
+from dataclasses import replace
+from functools import partial
+from typing import Any
+
+import pytest
+from ConfigSpace import Configuration
+from smac import RunHistory
+
+from autoverify.portfolio.hydra import hydra as hydra_module
+from autoverify.portfolio.hydra.hydra import Hydra
+from autoverify.portfolio.portfolio import ConfiguredVerifier, Portfolio, PortfolioScenario
+from autoverify.util.resources import ResourceTracker, split_node
+from autoverify.util.verifiers import get_verifier_configspace
+
+
+def _runhistory(config: Configuration, costs: list[float], instances: list[str]) -> RunHistory:
+    rh = RunHistory()
+
+    for instance, cost in zip(instances, costs, strict=True):
+        rh.add(config, cost, instance=instance)
+
+    return rh
+
+
+@pytest.fixture
+def nnenum_configs(nnenum_config: Configuration) -> list[Configuration]:
+    cfg_space = get_verifier_configspace("nnenum")
+    configs = [nnenum_config]
+
+    while len(configs) < 3:
+        cfg = cfg_space.sample_configuration()
+
+        if cfg not in configs:
+            configs.append(cfg)
+
+    return configs
+
+
+def test_updater_marginal_contribution(hydra_scenario: PortfolioScenario, nnenum_configs: list[Configuration]):
+    scenario = replace(hydra_scenario, configs_per_iter=3, added_per_iter=2)
+    hydra = Hydra(scenario)
+    instances = scenario.get_smac_instances()
+    cfg_a, cfg_b, cfg_c = nnenum_configs
+
+    new_configs = [
+        (cfg_a, _runhistory(cfg_a, [1.0, 50.0, 50.0], instances)),
+        (cfg_b, _runhistory(cfg_b, [50.0, 1.0, 50.0], instances)),
+        (cfg_c, _runhistory(cfg_c, [2.0, 50.0, 40.0], instances)),
+    ]
+
+    pf = Portfolio()
+    hydra._updater(pf, new_configs)
+
+    # cfg_c is the best on its own, cfg_b complements it the most
+    assert set(pf.configs) == {cfg_b, cfg_c}
+    assert pf.get_total_cost() == 43.0
+    assert not hydra._stop
+
+
+def test_updater_stops_on_duplicates(hydra_scenario: PortfolioScenario, nnenum_config: Configuration):
+    hydra = Hydra(hydra_scenario)
+    instances = hydra_scenario.get_smac_instances()
+    pf = Portfolio(ConfiguredVerifier("nnenum", nnenum_config, resources=(1, 0)))
+
+    hydra._updater(pf, [(nnenum_config, _runhistory(nnenum_config, [1.0, 1.0, 1.0], instances))])
+
+    assert len(pf) == 1
+    assert hydra._stop
+
+
+@pytest.mark.parametrize("n_cpu, n_rounds", [(8, 1), (4, 2)])
+def test_concurrent_configurator_runs(
+    hydra_scenario: PortfolioScenario,
+    nnenum_config: Configuration,
+    monkeypatch: pytest.MonkeyPatch,
+    n_cpu: int,
+    n_rounds: int,
+):
+    scenario = replace(hydra_scenario, length=4, configs_per_iter=3)
+    hydra = Hydra(scenario)
+    hydra._iter = 0
+    hydra._ResourceTracker = ResourceTracker(scenario, cpu_gpu_count=(8, 0))
+    monkeypatch.setattr(hydra_module, "split_node", partial(split_node, cpu_gpu_count=(n_cpu, 0)))
+
+    lock = threading.Lock()
+    running: list[tuple[int, int, int]] = []
+    runs: list[tuple[int, Any]] = []
+    overlaps: list[bool] = []
+
+    def configurator_run(pf: Portfolio, i: int, allocations: Any = None) -> tuple[Configuration, RunHistory]:
+        with lock:
+            overlaps.append(any(alloc in running for alloc in allocations))
+            running.extend(allocations)
+            runs.append((i, allocations))
+
+        time.sleep(0.05)
+
+        with lock:
+            for alloc in allocations:
+                running.remove(alloc)
+
+        return nnenum_config, RunHistory()
+
+    monkeypatch.setattr(hydra, "_configurator_run", configurator_run)
+    new_configs = hydra._configurator(Portfolio())
+
+    assert len(new_configs) == 3
+    assert sorted(i for i, _ in runs) == [0, 1, 2]
+    assert all(len(allocations) == 1 for _, allocations in runs)
+    assert not any(overlaps)
+    assert hydra._n_rounds == n_rounds
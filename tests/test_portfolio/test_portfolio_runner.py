@@ -1,8 +1,17 @@
+import asyncio
+import time
+from pathlib import Path
+
 import pytest
 from ConfigSpace import Configuration
 
+from autoverify.portfolio import portfolio_runner
 from autoverify.portfolio.portfolio import ConfiguredVerifier, Portfolio
 from autoverify.portfolio.portfolio_runner import PortfolioRunner
+from autoverify.util.instances import read_verification_result_from_csv
+from autoverify.util.verification_instance import VerificationInstance
+
+from ..test_verifier.conftest import FAKE_TOOL, FakeConfigspace, FakeVerifier
 
 
 @pytest.fixture
@@ -29,3 +38,192 @@ def test_init_runner(portfolio: Portfolio, faulty_pf: Portfolio):
     assert all(alloc in list(runner._allocation.values()) for alloc in allocs) or all(
         alloc in list(runner._allocation.values()) for alloc in allocs2
     )
+
+
+def test_init_runner_copies(portfolio: Portfolio):
+    runner = PortfolioRunner(portfolio, n_cpu=40, n_gpu=2, copies=None)
+    assert len(runner._allocations) == 2
+
+    # The copies do not share any CPU or GPU
+    cpus = [cpu for alloc in runner._allocations for low, high, _ in alloc.values() for cpu in range(low, high + 1)]
+    gpus = [gpu for alloc in runner._allocations for _, _, gpu in alloc.values() if gpu >= 0]
+    assert sorted(cpus) == list(range(8, 40))
+    assert sorted(gpus) == [0, 1]
+
+    with pytest.raises(RuntimeError):
+        _ = PortfolioRunner(portfolio, n_cpu=40, n_gpu=2, copies=3)
+
+
+class _MemberVerifier(FakeVerifier):
+    """Fake verifier that runs its configuration, as a portfolio member."""
+
+    def __init__(self, tool_dir: Path, configuration: Configuration):
+        super().__init__(tool_dir)
+        self._configuration = configuration
+        self.allocation: tuple[int, int, int] | None = None
+
+    @property
+    def default_config(self) -> Configuration:
+        return self._configuration
+
+
+@pytest.mark.parametrize("copies", [1, 2])
+def test_verify_instances_pipelined(
+    copies: int,
+    tmp_path: Path,
+    trivial_sat: VerificationInstance,
+    trivial_unsat: VerificationInstance,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    (tmp_path / "fake_tool.py").write_text(FAKE_TOOL)
+    slow = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "slow"}), resources=(1, 0))
+    fail = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "fail"}), resources=(1, 0))
+    allocations: set[tuple[int, int, int]] = set()
+
+    def _get_verifier(instance, cv, vnncompat, benchmark, verifier_kwargs=None, cv_alloc=None):
+        assert cv_alloc is not None
+        allocations.add(cv_alloc[cv])
+        return _MemberVerifier(tmp_path, cv.configuration)
+
+    monkeypatch.setattr(portfolio_runner, "_get_verifier", _get_verifier)
+    runner = PortfolioRunner(Portfolio(slow, fail), n_cpu=2 * copies, n_gpu=0, copies=copies)
+    instances = [trivial_sat, trivial_unsat, VerificationInstance(trivial_sat.network, trivial_sat.property, 30)]
+    out_csv = tmp_path / "results.csv"
+
+    results = runner.verify_instances(instances, out_csv=out_csv)
+
+    # Each member keeps its own cores in every copy
+    assert sorted(allocations) == [(cpu, cpu, -1) for cpu in range(2 * copies)]
+    assert [results[instance].result for instance in instances] == ["SAT"] * 3
+    assert runner.instances_per_hour is not None and runner.instances_per_hour > 0
+
+    # The failing member went through all instances without waiting for the
+    # slow member to finish the first one
+    rows = [row.success for row in read_verification_result_from_csv(out_csv)]
+    assert rows[:3] == ["ERR", "ERR", "ERR"]
+    assert rows[3:] == ["OK", "OK", "OK"]
+
+
+def test_evaluate_vbs_packed(
+    tmp_path: Path,
+    trivial_sat: VerificationInstance,
+    trivial_unsat: VerificationInstance,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    (tmp_path / "fake_tool.py").write_text(FAKE_TOOL)
+    slow = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "slow"}), resources=(2, 0))
+    fail = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "fail"}), resources=(1, 0))
+    started: list[tuple[str, int, tuple[int, int, int]]] = []
+
+    def _get_verifier(instance, cv, vnncompat, benchmark, verifier_kwargs=None, cv_alloc=None):
+        # Not pinned to the allocation, the test node may have fewer cores
+        verifier = _MemberVerifier(tmp_path, cv.configuration)
+        verifier.allocation = cv_alloc[cv]
+        return verifier
+
+    def _start_instance(self, instance, **kwargs):
+        started.append((str(self._configuration["behaviour"]), instance.timeout, self.allocation))
+        return FakeVerifier.start_instance(self, instance, **kwargs)
+
+    monkeypatch.setattr(portfolio_runner, "_get_verifier", _get_verifier)
+    monkeypatch.setattr(_MemberVerifier, "start_instance", _start_instance)
+    runner = PortfolioRunner(Portfolio(slow, fail), vbs_mode=True, n_cpu=3, n_gpu=0)
+    long_sat = VerificationInstance(trivial_sat.network, trivial_sat.property, trivial_sat.timeout + 30)
+    out_csv = tmp_path / "results.csv"
+
+    vbs = runner.evaluate_vbs([trivial_sat, long_sat], out_csv=out_csv)
+
+    assert set(vbs) == {str(trivial_sat), str(long_sat)}
+    assert all(verifier == "fake" and cost < float("inf") for cost, verifier in vbs.values())
+
+    # The longest jobs start first, the largest of those on the top cores,
+    # and the jobs running at the same time never share a core
+    assert started[:2] == [("slow", long_sat.timeout, (1, 2, -1)), ("fail", long_sat.timeout, (0, 0, -1))]
+    assert {behaviour for behaviour, _, _ in started[2:]} == {"slow", "fail"}
+
+    # The failing jobs did not wait for the slow ones
+    rows = [row.success for row in read_verification_result_from_csv(out_csv)]
+    assert rows == ["ERR", "ERR", "OK", "OK"]
+
+
+@pytest.fixture
+def member_verifiers(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / "fake_tool.py").write_text(FAKE_TOOL)
+
+    def _get_verifier(instance, cv, vnncompat, benchmark, verifier_kwargs=None, cv_alloc=None):
+        return _MemberVerifier(tmp_path, cv.configuration)
+
+    monkeypatch.setattr(portfolio_runner, "_get_verifier", _get_verifier)
+
+
+@pytest.mark.usefixtures("member_verifiers")
+def test_iter_verify_instances(trivial_sat: VerificationInstance, trivial_unsat: VerificationInstance):
+    sat = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "sat"}), resources=(1, 0))
+    sleep = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "sleep"}), resources=(1, 0))
+    runner = PortfolioRunner(Portfolio(sat, sleep), n_cpu=2, n_gpu=0)
+    start_t = time.monotonic()
+
+    results = runner.iter_verify_instances([trivial_sat, trivial_unsat])
+    instance, result = next(results)
+    assert instance == trivial_sat
+    assert result.result == "SAT"
+
+    # Closing the iterator early stops the member that is still sleeping
+    results.close()
+    assert time.monotonic() - start_t < 30
+
+    seen: list[VerificationInstance] = []
+    runner.verify_instances([trivial_sat, trivial_unsat], on_result=lambda instance, _: seen.append(instance))
+    assert seen == [trivial_sat, trivial_unsat]
+
+    # The verifiers are not kept around after the run
+    assert not runner._verifier_pool
+
+
+@pytest.mark.usefixtures("member_verifiers")
+def test_aiter_verify_instances(trivial_sat: VerificationInstance, trivial_unsat: VerificationInstance):
+    unsat = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "unsat"}), resources=(1, 0))
+    runner = PortfolioRunner(Portfolio(unsat), n_cpu=1, n_gpu=0)
+
+    async def collect():
+        return [(instance, result.result) async for instance, result in runner.aiter_verify_instances([trivial_sat])]
+
+    assert asyncio.run(collect()) == [(trivial_sat, "UNSAT")]
+
+    seen: list[VerificationInstance] = []
+    asyncio.run(
+        runner.averify_instances([trivial_sat, trivial_unsat], on_result=lambda instance, _: seen.append(instance))
+    )
+    assert seen == [trivial_sat, trivial_unsat]
+
+
+@pytest.mark.usefixtures("member_verifiers")
+def test_verify_instances_resume(
+    tmp_path: Path,
+    trivial_sat: VerificationInstance,
+    trivial_unsat: VerificationInstance,
+):
+    sat = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "sat"}), resources=(1, 0))
+    fail = ConfiguredVerifier("fake", Configuration(FakeConfigspace, {"behaviour": "fail"}), resources=(1, 0))
+    out_csv = tmp_path / "results.csv"
+
+    # The first run only got to see the failing member finish on an instance
+    PortfolioRunner(Portfolio(fail), n_cpu=1, n_gpu=0).verify_instances([trivial_unsat], out_csv=out_csv)
+    PortfolioRunner(Portfolio(sat), n_cpu=1, n_gpu=0).verify_instances([trivial_sat], out_csv=out_csv)
+
+    runner = PortfolioRunner(Portfolio(sat, fail), n_cpu=2, n_gpu=0)
+    results = runner.verify_instances([trivial_sat, trivial_unsat], out_csv=out_csv, resume=True)
+
+    # The solved instance is skipped, only the missing member runs on the other
+    assert list(results) == [trivial_unsat]
+    rows = read_verification_result_from_csv(out_csv)
+    assert [(row.network, row.success) for row in rows] == [
+        (str(trivial_unsat.network), "ERR"),
+        (str(trivial_sat.network), "OK"),
+        (str(trivial_unsat.network), "OK"),
+    ]
+
+    async def resume():
+        return await runner.averify_instances([trivial_sat, trivial_unsat], out_csv=out_csv, resume=True)
+
+    assert asyncio.run(resume()) == {}
@@ -0,0 +1,22 @@
+from functools import partial
+
+import pytest
+
+from autoverify.tune import tune_verifier
+from autoverify.tune.tune_verifier import _trial_allocations
+from autoverify.util.resources import split_node
+
+
+@pytest.fixture
+def node(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(tune_verifier, "cpu_count", lambda: 8)
+    monkeypatch.setattr(tune_verifier, "split_node", partial(split_node, cpu_gpu_count=(8, 2)))
+
+
+def test_trial_allocations(node: None):
+    assert _trial_allocations("nnenum", 1, None) is None
+    assert _trial_allocations("nnenum", 4, None) == [(6, 7, -1), (4, 5, -1), (2, 3, -1), (0, 1, -1)]
+
+    # Every trial of a GPU verifier gets a GPU of its own, so only 2 fit
+    assert _trial_allocations("abcrown", 4, None) == [(6, 7, 1), (4, 5, 0)]
+    assert _trial_allocations("abcrown", 2, (1, 0)) == [(7, 7, -1), (6, 6, -1)]
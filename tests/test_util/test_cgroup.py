@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from autoverify.util.cgroup import RunCgroup
+
+
+def test_run_cgroup_files(tmp_path: Path):
+    # A plain directory stands in for the cgroup filesystem
+    cgroup = RunCgroup.create(tmp_path, memory_limit_mb=512, cpus=2)
+
+    assert cgroup.path.parent == tmp_path
+    assert (cgroup.path / "memory.max").read_text() == str(512 * 1024 * 1024)
+    assert (cgroup.path / "cpu.max").read_text() == "200000 100000"
+
+    assert not cgroup.oom_killed()
+    (cgroup.path / "memory.events").write_text("low 0\nhigh 0\nmax 3\noom 1\noom_kill 1\n")
+    assert cgroup.oom_killed()
+
+    assert cgroup.peak_memory() is None
+    (cgroup.path / "memory.peak").write_text("1048576\n")
+    assert cgroup.peak_memory() == 1048576
@@ -1,3 +1,4 @@
+import csv
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -15,6 +16,7 @@ from autoverify.util.instances import (
     read_all_vnncomp_instances,
     read_verification_result_from_csv,
     read_vnncomp_instances,
+    resume_verification_result_csv,
     unique_networks,
     verification_instances_to_smac_instances,
     write_verification_results_to_csv,
@@ -85,6 +87,7 @@ def test_vdr_csv_row(vdr: VerificationDataResult):
         "a counter example",
         "an error string",
         "some output",
+        *5 * [""],
     ]
 
     vdr.counter_example = ("a", "counter example")
@@ -100,6 +103,7 @@ def test_vdr_csv_row(vdr: VerificationDataResult):
         "a\ncounter example",
         "an error string",
         "some output",
+        *5 * [""],
     ]
 
 
@@ -172,6 +176,7 @@ def test_append_verification_result(tmp_path: Path, vdr: VerificationDataResult)
                 "a counter example",
                 "an error string",
                 "some output",
+                *5 * [""],
             ]
         )
         + "\n"
@@ -190,6 +195,97 @@ def test_read_verification_result_from_csv(tmp_path: Path, vdr: VerificationData
     assert vdrs == [vdr, vdr]
 
 
+def test_verification_result_csv_usage(tmp_path: Path, vdr: VerificationDataResult):
+    tmp_csv = tmp_path / "tmp.csv"
+    init_verification_result_csv(tmp_csv)
+    csv_append_verification_result(vdr, tmp_csv)
+
+    vdr.cpu_user, vdr.cpu_sys, vdr.peak_rss_mb, vdr.wall, vdr.teardown = 7.5, 0.5, 512.0, 10.2, 0.2
+    assert vdr.as_csv_row()[-5:] == ["7.5", "0.5", "512.0", "10.2", "0.2"]
+    csv_append_verification_result(vdr, tmp_csv)
+
+    without_usage, with_usage = read_verification_result_from_csv(tmp_csv)
+    assert without_usage.peak_rss_mb is None
+    assert with_usage == vdr
+
+
+@pytest.mark.parametrize(
+    "torn",
+    ["", "network.onnx,prop", 'network.onnx,property.vnnlib,60,nnenum,a config,OK,SAT,10.0,"a\n'],
+)
+def test_resume_verification_result_csv(tmp_path: Path, vdr: VerificationDataResult, torn: str):
+    tmp_csv = tmp_path / "tmp.csv"
+    assert resume_verification_result_csv(tmp_csv) == []
+    assert read_verification_result_from_csv(tmp_csv) == []
+
+    vdr.stdout = "multi\nline\noutput"
+    csv_append_verification_result(vdr, tmp_csv)
+
+    # A run that was killed while writing its last row
+    with open(tmp_csv, "a") as csv_file:
+        csv_file.write(torn)
+
+    assert resume_verification_result_csv(tmp_csv) == [vdr]
+    assert [result.key for result in resume_verification_result_csv(tmp_csv)] == [
+        ("network.onnx", "property.vnnlib", "60", "nnenum", "a config")
+    ]
+
+    csv_append_verification_result(vdr, tmp_csv)
+    assert read_verification_result_from_csv(tmp_csv) == [vdr, vdr]
+
+
+def test_resume_verification_result_csv_long_output(tmp_path: Path, vdr: VerificationDataResult):
+    tmp_csv = tmp_path / "tmp.csv"
+    init_verification_result_csv(tmp_csv)
+
+    # As long as the default output tail, more than the default csv field limit
+    vdr.stdout = "x" * 256 * 1024
+    csv_append_verification_result(vdr, tmp_csv)
+
+    assert resume_verification_result_csv(tmp_csv) == [vdr]
+
+
+def test_resume_verification_result_csv_old_columns(tmp_path: Path, vdr: VerificationDataResult):
+    tmp_csv = tmp_path / "tmp.csv"
+    old_fields = get_dataclass_field_names(VerificationDataResult)[:11]
+
+    # Written before the usage columns were added
+    with open(tmp_csv, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(old_fields)
+        writer.writerow(vdr.as_csv_row()[:11])
+
+    assert resume_verification_result_csv(tmp_csv) == [vdr]
+
+    vdr.peak_rss_mb = 512.0
+    csv_append_verification_result(vdr, tmp_csv)
+
+    with open(tmp_csv, newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+
+    assert rows[0] == get_dataclass_field_names(VerificationDataResult)
+    assert {len(row) for row in rows} == {len(rows[0])}
+    assert [result.peak_rss_mb for result in read_verification_result_from_csv(tmp_csv)] == [None, 512.0]
+
+
+def test_resume_verification_result_csv_invalid(tmp_path: Path, vdr: VerificationDataResult):
+    tmp_csv = tmp_path / "tmp.csv"
+    tmp_csv.write_text("a,b\n1,2\n")
+
+    with pytest.raises(ValueError, match="columns"):
+        resume_verification_result_csv(tmp_csv)
+
+    init_verification_result_csv(tmp_csv)
+
+    with open(tmp_csv, "a") as csv_file:
+        csv_file.write("torn,row\n")
+
+    csv_append_verification_result(vdr, tmp_csv)
+
+    with pytest.raises(ValueError, match="malformed"):
+        resume_verification_result_csv(tmp_csv)
+
+
 def test_write_verification_result_from_csv(tmp_path: Path, vdr: VerificationDataResult):
     tmp_csv = tmp_path / "tmp.csv"
     tmp_csv2 = tmp_path / "tmp2.csv"
@@ -1,6 +1,17 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
 import pytest
 
-from autoverify.util.proc import taskset_cpu_range
+from autoverify.util.proc import (
+    kill_process_tree,
+    process_tree,
+    process_tree_alive,
+    taskset_cpu_range,
+    terminate_process_tree,
+)
 
 
 def test_taskset_cpu_range():
@@ -24,3 +35,85 @@ def test_taskset_cpu_range():
     result = taskset_cpu_range(large_range)
     expected_result = "taskset --cpu-list " + ",".join(map(str, range(1, 101)))
     assert result == expected_result
+
+
+LEAVES_CHILD_BEHIND = """
+import subprocess
+import sys
+
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+print(child.pid, flush=True)
+"""
+
+IGNORES_SIGTERM = """
+import signal
+import time
+
+signal.signal(signal.SIGTERM, signal.SIG_IGN)
+print("ready", flush=True)
+time.sleep(60)
+"""
+
+
+def _is_running(pid: int) -> bool:
+    # Orphans are reaped by init, which may take a while (or never happen)
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return False
+
+    return stat[stat.rindex(")") + 2] not in "ZX"
+
+
+def _wait_gone(pid: int, timeout: float = 10) -> bool:
+    end_t = time.monotonic() + timeout
+
+    while time.monotonic() < end_t:
+        if not _is_running(pid):
+            return True
+
+        time.sleep(0.05)
+
+    return False
+
+
+def test_kill_process_tree():
+    script = [sys.executable, "-c", LEAVES_CHILD_BEHIND]
+
+    run = subprocess.Popen(script, stdout=subprocess.PIPE, text=True, start_new_session=True)
+    neighbour = subprocess.Popen(script, stdout=subprocess.PIPE, text=True, start_new_session=True)
+    assert run.stdout and neighbour.stdout
+
+    orphan = int(run.stdout.readline())
+    neighbour_child = int(neighbour.stdout.readline())
+    run.wait()
+    neighbour.wait()
+
+    # The orphan outlived its parent, but is still in the session of the run
+    assert orphan in process_tree(run.pid)
+    assert neighbour_child not in process_tree(run.pid)
+
+    kill_process_tree(run.pid)
+
+    assert _wait_gone(orphan)
+    assert _is_running(neighbour_child)
+
+    kill_process_tree(neighbour.pid)
+    assert _wait_gone(neighbour_child)
+
+
+def test_terminate_process_tree():
+    run = subprocess.Popen(
+        [sys.executable, "-c", IGNORES_SIGTERM], stdout=subprocess.PIPE, text=True, start_new_session=True
+    )
+    assert run.stdout
+    run.stdout.readline()
+
+    assert terminate_process_tree(run.pid, 0.2)
+    assert run.wait(10) == -9
+
+    run = subprocess.Popen([sys.executable, "-c", LEAVES_CHILD_BEHIND], stdout=subprocess.PIPE, start_new_session=True)
+    run.wait()
+
+    assert not terminate_process_tree(run.pid, 10)
+    assert not process_tree_alive(run.pid)
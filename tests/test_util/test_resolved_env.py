@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from autoverify.util import resolved_env
+from autoverify.util.resolved_env import (
+    RESOLVED_ENV_FILE,
+    EnvDelta,
+    ResolvedEnv,
+    find_verifier_install,
+    resolve_verifier_env,
+)
+
+
+@pytest.fixture
+def venv_install(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(resolved_env, "VERIFIER_DIR", tmp_path / "conda")
+    monkeypatch.setattr(resolved_env, "VENV_VERIFIER_DIR", tmp_path / "venv")
+    monkeypatch.setattr(resolved_env, "_cache", {})
+
+    install_dir = tmp_path / "venv" / "fake"
+    (install_dir / "tool").mkdir(parents=True)
+    (install_dir / "venv" / "bin").mkdir(parents=True)
+    (install_dir / "venv" / "bin" / "python").symlink_to(sys.executable)
+    (install_dir / "venv" / "lib" / "cuda").mkdir(parents=True)
+    (install_dir / "venv" / "lib" / "cuda" / "libcudart.so.11.0").touch()
+
+    return install_dir
+
+
+def test_env_delta_roundtrip():
+    sep = os.pathsep
+    before = {"PATH": f"/base/bin{sep}/usr/bin", "HOME": "/home/foo", "PYTHONHOME": "/x"}
+    after = {"PATH": f"/env/bin{sep}/usr/bin", "HOME": "/home/foo", "CONDA_PREFIX": "/env", "SHLVL": "2"}
+
+    delta = EnvDelta.between(before, after)
+
+    assert delta.set == {"CONDA_PREFIX": "/env"}
+    assert delta.unset == ["PYTHONHOME"]
+    assert delta.prepend == {"PATH": ["/env/bin"]}
+    assert delta.drop == {"PATH": ["/base/bin"]}
+    assert delta.apply(before) == {k: v for k, v in after.items() if k != "SHLVL"}
+
+    # Entries added to the caller's PATH later on are kept
+    env = delta.apply({"PATH": f"/mine/bin{sep}/base/bin{sep}/usr/bin"})
+    assert env["PATH"] == f"/env/bin{sep}/mine/bin{sep}/usr/bin"
+
+
+def test_find_verifier_install(venv_install: Path):
+    assert find_verifier_install("fake") == ("venv", venv_install)
+
+    with pytest.raises(FileNotFoundError):
+        find_verifier_install("not_installed")
+
+
+def test_resolve_venv(venv_install: Path):
+    env = resolve_verifier_env("fake")
+    prefix = venv_install / "venv"
+
+    assert env.kind == "venv"
+    assert env.python == prefix / "bin" / "python"
+    assert env.tool_path == venv_install / "tool"
+
+    activated = env.activate({"PATH": "/usr/bin", "PYTHONHOME": "/x"})
+    assert activated["VIRTUAL_ENV"] == str(prefix)
+    assert activated["PATH"] == os.pathsep.join([str(prefix / "bin"), "/usr/bin"])
+    assert "PYTHONHOME" not in activated
+
+    assert (venv_install / RESOLVED_ENV_FILE).is_file()
+
+
+def test_resolved_env_persisted(venv_install: Path, monkeypatch: pytest.MonkeyPatch):
+    env = resolve_verifier_env("fake")
+    assert env.find_lib("libcudart.so.*") == venv_install / "venv" / "lib" / "cuda"
+
+    # A new process loads the resolved env (including libs) from disk
+    monkeypatch.setattr(resolved_env, "_cache", {})
+    loaded = resolve_verifier_env("fake")
+
+    assert loaded is not env
+    assert loaded.libs == env.libs
+
+    with open(venv_install / RESOLVED_ENV_FILE) as f:
+        assert ResolvedEnv.from_dict(json.load(f)) == loaded
+
+
+def test_resolved_env_invalidated(venv_install: Path):
+    env = resolve_verifier_env("fake")
+    assert resolve_verifier_env("fake") is env
+
+    # Installing something into the env changes its mtime
+    bin_dir = venv_install / "venv" / "bin"
+    os.utime(bin_dir, (env.stamp + 10, env.stamp + 10))
+
+    assert resolve_verifier_env("fake") is not env
+
+
+def test_find_lib_missing(venv_install: Path):
+    with pytest.raises(ValueError):
+        resolve_verifier_env("fake").find_lib("libdoesnotexist.so")
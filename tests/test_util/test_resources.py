@@ -0,0 +1,36 @@
+import pytest
+
+from autoverify.util.resources import NodePacker, split_node
+
+
+def test_node_packer():
+    packer = NodePacker(4, 1)
+
+    assert packer.fits_node((4, 1))
+    assert not packer.fits_node((5, 0))
+    assert not NodePacker(4, 0).fits_node((1, 1))
+
+    big = packer.take((2, 1))
+    assert big == (2, 3, 0)
+
+    # The GPU is taken, but CPU only jobs still fit
+    assert packer.take((1, 1)) is None
+    small = packer.take((1, 0))
+    assert small == (1, 1, -1)
+
+    # No contiguous range of 2 free cores is left
+    assert packer.take((2, 0)) is None
+    assert packer.take((1, 0)) == (0, 0, -1)
+
+    packer.release(big)
+    assert packer.take((2, 0)) == (2, 3, -1)
+
+
+def test_split_node():
+    assert split_node((2, 0), 2, cpu_gpu_count=(8, 0)) == [(6, 7, -1), (4, 5, -1)]
+
+    # Only 2 GPUs, so only 2 jobs fit
+    assert split_node((1, 1), 4, cpu_gpu_count=(8, 2)) == [(7, 7, 1), (6, 6, 0)]
+
+    with pytest.raises(ValueError):
+        split_node((1, 1), 2, cpu_gpu_count=(8, 0))
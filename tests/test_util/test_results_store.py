@@ -0,0 +1,126 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from autoverify.util.instances import (
+    VerificationDataResult,
+    csv_append_verification_result,
+    init_verification_result_csv,
+    read_verification_result_from_csv,
+)
+from autoverify.util.results_store import ResultsStore
+
+
+def _result(network: str = "network.onnx", stdout: str | None = "some output", **kwargs) -> VerificationDataResult:
+    return VerificationDataResult(
+        network,
+        "property.vnnlib",
+        60,
+        kwargs.pop("verifier", "nnenum"),
+        "a config",
+        "OK",
+        kwargs.pop("result", "SAT"),
+        10.0,
+        "a counter example",
+        None,
+        stdout,
+        **kwargs,
+    )
+
+
+def _append_many(path: Path, prefix: str):
+    with ResultsStore(path, batch_size=10) as store:
+        for i in range(50):
+            store.append(_result(f"{prefix}{i}.onnx"))
+
+
+def test_results_store(tmp_path: Path):
+    db = tmp_path / "results.db"
+
+    with ResultsStore(db, batch_size=2) as store:
+        store.append(_result(cpu_user=1.5, wall=10.2))
+        store.append(_result(verifier="abcrown", result="UNSAT"))
+        store.append(_result(stdout=None))
+
+        df = store.load()
+        assert len(store) == 3
+        assert list(df["verifier"]) == ["nnenum", "abcrown", "nnenum"]
+        assert df["verifier"].dtype == "category"
+        assert "stdout" not in df
+        assert df["cpu_user"].iloc[0] == 1.5
+
+    # Reopened, the results are still there, and outputs are stored once
+    with ResultsStore(db) as store:
+        df = store.load(with_output=True)
+        assert list(df["stdout"].fillna("")) == ["some output", "some output", ""]
+        assert len(list(store.output_dir.rglob("*.gz"))) == 2
+        assert store.read_output(df["stdout_id"].iloc[0]) == "some output"
+
+        assert store.verdicts() == {
+            ("network.onnx", "property.vnnlib", "60", "nnenum", "a config"): "SAT",
+            ("network.onnx", "property.vnnlib", "60", "abcrown", "a config"): "UNSAT",
+        }
+
+
+def test_results_store_csv(tmp_path: Path):
+    tmp_csv = tmp_path / "results.csv"
+    results = [_result(), _result(stdout=None, peak_rss_mb=12.5)]
+    init_verification_result_csv(tmp_csv)
+
+    for result in results:
+        csv_append_verification_result(result, tmp_csv)
+
+    contents = tmp_csv.read_text()
+
+    with open(tmp_csv, "a") as csv_file:
+        csv_file.write("network.onnx,prop")
+
+    with ResultsStore(tmp_path / "results.db") as store:
+        store.import_csv(tmp_csv)
+        assert list(store.iter_results()) == results
+
+        exported = tmp_path / "exported.csv"
+        store.export_csv(exported)
+        assert exported.read_text() == contents
+        assert len(read_verification_result_from_csv(exported)) == 2
+
+
+def test_results_store_csv_long_output(tmp_path: Path):
+    tmp_csv = tmp_path / "results.csv"
+    # As long as the default output tail, more than the default csv field limit
+    result = _result(stdout="x" * 256 * 1024)
+    init_verification_result_csv(tmp_csv)
+    csv_append_verification_result(result, tmp_csv)
+
+    with ResultsStore(tmp_path / "results.db") as store:
+        store.import_csv(tmp_csv)
+        assert list(store.iter_results()) == [result]
+
+
+def test_results_store_parquet(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    import pandas as pd
+
+    with ResultsStore(tmp_path / "results.db") as store:
+        store.append(_result())
+        store.export_parquet(tmp_path / "results.parquet")
+
+    assert list(pd.read_parquet(tmp_path / "results.parquet")["network"]) == ["network.onnx"]
+
+
+def test_results_store_processes(tmp_path: Path):
+    db = tmp_path / "results.db"
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_append_many, args=(db, prefix)) for prefix in ("a", "b", "c")]
+
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    assert all(proc.exitcode == 0 for proc in procs)
+
+    with ResultsStore(db) as store:
+        assert len(store) == 150
+        assert store.load()["network"].nunique() == 150
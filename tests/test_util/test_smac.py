@@ -1,16 +1,24 @@
 import csv
+import threading
+import time
 from pathlib import Path
 
 import pytest
-from ConfigSpace import ConfigurationSpace
-from smac import RunHistory, Scenario
+from ConfigSpace import Configuration, ConfigurationSpace
+from smac import AlgorithmConfigurationFacade, RunHistory, Scenario
 
 from autoverify.util.instances import VerificationInstance
 from autoverify.util.smac import (
+    PinnedParallelRunner,
+    can_continue,
+    current_trial_allocation,
+    expand_instance_costs,
+    get_facade,
     get_scenario_dict,
     get_smac_run_data,
     index_features,
     runhistory_to_csv,
+    smac_target,
 )
 
 
@@ -78,3 +86,141 @@ def test_get_smac_run_data():
         "timeout": 1,
         "memoryout": 1,
     }
+
+
+def test_pinned_parallel_runner(simple_configspace: ConfigurationSpace, tmp_path: Path):
+    allocations = [(0, 1, -1), (2, 3, 0)]
+    trials: list[tuple[tuple[int, int, int] | None, float, float]] = []
+    lock = threading.Lock()
+
+    def target_function(config: Configuration, instance: str, seed: int) -> float:
+        start = time.monotonic()
+        time.sleep(0.2)
+
+        with lock:
+            trials.append((current_trial_allocation(), start, time.monotonic()))
+
+        return float(config["A"])
+
+    scenario = Scenario(
+        simple_configspace,
+        instances=["a", "b", "c"],
+        instance_features={"a": [0.0], "b": [1.0], "c": [2.0]},
+        output_directory=tmp_path,
+        n_trials=8,
+    )
+
+    with smac_target(scenario, target_function, allocations) as target:
+        assert isinstance(target, PinnedParallelRunner)
+        smac = AlgorithmConfigurationFacade(scenario, target, overwrite=True)
+        smac.optimize()
+
+    assert len(trials) == len(smac.runhistory) == 8
+    assert current_trial_allocation() is None
+
+    for i, (alloc, start, end) in enumerate(trials):
+        assert alloc in allocations
+
+        # Trials never share their cores
+        for other_alloc, other_start, other_end in trials[i + 1 :]:
+            if other_alloc == alloc:
+                assert other_start >= end or start >= other_end
+
+    # But trials on different cores run at the same time
+    assert any(
+        start < other_end and other_start < end
+        for alloc, start, end in trials
+        for other_alloc, other_start, other_end in trials
+        if alloc != other_alloc
+    )
+
+
+def test_smac_target_serial(simple_configspace: ConfigurationSpace, tmp_path: Path):
+    def target_function(config: Configuration, instance: str, seed: int) -> float:
+        return 0.0
+
+    scenario = Scenario(simple_configspace, output_directory=tmp_path)
+
+    with smac_target(scenario, target_function, [(0, 0, -1)]) as target:
+        assert target is target_function
+        assert current_trial_allocation() == (0, 0, -1)
+
+    assert current_trial_allocation() is None
+
+    with smac_target(scenario, target_function) as target:
+        assert target is target_function
+        assert current_trial_allocation() is None
+
+
+def test_expand_instance_costs(simple_configspace: ConfigurationSpace):
+    cfg1, cfg2 = simple_configspace.sample_configuration(2)
+    costs = {"instance_costs": {"a": 1.0, "b": 90.0}, "censored": ["b"]}
+
+    rh = RunHistory()
+    rh.add(cfg1, 45.5, budget=1 / 3, additional_info=costs)
+    rh.add(cfg1, 50.5, budget=1.0, additional_info={"instance_costs": {"a": 1.0, "b": 100.0}, "censored": []})
+    rh.add(cfg2, 45.5, budget=1 / 3, additional_info=costs)
+    rh.add(cfg2, float("inf"), budget=1.0, additional_info={"error": "crashed"})
+
+    expanded = expand_instance_costs(rh)
+    rows = {
+        (expanded.get_config(key.config_id), key.instance, key.budget): (value.cost, value.additional_info)
+        for key, value in expanded.items()
+    }
+
+    assert rows == {
+        (cfg1, "a", 1.0): (1.0, {"censored": False}),
+        (cfg1, "b", 1.0): (100.0, {"censored": False}),
+        (cfg2, "a", 1 / 3): (1.0, {"censored": False}),
+        (cfg2, "b", 1 / 3): (90.0, {"censored": True}),
+    }
+
+
+def test_get_facade_multi_fidelity(simple_configspace: ConfigurationSpace, tmp_path: Path):
+    budgets: list[float] = []
+
+    def target_function(config: Configuration, seed: int, budget: float) -> float:
+        budgets.append(budget)
+        return float(config["A"])
+
+    scenario = Scenario(
+        simple_configspace,
+        min_budget=1 / 9,
+        max_budget=1.0,
+        output_directory=tmp_path,
+        n_trials=15,
+    )
+
+    smac = get_facade(scenario, target_function, eta=3)
+    smac.optimize()
+
+    # Most configs are only run with a fraction of the timeout
+    assert min(budgets) == pytest.approx(1 / 9)
+    assert max(budgets) == pytest.approx(1.0)
+    assert budgets.count(min(budgets)) > budgets.count(max(budgets))
+
+
+def test_can_continue(simple_configspace: ConfigurationSpace, tmp_path: Path):
+    n_calls = 0
+
+    def target_function(config: Configuration, seed: int) -> float:
+        nonlocal n_calls
+        n_calls += 1
+        return float(config["A"])
+
+    def get_scenario(n_trials: int) -> Scenario:
+        return Scenario(simple_configspace, name="run", output_directory=tmp_path, n_trials=n_trials)
+
+    assert not can_continue(get_scenario(5))
+    get_facade(get_scenario(5), target_function).optimize()
+
+    assert can_continue(get_scenario(5))
+    assert not can_continue(get_scenario(6))
+
+    # The finished run is continued, without running any trials
+    n_calls = 0
+    smac = get_facade(get_scenario(5), target_function, overwrite=False)
+    smac.optimize()
+
+    assert n_calls == 0
+    assert len(smac.runhistory) == 5
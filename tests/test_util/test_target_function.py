@@ -1,7 +1,18 @@
+from pathlib import Path
+from typing import Any
+
 import pytest
+from ConfigSpace import Configuration
 from result import Ok
 
-from autoverify.util.target_function import _process_target_function_result
+from autoverify.util.target_function import (
+    _apply_cap,
+    _instance_cost,
+    _process_target_function_result,
+    _run_verification_instance,
+    _trial_budget,
+    get_multi_fidelity_tf,
+)
 from autoverify.verifier.verification_result import CompleteVerificationData, CompleteVerificationResult
 
 
@@ -57,4 +68,85 @@ def test_all_result_types():
     assert err_result == 8.0  # No penalty for ERR
 
 
+class _TimeoutRecorder:
+    def __init__(self):
+        self.timeouts: list[int] = []
+
+    def verify_property(self, network: Path, property: Path, *, config: Any, timeout: int):
+        self.timeouts.append(timeout)
+        return Ok(CompleteVerificationData(result="TIMEOUT", took=float(timeout)))
+
+
+def test_run_verification_instance_cap():
+    verifier: Any = _TimeoutRecorder()
+    instance = "net.onnx,prop.vnnlib,60"
+
+    _run_verification_instance(verifier, None, instance)
+    _run_verification_instance(verifier, None, instance, cap=12.3)
+    _run_verification_instance(verifier, None, instance, cap=0.2)
+    _run_verification_instance(verifier, None, instance, cap=600.0)
+    _run_verification_instance(verifier, None, instance, budget=0.25)
+    _run_verification_instance(verifier, None, instance, cap=10.0, budget=0.25)
+
+    assert verifier.timeouts == [60, 13, 1, 60, 15, 10]
+
+
+def test_instance_cost_censored():
+    verifier: Any = _TimeoutRecorder()
+    instance = "net.onnx,prop.vnnlib,60"
+
+    assert _instance_cost(verifier, None, instance, cap=None, timeout_penalty=10) == 600.0
+
+    token = _trial_budget.set(0.1)
+
+    try:
+        # Stopped by the budget after 6 sec, which is not a timeout on the instance
+        cost = _instance_cost(verifier, None, instance, cap=None, timeout_penalty=10)
+        assert cost == (6.0, {"capped": False, "censored": True})
+
+        cost = _instance_cost(verifier, None, instance, cap=lambda _: 30.0, timeout_penalty=10)
+        assert cost == (6.0, {"capped": False, "censored": True})
+
+        cost = _instance_cost(verifier, None, instance, cap=lambda _: 3.0, timeout_penalty=10)
+        assert cost == (3.0, {"capped": True, "censored": True})
+    finally:
+        _trial_budget.reset(token)
+
+    token = _trial_budget.set(1.0)
+
+    try:
+        cost = _instance_cost(verifier, None, instance, cap=None, timeout_penalty=10)
+        assert cost == (600.0, {"capped": False, "censored": False})
+    finally:
+        _trial_budget.reset(token)
+
+    assert verifier.timeouts == [60, 6, 6, 3, 60]
+
+
+def test_multi_fidelity_tf(simple_config: Configuration):
+    budgets: list[float | None] = []
+
+    def target_function(config: Configuration, instance: str, seed: int):
+        budgets.append(_trial_budget.get())
+
+        if instance == "slow":
+            return 100.0, {"censored": True}
+
+        return 10.0
+
+    target_function_mf = get_multi_fidelity_tf(target_function, ["fast", "slow"])
+    cost, info = target_function_mf(simple_config, 0, 0.5)
+
+    assert cost == 55.0
+    assert info == {"instance_costs": {"fast": 10.0, "slow": 100.0}, "censored": ["slow"]}
+    assert budgets == [0.5, 0.5]
+    assert _trial_budget.get() is None
+
+
+def test_apply_cap():
+    assert _apply_cap(5.0, None) == (5.0, {"capped": False})
+    assert _apply_cap(5.0, 10.0) == (5.0, {"capped": False})
+    assert _apply_cap(130.0, 10.0) == (10.0, {"capped": True})
+
+
 # TODO: Tests for: get_verifier_tf, get_pick_tf, _run_verification_instance
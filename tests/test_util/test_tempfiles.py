@@ -1,9 +1,16 @@
 import json
 import os
+import time
+from pathlib import Path
 
+import pytest
 import yaml
 
+from autoverify.config import get_config
 from autoverify.util.tempfiles import (
+    ConfigStore,
+    RunWorkspace,
+    current_workspace,
     tmp_file,
     tmp_json_file,
     tmp_json_file_from_dict,
@@ -52,3 +59,45 @@ def test_tmp_yaml_file_from_dict():
     with open(temp_yaml_file_path) as fp:
         data = yaml.safe_load(fp)
         assert data == test_dict
+
+
+def test_config_store_dedup(tmp_path: Path):
+    store = ConfigStore(tmp_path, max_entries=2)
+
+    first = store.put("a: 1\n", ".yaml")
+    assert store.put("a: 1\n", ".yaml") == first
+    assert first.read_text() == "a: 1\n"
+
+    # Using the first entry again makes the second the least recently used
+    second = store.put("a: 2\n", ".yaml")
+    os.utime(second, (time.time() - 60, time.time() - 60))
+    store.put("a: 1\n", ".yaml")
+    third = store.put("a: 3\n", ".yaml")
+
+    assert first.exists()
+    assert not second.exists()
+    assert third.exists()
+
+
+@pytest.mark.parametrize("archive", [False, True])
+def test_run_workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, archive: bool):
+    config = get_config()
+    monkeypatch.setattr(config, "scratch_path", tmp_path / "scratch")
+    monkeypatch.setattr(config, "keep_workspaces_path", tmp_path / "archive" if archive else None)
+
+    workspace = RunWorkspace.create("fake")
+    assert workspace.path.parent == tmp_path / "scratch" / f"autoverify-{os.getuid()}" / "runs"
+
+    with workspace.activate():
+        assert current_workspace() is workspace
+
+        with tmp_file(".txt") as f:
+            f.write("result")
+
+    assert current_workspace() is None
+    assert Path(f.name).parent == workspace.path
+
+    workspace.close()
+
+    assert not workspace.path.exists()
+    assert (tmp_path / "archive" / workspace.path.name / Path(f.name).name).exists() == archive
@@ -0,0 +1,162 @@
+import re
+import sys
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import Any
+
+import pytest
+from ConfigSpace import Categorical, Configuration, ConfigurationSpace
+
+from autoverify.util import find_substring
+from autoverify.util.instances import VerificationInstance
+from autoverify.util.resolved_env import ResolvedEnv
+from autoverify.util.tempfiles import tmp_file
+from autoverify.verifier.verification_result import (
+    CompleteVerificationData,
+    VerificationResultString,
+)
+from autoverify.verifier.verifier import CompleteVerifier
+
+FAKE_TOOL = """
+import signal
+import sys
+import time
+
+
+def run(behaviour):
+    if behaviour == "sleep":
+        time.sleep(60)
+    elif behaviour == "fail":
+        sys.exit(1)
+    elif behaviour == "linger":
+        print("Result: unsat", flush=True)
+        time.sleep(60)
+    elif behaviour == "chatty":
+        for i in range(10000):
+            print(f"bab iteration {i}: " + 80 * "x")
+        print("Result: unsat", flush=True)
+        for i in range(10000):
+            print(f"teardown {i}: " + 80 * "x")
+        return
+    elif behaviour == "slow":
+        time.sleep(1)
+        behaviour = "sat"
+    elif behaviour == "stubborn":
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        time.sleep(60)
+    elif behaviour == "hog":
+        hog = bytearray(2 * 1024**3)
+        print(len(hog))
+
+    print(f"Result: {behaviour}", flush=True)
+
+
+print("fake tool started", flush=True)
+
+if sys.argv[1] == "--batch":
+    for idx in range(int(sys.argv[3])):
+        print(f"=== idx: {idx} ===", flush=True)
+        run(sys.argv[2])
+else:
+    run(sys.argv[1])
+"""
+FAKE_BANNER = re.compile(r"=== idx: (\d+) ===")
+
+FakeConfigspace = ConfigurationSpace(name="fake")
+FakeConfigspace.add_hyperparameter(
+    Categorical(
+        "behaviour",
+        ["unsat", "sat", "sleep", "fail", "linger", "chatty", "stubborn", "hog", "slow"],
+        default="unsat",
+    )
+)
+
+
+class FakeVerifier(CompleteVerifier):
+    """Verifier running a tiny python script instead of a real tool."""
+
+    name: str = "fake"
+    config_space: ConfigurationSpace = FakeConfigspace
+
+    def __init__(self, tool_dir: Path, cpu_gpu_allocation: tuple[int, int, int] | None = None):
+        super().__init__(cpu_gpu_allocation=cpu_gpu_allocation)
+        self._tool_dir = tool_dir
+        self.native_batch = False
+        self.batch_processes = 0
+
+    @property
+    def tool_path(self) -> Path:
+        return self._tool_dir
+
+    @property
+    def resolved_env(self) -> ResolvedEnv:
+        return ResolvedEnv(
+            verifier=self.name,
+            kind="venv",
+            prefix=Path(sys.prefix),
+            tool_path=self.tool_path,
+            python=Path(sys.executable),
+        )
+
+    @property
+    def contexts(self) -> list[AbstractContextManager[None]] | None:
+        return None
+
+    def _detect_verdict(self, line: str) -> VerificationResultString | None:
+        if find_substring("Result: sat", line):
+            return "SAT"
+        elif find_substring("Result: unsat", line):
+            return "UNSAT"
+
+        return None
+
+    def _parse_result(self, output: str, result_file: Path | None) -> tuple[VerificationResultString, str | None]:
+        if find_substring("Result: sat", output):
+            return "SAT", None
+        elif find_substring("Result: unsat", output):
+            return "UNSAT", None
+
+        return "TIMEOUT", None
+
+    def _get_run_cmd(
+        self,
+        network: Path,
+        property: Path,
+        *,
+        config: Any,
+        timeout: int = 600,
+    ) -> tuple[list[str], Path | None]:
+        with tmp_file(".txt") as tmp:
+            result_file = Path(tmp.name)
+
+        return ["fake_tool.py", str(config["behaviour"])], result_file
+
+    def _verify_network_batch(
+        self,
+        network: Path,
+        instances: list[VerificationInstance],
+        *,
+        config: Configuration | Path,
+    ) -> list[CompleteVerificationData | None]:
+        if not self.native_batch:
+            return super()._verify_network_batch(network, instances, config=config)
+
+        assert isinstance(config, Configuration)
+        self.batch_processes += 1
+        run_args = ["fake_tool.py", "--batch", str(config["behaviour"]), str(len(instances))]
+
+        return self._run_batch(run_args, instances, banner=FAKE_BANNER)
+
+
+@pytest.fixture
+def fake_verifier(tmp_path: Path) -> FakeVerifier:
+    (tmp_path / "fake_tool.py").write_text(FAKE_TOOL)
+    return FakeVerifier(tmp_path)
+
+
+@pytest.fixture
+def fake_config():
+    def _config(behaviour: str) -> Configuration:
+        return Configuration(FakeConfigspace, {"behaviour": behaviour})
+
+    return _config
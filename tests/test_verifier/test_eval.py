@@ -1,11 +1,15 @@
+import asyncio
 from pathlib import Path
 
 import pandas as pd
 import pytest
 
+from autoverify.util.results_store import ResultsStore
 from autoverify.util.verification_instance import VerificationInstance
 from autoverify.verifier import Nnenum
-from autoverify.verify.eval_verifier import eval_verifier
+from autoverify.verify.eval_verifier import aiter_eval_verifier, eval_verifier, iter_eval_verifier
+
+from .conftest import FakeVerifier
 
 
 @pytest.mark.verifier
@@ -41,3 +45,100 @@ def test_eval_verifier(
     assert not pd.isna(row_sat["counter_example"])
     assert pd.isna(row_sat["stderr"])
     assert not pd.isna(row_sat["stdout"])
+
+
+def test_iter_eval_verifier(
+    fake_verifier: FakeVerifier,
+    fake_config,
+    trivial_sat: VerificationInstance,
+    trivial_unsat: VerificationInstance,
+    tmp_path: Path,
+):
+    tmp_csv = tmp_path / "tmp_res.csv"
+    results = iter_eval_verifier(
+        fake_verifier,
+        [trivial_sat, trivial_unsat],
+        fake_config("sat"),
+        warmup=False,
+        output_csv_path=tmp_csv,
+    )
+
+    # The first result is written and yielded before the second run starts
+    instance, result = next(results)
+    assert instance == trivial_sat
+    assert result.result == "SAT"
+    assert len(pd.read_csv(tmp_csv).index) == 1
+
+    assert [instance for instance, _ in results] == [trivial_unsat]
+
+    seen: list[VerificationInstance] = []
+    eval_verifier(
+        fake_verifier,
+        [trivial_sat, trivial_unsat],
+        fake_config("sat"),
+        warmup=False,
+        on_result=lambda instance, _: seen.append(instance),
+    )
+    assert seen == [trivial_sat, trivial_unsat]
+
+
+def test_aiter_eval_verifier(fake_verifier: FakeVerifier, fake_config, trivial_sat: VerificationInstance):
+    async def collect():
+        return [
+            result.result
+            async for _, result in aiter_eval_verifier(fake_verifier, [trivial_sat], fake_config("unsat"), warmup=False)
+        ]
+
+    assert asyncio.run(collect()) == ["UNSAT"]
+
+
+def test_eval_verifier_resume(
+    fake_verifier: FakeVerifier,
+    fake_config,
+    trivial_sat: VerificationInstance,
+    trivial_unsat: VerificationInstance,
+    tmp_path: Path,
+):
+    tmp_csv = tmp_path / "tmp_res.csv"
+    eval_verifier(fake_verifier, [trivial_sat], fake_config("sat"), warmup=False, output_csv_path=tmp_csv)
+
+    # The sweep was killed while writing its next row
+    with open(tmp_csv, "a") as csv_file:
+        csv_file.write("test_unsat.onnx,test_prop")
+
+    results = eval_verifier(
+        fake_verifier,
+        [trivial_sat, trivial_unsat],
+        fake_config("sat"),
+        warmup=False,
+        output_csv_path=tmp_csv,
+        resume=True,
+    )
+
+    assert list(results) == [trivial_unsat]
+    assert list(pd.read_csv(tmp_csv)["network"]) == ["test_sat.onnx", "test_unsat.onnx"]
+
+
+def test_eval_verifier_results_store(
+    fake_verifier: FakeVerifier,
+    fake_config,
+    trivial_sat: VerificationInstance,
+    trivial_unsat: VerificationInstance,
+    tmp_path: Path,
+):
+    with ResultsStore(tmp_path / "results.db") as store:
+        eval_verifier(fake_verifier, [trivial_sat], fake_config("unsat"), warmup=False, results_store=store)
+        results = eval_verifier(
+            fake_verifier,
+            [trivial_sat, trivial_unsat],
+            fake_config("unsat"),
+            warmup=False,
+            results_store=store,
+            resume=True,
+        )
+
+        assert list(results) == [trivial_unsat]
+        df = store.load(with_output=True)
+        assert list(df["network"]) == ["test_sat.onnx", "test_unsat.onnx"]
+        assert list(df["result"]) == ["UNSAT", "UNSAT"]
+        assert all("fake tool started" in stdout for stdout in df["stdout"])
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from ConfigSpace import Configuration
+
+from autoverify.config import get_config
+from autoverify.util.verification_instance import VerificationInstance
+from autoverify.verifier.launch_spec import LaunchSpec
+
+from .conftest import FakeVerifier
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_kill_escalation(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    monkeypatch: pytest.MonkeyPatch,
+    warm: bool,
+):
+    monkeypatch.setattr(get_config(), "kill_grace_sec", 0.5)
+    fake_verifier.use_warm_worker(warm)
+
+    data = fake_verifier.verify_property(
+        trivial_sat.network,
+        trivial_sat.property,
+        config=fake_config("stubborn"),
+        timeout=1,
+    ).unwrap()
+
+    # The tool ignores SIGTERM, so it is only gone after the grace period
+    assert data.result == "TIMEOUT"
+    assert data.returncode == -9
+    assert data.usage is not None
+    assert 0.5 <= data.usage.teardown < 5
+
+
+def test_kill_escalation_async(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(get_config(), "kill_grace_sec", 0.5)
+
+    data = asyncio.run(
+        fake_verifier.averify_property(
+            trivial_sat.network,
+            trivial_sat.property,
+            config=fake_config("stubborn"),
+            timeout=1,
+        )
+    ).unwrap()
+
+    assert data.result == "TIMEOUT"
+    assert data.usage is not None
+    assert 0.5 <= data.usage.teardown < 5
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_memory_limit(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    warm: bool,
+):
+    fake_verifier.use_warm_worker(warm)
+    fake_verifier.use_memory_limit(1024)
+
+    memout = fake_verifier.verify_instance(trivial_sat, config=fake_config("hog")).unwrap()
+    assert memout.result == "MEMOUT"
+    assert memout.took == trivial_sat.timeout
+
+    # Runs within the limit are not affected
+    assert fake_verifier.verify_instance(trivial_sat, config=fake_config("sat")).unwrap().result == "SAT"
+
+
+def test_cpu_time_limit(fake_verifier: FakeVerifier, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(get_config(), "limit_cpu_time", True)
+    monkeypatch.setattr(get_config(), "kill_grace_sec", 2)
+    fake_verifier._cpu_gpu_allocation = (0, 1, -1)
+
+    assert fake_verifier._get_launch_spec(timeout=10).cpu_time_limit == 24
+    assert fake_verifier._get_launch_spec().cpu_time_limit is None
+
+
+def test_launch_spec_command(tmp_path: Path):
+    argv = [sys.executable, "-c", "print('hi')"]
+    assert LaunchSpec(cwd=tmp_path, env={}).command(argv) == argv
+
+    cpu = sorted(os.sched_getaffinity(0))[0]
+    spec = LaunchSpec(cwd=tmp_path, env=dict(os.environ), cpus=[cpu], cpu_time_limit=100)
+    script = "; ".join(
+        [
+            "import os, resource",
+            "print(os.getpid(), sorted(os.sched_getaffinity(0)), resource.getrlimit(resource.RLIMIT_CPU))",
+        ]
+    )
+    process = subprocess.Popen(spec.command([sys.executable, "-c", script]), stdout=subprocess.PIPE, text=True)
+    stdout, _ = process.communicate()
+
+    # The shim execs the tool, so the tool keeps the pid that was launched
+    assert stdout.split(maxsplit=1)[0] == str(process.pid)
+    assert f"[{cpu}] (100, 105)" in stdout
+    assert resource.getrlimit(resource.RLIMIT_CPU) != (100, 105)
@@ -0,0 +1,119 @@
+import shutil
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from ConfigSpace import Configuration
+
+from autoverify.util.verification_instance import VerificationInstance
+from autoverify.verifier.result_cache import ResultCache
+from autoverify.verifier.verification_result import CompleteVerificationData
+
+from .conftest import FakeVerifier
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ResultCache:
+    return ResultCache(tmp_path / "cache")
+
+
+def test_cache_decisive_results(cache: ResultCache):
+    cache.put("ab01", CompleteVerificationData("UNSAT", 5.0, stdout="out"), 60)
+
+    hit = cache.get("ab01", 60)
+    assert hit is not None
+    assert hit.result == "UNSAT"
+    assert hit.took == 5.0
+    assert hit.stdout == "out"
+
+    # Would not have finished in time with a shorter timeout
+    hit = cache.get("ab01", 2)
+    assert hit is not None
+    assert hit.result == "TIMEOUT"
+    assert hit.took == 2
+
+    assert cache.get("cd02", 60) is None
+    assert cache.stats.hits == 2
+    assert cache.stats.misses == 1
+
+
+def test_cache_timeouts(cache: ResultCache):
+    cache.put("ab01", CompleteVerificationData("TIMEOUT", 30), 30)
+
+    assert cache.get("ab01", 30).result == "TIMEOUT"  # type: ignore
+    assert cache.get("ab01", 10).result == "TIMEOUT"  # type: ignore
+    assert cache.get("ab01", 60) is None
+
+    # A longer timeout or a decisive result replaces the entry, not the other way around
+    cache.put("ab01", CompleteVerificationData("TIMEOUT", 10), 10)
+    assert cache.get("ab01", 30) is not None
+
+    cache.put("ab01", CompleteVerificationData("SAT", 40, counter_example="x"), 60)
+    cache.put("ab01", CompleteVerificationData("TIMEOUT", 100), 100)
+
+    hit = cache.get("ab01", 100)
+    assert hit is not None
+    assert hit.result == "SAT"
+    assert hit.counter_example == "x"
+
+
+def test_cache_ignores_errors(cache: ResultCache):
+    cache.put("ab01", CompleteVerificationData("ERR", 1), 60)
+    assert cache.get("ab01", 60) is None
+    assert cache.stats.writes == 0
+
+
+def test_cache_eviction(cache: ResultCache):
+    for i in range(10):
+        cache.put(f"{i:02d}", CompleteVerificationData("UNSAT", 1.0, stdout="x" * 1000), 60)
+
+    entry_size = cache.size() // 10
+    cache.max_size = 4 * entry_size
+
+    assert cache.evict() == 6
+    assert cache.size() <= cache.max_size
+    assert cache.get("09", 60) is not None
+    assert cache.get("00", 60) is None
+
+
+def test_cache_key(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    cache: ResultCache,
+    tmp_path: Path,
+):
+    def key(network: Path, config: Configuration) -> str:
+        return cache.make_key(fake_verifier, network, trivial_sat.property, config)
+
+    base = key(trivial_sat.network, fake_config("sat"))
+    assert key(trivial_sat.network, fake_config("unsat")) != base
+
+    # Keys depend on file contents, not paths
+    network_copy = tmp_path / "copy.onnx"
+    shutil.copy(trivial_sat.network, network_copy)
+    assert key(network_copy, fake_config("sat")) == base
+
+    fake_verifier._batch_size = 1
+    assert key(trivial_sat.network, fake_config("sat")) != base
+
+
+def test_verify_property_uses_cache(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    cache: ResultCache,
+):
+    fake_verifier.use_result_cache(cache=cache)
+
+    first = fake_verifier.verify_instance(trivial_sat, config=fake_config("sat"))
+    assert first.unwrap().result == "SAT"
+    assert cache.stats.misses == 1
+
+    # The tool is gone, so this can only be answered from the cache
+    (fake_verifier.tool_path / "fake_tool.py").unlink()
+
+    second = fake_verifier.verify_instance(trivial_sat, config=fake_config("sat"))
+    assert second.unwrap().result == "SAT"
+    assert second.unwrap().took == first.unwrap().took
+    assert cache.stats.hits == 1
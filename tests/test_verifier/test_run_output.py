@@ -0,0 +1,90 @@
+import gzip
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from ConfigSpace import Configuration
+
+from autoverify.config import get_config
+from autoverify.util.verification_instance import VerificationInstance
+from autoverify.verifier.run_output import RunOutput, new_log_file
+from autoverify.verifier.verification_result import VerificationResultString
+
+from .conftest import FakeVerifier
+
+
+def _detect(line: str) -> VerificationResultString | None:
+    return "UNSAT" if line == "Result: unsat\n" else None
+
+
+def test_run_output_tail(tmp_path: Path):
+    log_file = new_log_file(tmp_path / "logs", "fake")
+    output = RunOutput(detect=_detect, tail_size=10, log_file=log_file)
+
+    assert not output.feed("first line\n")
+    assert not output.feed("Result: un")
+    assert output.feed("sat\nlast\n")
+    output.close()
+
+    assert output.verdict == "UNSAT"
+    assert output.truncated
+    assert output.tail() == "nsat\nlast\n"
+
+    with gzip.open(log_file, "rt") as f:
+        assert f.read() == "first line\nResult: unsat\nlast\n"
+
+
+def test_run_output_unterminated_line():
+    output = RunOutput(detect=_detect, tail_size=100)
+    output.feed("Result: unsat")
+
+    assert output.verdict is None
+    output.close()
+    assert output.verdict is None  # Only whole lines announce a verdict
+
+    output = RunOutput(detect=lambda line: "SAT" if "sat" in line else None)
+    output.feed("Result: sat")
+    output.close()
+    assert output.verdict == "SAT"
+
+
+@pytest.fixture
+def output_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    config = get_config()
+    monkeypatch.setattr(config, "output_tail_kb", 4)
+    monkeypatch.setattr(config, "output_log_path", tmp_path / "logs")
+
+    return tmp_path / "logs"
+
+
+def test_chatty_tool(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    output_config: Path,
+):
+    data = fake_verifier.verify_instance(trivial_sat, config=fake_config("chatty")).unwrap()
+
+    # The verdict scrolled out of the tail, but was detected while streaming
+    assert data.result == "UNSAT"
+    assert len(data.stdout) <= 4 * 1024
+    assert data.stdout.endswith("teardown 9999: " + 80 * "x" + "\n")
+
+    assert data.log_file is not None and data.log_file.parent == output_config
+    with gzip.open(data.log_file, "rt") as f:
+        assert f.read().count("\n") == 20001 + 1  # and "fake tool started"
+
+
+def test_stop_on_verdict(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+):
+    fake_verifier.use_early_stop()
+    run = fake_verifier.start_instance(trivial_sat, config=fake_config("linger"))
+
+    data = run.wait(30).unwrap()
+
+    assert run.stopped_early
+    assert data.result == "UNSAT"
+    assert data.took < 10
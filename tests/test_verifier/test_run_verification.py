@@ -0,0 +1,269 @@
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from ConfigSpace import Configuration
+from result import Err, Ok
+
+from autoverify.config import get_config
+from autoverify.util.verification_instance import VerificationInstance
+
+from .conftest import FakeVerifier
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_fake_verifier_results(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    warm: bool,
+):
+    fake_verifier.use_warm_worker(warm)
+
+    result = fake_verifier.verify_instance(trivial_sat, config=fake_config("sat"))
+    assert isinstance(result, Ok)
+    assert result.unwrap().result == "SAT"
+
+    result = fake_verifier.verify_instance(trivial_sat, config=fake_config("unsat"))
+    assert isinstance(result, Ok)
+    assert result.unwrap().result == "UNSAT"
+
+    result = fake_verifier.verify_instance(trivial_sat, config=fake_config("fail"))
+    assert isinstance(result, Err)
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_fake_verifier_timeout(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    warm: bool,
+):
+    fake_verifier.use_warm_worker(warm)
+
+    result = fake_verifier.verify_property(
+        trivial_sat.network,
+        trivial_sat.property,
+        config=fake_config("sleep"),
+        timeout=1,
+    )
+
+    assert isinstance(result, Ok)
+    assert result.unwrap().result == "TIMEOUT"
+
+
+def test_fake_verifier_usage(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+):
+    usage = fake_verifier.verify_instance(trivial_sat, config=fake_config("sat")).unwrap().usage
+
+    assert usage is not None
+    assert usage.wall > 0
+    assert usage.peak_rss_mb > 0
+    assert usage.cpu_user + usage.cpu_sys > 0
+    assert usage.teardown == 0
+
+    timeout = fake_verifier.verify_property(
+        trivial_sat.network,
+        trivial_sat.property,
+        config=fake_config("sleep"),
+        timeout=1,
+    ).unwrap()
+
+    # `took` is the timeout, the usage has how long the tool actually ran
+    assert timeout.took == 1
+    assert timeout.usage is not None
+    assert timeout.usage.wall >= 1
+    assert 0 <= timeout.usage.teardown < timeout.usage.wall
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_fake_verifier_batch(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    trivial_unsat: VerificationInstance,
+    native: bool,
+):
+    fake_verifier.native_batch = native
+    instances = [trivial_sat, trivial_unsat, trivial_sat]
+
+    results = fake_verifier.verify_batch(instances, config=fake_config("unsat"))
+
+    assert len(results) == 3
+    assert all(isinstance(r, Ok) and r.unwrap().result == "UNSAT" for r in results)
+    assert fake_verifier.batch_processes == (2 if native else 0)
+
+    if native:
+        assert results[0].unwrap().stdout == "Result: unsat\n"
+
+
+def test_fake_verifier_batch_warm_workers_config(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(get_config(), "warm_workers", False)
+
+    def launch_warm(*args, **kwargs):
+        raise AssertionError("Warm workers are disabled")
+
+    monkeypatch.setattr(fake_verifier, "_launch_warm", launch_warm)
+    results = fake_verifier.verify_batch([trivial_sat, trivial_sat], config=fake_config("unsat"))
+
+    assert all(isinstance(r, Ok) and r.unwrap().result == "UNSAT" for r in results)
+
+
+def test_fake_verifier_batch_crash_falls_back(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+):
+    fake_verifier.native_batch = True
+
+    # The batch process crashes on the first instance, so every instance is
+    # retried on its own (and fails again)
+    results = fake_verifier.verify_batch([trivial_sat, trivial_sat], config=fake_config("fail"))
+
+    assert fake_verifier.batch_processes == 1
+    assert all(isinstance(r, Err) for r in results)
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_fake_verifier_async(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    warm: bool,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    fake_verifier.use_warm_worker(warm)
+    launch_warm = fake_verifier._launch_warm
+    warm_launches = []
+
+    def count_launch_warm(*args, **kwargs):
+        warm_launches.append(args)
+        return launch_warm(*args, **kwargs)
+
+    monkeypatch.setattr(fake_verifier, "_launch_warm", count_launch_warm)
+
+    async def verify_all():
+        return await asyncio.gather(
+            fake_verifier.averify_instance(trivial_sat, config=fake_config("sat")),
+            fake_verifier.averify_instance(trivial_sat, config=fake_config("unsat")),
+            fake_verifier.averify_instance(trivial_sat, config=fake_config("fail")),
+            fake_verifier.averify_property(
+                trivial_sat.network,
+                trivial_sat.property,
+                config=fake_config("sleep"),
+                timeout=1,
+            ),
+        )
+
+    sat, unsat, fail, timeout = asyncio.run(verify_all())
+
+    assert sat.unwrap().result == "SAT"
+    assert unsat.unwrap().result == "UNSAT"
+    assert isinstance(fail, Err)
+    assert timeout.unwrap().result == "TIMEOUT"
+    assert timeout.unwrap().took == 1
+    assert len(warm_launches) == (4 if warm else 0)
+
+    # The same runs as `start`, including the resource usage of the tool
+    usage = sat.unwrap().usage
+    assert usage is not None
+    assert usage.peak_rss_mb > 0
+    assert usage.cpu_user + usage.cpu_sys > 0
+
+
+def test_fake_verifier_async_cancel(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+):
+    async def verify_and_cancel():
+        task = asyncio.create_task(fake_verifier.averify_instance(trivial_sat, config=fake_config("sleep")))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        await task
+
+    start = time.monotonic()
+
+    # Cancelling only returns after the tool process was killed and reaped
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(verify_and_cancel())
+
+    assert time.monotonic() - start < 10
+
+
+def test_fake_verifier_concurrent_runs(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+):
+    sleeping = fake_verifier.start_instance(trivial_sat, config=fake_config("sleep"))
+    other = fake_verifier.start_instance(trivial_sat, config=fake_config("sleep"))
+    sat = fake_verifier.start_instance(trivial_sat, config=fake_config("sat"))
+
+    assert sat.wait(10).unwrap().result == "SAT"
+    assert sleeping.poll() is None
+
+    with pytest.raises(TimeoutError):
+        sleeping.wait(0.1)
+
+    # Cancelling one run leaves the other runs of the verifier alone
+    sleeping.cancel()
+    cancelled = sleeping.wait(10).unwrap()
+
+    assert sleeping.cancelled
+    assert cancelled.result == "TIMEOUT"
+    assert cancelled.took < 10
+    assert other.poll() is None
+    assert other.elapsed > 0
+
+    fake_verifier.set_timeout_event()
+    assert other.wait(10).unwrap().result == "TIMEOUT"
+    assert other.done
+
+
+def test_run_workspace_removed(
+    fake_verifier: FakeVerifier,
+    fake_config: Callable[[str], Configuration],
+    trivial_sat: VerificationInstance,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(get_config(), "scratch_path", tmp_path / "scratch")
+    runs_dir = tmp_path / "scratch" / f"autoverify-{os.getuid()}" / "runs"
+
+    assert fake_verifier.verify_instance(trivial_sat, config=fake_config("sat")).unwrap().result == "SAT"
+    run = fake_verifier.start_instance(trivial_sat, config=fake_config("sleep"))
+
+    # The workspace of a run only exists while it is running
+    assert len(list(runs_dir.iterdir())) == 1
+    run.cancel()
+    run.wait(10)
+    assert list(runs_dir.iterdir()) == []
+
+
+def test_launch_spec(fake_verifier: FakeVerifier, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(FakeVerifier, "launch_env", property(lambda _: {"OMP_NUM_THREADS": "1"}))
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    fake_verifier._cpu_gpu_allocation = (0, 0, -1)
+    cwd = os.getcwd()
+
+    spec = fake_verifier._get_launch_spec()
+
+    assert spec.cwd == fake_verifier.working_dir
+    assert spec.env["OMP_NUM_THREADS"] == "1"
+    assert spec.cpus == [0]
+
+    # Nothing about the launch leaks into this process
+    assert "OMP_NUM_THREADS" not in os.environ
+    assert os.getcwd() == cwd
@@ -76,5 +76,8 @@ def test_verify_batch(
     verifier: CompleteVerifier,
     trivial_sat: VerificationInstance,
 ):
-    with pytest.raises(NotImplementedError):
-        verifier.verify_batch([trivial_sat])
+    results = verifier.verify_batch([trivial_sat])
+
+    assert len(results) == 1
+    assert isinstance(results[0], Ok)
+    assert results[0].value.result == "SAT"
@@ -6,11 +6,10 @@ from autoverify.verifier import AbCrown, Nnenum
 
 @pytest.mark.verifier
 @pytest.mark.gpu
-def test_allocate_run_cmd():
+def test_allocation():
     verifier = Nnenum(cpu_gpu_allocation=(0, 1, -1))
-    contexts = verifier.contexts or []
-    run_cmd = verifier._allocate_run_cmd("foo", contexts)
-    assert run_cmd == "taskset --cpu-list 0,1 foo"
+    assert verifier._allocated_cpus() == [0, 1]
+    assert verifier._allocated_gpu_env() == {}
 
     # Skip GPU allocation test if no GPUs are available
     gpus = nvidia_gpu_count()
@@ -18,8 +17,5 @@ def test_allocate_run_cmd():
         pytest.skip("No NVIDIA GPUs available")
 
     verifier = AbCrown(cpu_gpu_allocation=(0, 1, 0))
-    contexts = verifier.contexts or []
-    pre_len = len(contexts)
-    run_cmd = verifier._allocate_run_cmd("foo", contexts)
-    assert run_cmd == "taskset --cpu-list 0,1 foo"
-    assert len(contexts) == pre_len + 1
+    assert verifier._allocated_cpus() == [0, 1]
+    assert verifier._get_launch_spec().env["CUDA_VISIBLE_DEVICES"] == "0"
@@ -0,0 +1,91 @@
+import os
+import signal
+import sys
+from pathlib import Path
+
+import pytest
+
+from autoverify.verifier.warm_worker import WarmWorker, WarmWorkerKey, WarmWorkerPool
+
+
+@pytest.fixture
+def tool_dir(tmp_path: Path) -> Path:
+    (tmp_path / "ok.py").write_text("import sys\nprint('Result: unsat', sys.argv[1:])\n")
+    (tmp_path / "fail.py").write_text("import sys\nprint('boom')\nsys.exit(3)\n")
+    (tmp_path / "sleep.py").write_text("import time\nprint('sleeping', flush=True)\ntime.sleep(60)\n")
+    (tmp_path / "pid.py").write_text("import os\nprint(os.getppid())\n")
+    return tmp_path
+
+
+def _worker(tool_dir: Path, max_jobs: int = 100) -> WarmWorker:
+    return WarmWorker(tool_dir, python=sys.executable, preload=["json"], max_jobs=max_jobs)
+
+
+def test_warm_worker_job_output(tool_dir: Path):
+    worker = _worker(tool_dir)
+    process = worker.launch(["ok.py", "--foo"], cwd=tool_dir, env=dict(os.environ))
+
+    assert process.stdout.read() == "Result: unsat ['--foo']\n"
+    assert process.wait() == 0
+
+    process = worker.launch(["fail.py"], cwd=tool_dir, env=dict(os.environ))
+    assert process.stdout.read() == "boom\n"
+    assert process.wait() == 3
+    assert worker.jobs_done == 2
+
+    worker.close()
+
+
+def test_warm_worker_kill_job(tool_dir: Path):
+    worker = _worker(tool_dir)
+    process = worker.launch(["sleep.py"], cwd=tool_dir, env=dict(os.environ))
+
+    assert process.stdout.readline() == "sleeping\n"
+    os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+    process.stdout.read()
+
+    assert process.wait() == -signal.SIGTERM
+    assert worker.alive
+
+    worker.close()
+
+
+def test_warm_worker_pool_recycles(tool_dir: Path):
+    pool = WarmWorkerPool()
+    key = WarmWorkerKey("fake", "env", str(tool_dir))
+
+    worker = pool.acquire(key, python=sys.executable, max_jobs=1)
+    process = worker.launch(["pid.py"], cwd=tool_dir, env=dict(os.environ))
+    first_pid = int(process.stdout.read())
+    process.wait()
+    pool.release(key, worker)
+
+    assert not worker.alive
+
+    worker = pool.acquire(key, python=sys.executable, max_jobs=1)
+    process = worker.launch(["pid.py"], cwd=tool_dir, env=dict(os.environ))
+    assert int(process.stdout.read()) != first_pid
+    process.wait()
+    pool.release(key, worker)
+    pool.shutdown()
+
+
+def test_warm_worker_crash(tool_dir: Path):
+    pool = WarmWorkerPool()
+    key = WarmWorkerKey("fake", "env", str(tool_dir))
+
+    worker = pool.acquire(key, python=sys.executable)
+    process = worker.launch(["sleep.py"], cwd=tool_dir, env=dict(os.environ))
+    process.stdout.readline()
+    os.killpg(worker._process.pid, signal.SIGKILL)
+
+    assert process.wait() == -signal.SIGKILL
+    pool.release(key, worker)
+
+    new_worker = pool.acquire(key, python=sys.executable)
+    assert new_worker is not worker
+    process = new_worker.launch(["ok.py"], cwd=tool_dir, env=dict(os.environ))
+    assert process.stdout.read().startswith("Result: unsat")
+    assert process.wait() == 0
+    pool.release(key, new_worker)
+    pool.shutdown()